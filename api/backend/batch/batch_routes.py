@@ -0,0 +1,97 @@
+from flask import Blueprint, request, jsonify, make_response, current_app
+from backend.db_connection import db
+from urllib.parse import urlsplit
+
+batch = Blueprint('batch', __name__)
+
+# Upper bound on the number of sub-requests accepted in one batch
+MAX_BATCH_SIZE = 50
+
+# Paths that can't run inside a batch: /batch itself, and the event streams and
+# long polls, which hold their request open
+UNBATCHABLE_PREFIXES = ('/batch', '/events')
+
+
+def batchable(path):
+    route = urlsplit(path).path.rstrip('/')
+    return not any(route == prefix or route.startswith(prefix + '/') for prefix in UNBATCHABLE_PREFIXES)
+
+
+@batch.route('/', methods=['POST'])
+def run_batch():
+    """Run several API calls in one HTTP request, optionally as a single transaction"""
+    data = request.json or {}
+
+    sub_requests = data.get('requests')
+    atomic = bool(data.get('atomic', False))
+
+    if not isinstance(sub_requests, list) or not sub_requests:
+        response = make_response(jsonify({"error": "A list of requests is required"}))
+        response.status_code = 400
+        return response
+
+    if len(sub_requests) > MAX_BATCH_SIZE:
+        response = make_response(jsonify({"error": f"A batch can hold at most {MAX_BATCH_SIZE} requests"}))
+        response.status_code = 400
+        return response
+
+    for sub_request in sub_requests:
+        path = sub_request.get('path', '') if isinstance(sub_request, dict) else ''
+        if not path.startswith('/') or not batchable(path):
+            response = make_response(jsonify({"error": f"Invalid request path: {path}"}))
+            response.status_code = 400
+            return response
+
+    results = []
+    failed = False
+
+    # Every sub-request runs through the normal blueprints on this request's connection
+    with db.shared_connection(atomic=atomic) as conn:
+        for sub_request in sub_requests:
+            result = dispatch(sub_request)
+            results.append(result)
+
+            if result['status'] >= 400:
+                failed = True
+                # Drop anything the failed call left uncommitted so it can't leak into
+                # a later call's commit; in atomic mode this undoes the whole batch
+                conn.rollback()
+                if atomic:
+                    break
+
+    if atomic and not failed:
+        db.get_db().commit()
+
+    response = make_response(jsonify({
+        "responses": results,
+        "committed": not (atomic and failed)
+    }))
+    response.status_code = 200
+    return response
+
+
+def dispatch(sub_request, max_redirects=3):
+    """Run one sub-request through the app and capture its status and JSON body"""
+    method = sub_request.get('method', 'GET').upper()
+    path = sub_request['path']
+
+    try:
+        for _ in range(max_redirects + 1):
+            with current_app.test_request_context(path, method=method, json=sub_request.get('body')):
+                sub_response = current_app.full_dispatch_request()
+
+            # Follow the trailing-slash redirects Flask issues for routes like /fridge
+            if sub_response.status_code in (307, 308) and sub_response.location:
+                location = urlsplit(sub_response.location)
+                path = location.path + (f"?{location.query}" if location.query else '')
+                continue
+            break
+
+        body = sub_response.get_json(silent=True)
+        if body is None:
+            body = sub_response.get_data(as_text=True)
+
+        return {"path": sub_request['path'], "status": sub_response.status_code, "body": body}
+    except Exception as e:
+        current_app.logger.error(f"Error running batch request {method} {path}: {str(e)}")
+        return {"path": sub_request['path'], "status": 500, "body": {"error": "Request failed"}}
@@ -0,0 +1,73 @@
+#------------------------------------------------------------
+# Delta sync for the GET .../changes endpoints
+#
+# A client syncs a table by calling the endpoint without a token
+# first, which sends every row, and then with ?since=<token> from
+# its last response, which sends only the rows inserted, updated
+# or deleted since:
+#   {"token": "...", "full": false,
+#    "upserted": [rows, in the table's usual listing shape],
+#    "deleted": [the keys of rows that are gone]}
+# Applying a response is idempotent, so rows sent twice (see
+# change_queries.SETTLE_SECONDS) do no harm. A token older than
+# the retained log gets a 410 and the client syncs in full again.
+#------------------------------------------------------------
+from flask import jsonify, make_response
+
+from backend.queries import change_queries
+
+
+def parse_token(value):
+    """The change_id a ?since= token stands for, None for no token, or False if it isn't one"""
+    if value is None or value == '':
+        return None
+    if not value.isdigit():
+        return False
+    return int(value)
+
+
+def change_feed_response(cursor, since, snapshot_query, changes_query, keys, scope=()):
+    """
+    Respond with every row (snapshot_query) when since is None, else with the
+    rows changes_query finds changed after it. scope is the parameters both
+    queries take before the change range; keys are the columns that identify a
+    deleted row. Runs two statements.
+    """
+    cursor.execute(change_queries.BOUNDS)
+    bounds = cursor.fetchone()
+    latest = bounds['latest'] or 0
+    settled = bounds['settled'] or 0
+
+    if since is None:
+        cursor.execute(snapshot_query, scope)
+        response = make_response(jsonify({
+            "token": str(settled),
+            "full": True,
+            "upserted": cursor.fetchall(),
+            "deleted": []
+        }))
+        response.status_code = 200
+        return response
+
+    # Changes after the token were pruned, or the log was reset since it was handed out
+    if (bounds['oldest'] is not None and since < bounds['oldest'] - 1) or since > latest:
+        response = make_response(jsonify({"error": "The change token has expired, sync again without since"}))
+        response.status_code = 410
+        return response
+
+    cursor.execute(changes_query, tuple(scope) + (since, latest))
+    upserted, deleted = [], []
+    for row in cursor.fetchall():
+        if row.pop('deleted'):
+            deleted.append({key: row[key] for key in keys})
+        else:
+            upserted.append(row)
+
+    response = make_response(jsonify({
+        "token": str(max(since, settled)),
+        "full": False,
+        "upserted": upserted,
+        "deleted": deleted
+    }))
+    response.status_code = 200
+    return response
@@ -1,10 +1,151 @@
 #------------------------------------------------------------
 # This file creates a shared DB connection resource
 #------------------------------------------------------------
+import os
+import time
+from contextlib import contextmanager
+
+import pymysql
+from dotenv import load_dotenv
+from flask import g
 from flaskext.mysql import MySQL
 from pymysql import cursors
 
 
-# the parameter instructs the connection to return data 
-# as a dictionary object. 
-db = MySQL(cursorclass=cursors.DictCursor)
\ No newline at end of file
+class Cursor(object):
+    """
+    Wrapper around a PyMySQL cursor that times every statement and reports
+    it to the listeners registered with db.add_statement_listener().
+    """
+
+    def __init__(self, cursor, listeners):
+        self._cursor = cursor
+        self._listeners = listeners
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._report(query, args, time.perf_counter() - start)
+
+    def executemany(self, query, args):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._report(query, args, time.perf_counter() - start)
+
+    def _report(self, query, args, duration):
+        for listener in self._listeners:
+            listener(query, args, duration, self._cursor.rowcount)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class Connection(object):
+    """
+    Thin wrapper around the PyMySQL connection handed out by db.get_db().
+    Everything is passed through to the real connection except cursor(),
+    which is instrumented when statement listeners are registered, and
+    commit(), which is held back while db.shared_connection(atomic=True)
+    is active.
+    """
+
+    def __init__(self, conn, listeners):
+        self._conn = conn
+        self._listeners = listeners
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        if self._listeners:
+            return Cursor(cursor, self._listeners)
+        return cursor
+
+    def commit(self):
+        if g.get('db_hold_commits'):
+            return
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class FridgeFriendMySQL(MySQL):
+    """
+    flask-mysql extension that lets nested requests share one connection
+    and lets other modules observe every SQL statement that is executed
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_listeners = []
+
+    def add_statement_listener(self, listener):
+        """Call listener(query, args, duration_seconds, rowcount) after every statement"""
+        if listener not in self.statement_listeners:
+            self.statement_listeners.append(listener)
+
+    def get_db(self):
+        conn = super().get_db()
+        return Connection(conn, self.statement_listeners) if conn is not None else None
+
+    def teardown_request(self, exception):
+        # flask-mysql closes the connection whenever a request context is popped,
+        # which would also happen for every nested sub-request of /batch
+        if g.get('db_shared'):
+            return
+        super().teardown_request(exception)
+
+    def release(self):
+        """
+        Close the current request's connection before the request ends, e.g.
+        before it waits on something else for a long time. Nothing is run on
+        the connection afterwards; a shared one is left open.
+        """
+        if g.get('db_shared'):
+            return
+        super().teardown_request(None)
+
+    @contextmanager
+    def shared_connection(self, atomic=False):
+        """
+        Keep the current request's connection open for nested requests
+        dispatched inside the block. With atomic=True their commits are
+        deferred so the caller can commit or roll back all of them at once.
+        """
+        g.db_shared = True
+        g.db_hold_commits = atomic
+        try:
+            yield self.get_db()
+        finally:
+            g.db_shared = False
+            g.db_hold_commits = False
+
+
+# the parameter instructs the connection to return data
+# as a dictionary object.
+db = FridgeFriendMySQL(cursorclass=cursors.DictCursor)
+
+
+def connect(**kwargs):
+    """
+    Open a standalone connection (outside of a Flask request) with the same
+    .env settings create_app() uses. Used by CLI tools, jobs and benchmarks.
+    """
+    load_dotenv()
+    settings = dict(
+        host=os.getenv('DB_HOST').strip(),
+        port=int(os.getenv('DB_PORT').strip()),
+        user=os.getenv('DB_USER').strip(),
+        password=os.getenv('MYSQL_ROOT_PASSWORD').strip(),
+        database=os.getenv('DB_NAME').strip(),
+        charset='utf8mb4',
+        cursorclass=cursors.DictCursor,
+    )
+    settings.update(kwargs)
+    return pymysql.connect(**settings)
@@ -0,0 +1,159 @@
+#------------------------------------------------------------
+# Query profiler for debugging the DB layer
+#
+# Every statement run while handling a request is recorded so the
+# route's query budget (set with @query_budget) can be checked.
+# With DB_PROFILE on, the profiler also logs each request's
+# statements, flags query shapes that were repeated (the usual
+# N+1 pattern) and logs slow statements with their EXPLAIN plan.
+# Going over a budget is logged, and raises QueryBudgetExceeded
+# when the app is in testing mode or DB_PROFILE_STRICT is set.
+#------------------------------------------------------------
+import logging
+import re
+from collections import Counter
+
+from flask import current_app, request, has_request_context
+
+# Key used to keep the in-flight request's statement log in its WSGI environ
+ENVIRON_KEY = 'backend.profiler'
+
+# Statement types MySQL can EXPLAIN
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in testing/strict mode when a route runs more statements than its budget"""
+
+
+def query_budget(max_statements):
+    """Declare the most SQL statements a route should run per request"""
+    def decorator(view):
+        view.query_budget = max_statements
+        return view
+    return decorator
+
+
+def query_shape(query):
+    """Normalize a statement so calls that differ only in values compare equal"""
+    # Registered statements (backend.queries) have a fixed shape already
+    name = getattr(query, 'name', None)
+    if name:
+        return f"[{name}]"
+    shape = re.sub(r'\s+', ' ', query).strip()
+    shape = re.sub(r"'(?:[^'\\]|\\.)*'", '?', shape)
+    shape = re.sub(r'\b\d+(\.\d+)?\b', '?', shape)
+    shape = re.sub(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', '(...)', shape)
+    return shape
+
+
+class Profiler(object):
+    """Collects statements per request and reports on them when the request ends"""
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+        self.enabled = app.config['DB_PROFILE']
+        self.slow_query_seconds = app.config['DB_SLOW_QUERY_MS'] / 1000
+        self.repeat_threshold = app.config['DB_REPEAT_THRESHOLD']
+
+        if self.enabled:
+            app.logger.setLevel(logging.INFO)
+
+        db.add_statement_listener(self.record_statement)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+    def start_request(self):
+        request.environ[ENVIRON_KEY] = {"statements": [], "explaining": False}
+
+    def record_statement(self, query, args, duration, rowcount):
+        if not has_request_context():
+            return
+        log = request.environ.get(ENVIRON_KEY)
+        if log is None or log["explaining"]:
+            return
+
+        log["statements"].append((query, duration, rowcount))
+
+        if self.enabled and duration >= self.slow_query_seconds:
+            current_app.logger.warning(
+                f"Slow query ({duration * 1000:.1f} ms, {rowcount} rows) in "
+                f"{request.method} {request.path}: {query_shape(query)}\n{self.explain(log, query, args)}"
+            )
+
+    def explain(self, log, query, args):
+        """EXPLAIN a statement on the request's connection without recording it"""
+        if not query.lstrip().upper().startswith(EXPLAINABLE):
+            return "(no EXPLAIN for this statement type)"
+
+        log["explaining"] = True
+        try:
+            cursor = self.db.get_db().cursor()
+            cursor.execute('EXPLAIN ' + query, args)
+            plan = cursor.fetchall()
+            return '\n'.join(
+                f"  {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                f"rows={row.get('rows')} extra={row.get('Extra')}"
+                for row in plan
+            )
+        except Exception as e:
+            return f"(EXPLAIN failed: {str(e)})"
+        finally:
+            log["explaining"] = False
+
+    def finish_request(self, response):
+        log = request.environ.get(ENVIRON_KEY)
+        if log is None:
+            return response
+
+        statements = log["statements"]
+
+        if self.enabled:
+            self.report(statements)
+            response.headers['X-Query-Count'] = str(len(statements))
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and len(statements) > budget:
+            message = (
+                f"{request.method} {request.path} ran {len(statements)} SQL statements, "
+                f"over its query budget of {budget}"
+            )
+            current_app.logger.warning(message)
+            if current_app.testing or current_app.config['DB_PROFILE_STRICT']:
+                raise QueryBudgetExceeded(message)
+
+        return response
+
+    def report(self, statements):
+        """Log the request's statements and any query shape that repeats too often"""
+        if not statements:
+            return
+
+        total_ms = sum(duration for _, duration, _ in statements) * 1000
+        current_app.logger.info(
+            f"{request.method} {request.path}: {len(statements)} statements, {total_ms:.1f} ms\n" +
+            '\n'.join(
+                f"  {duration * 1000:7.2f} ms {rowcount:>6} rows  {query_shape(query)}"
+                for query, duration, rowcount in statements
+            )
+        )
+
+        repeated = Counter(query_shape(query) for query, _, _ in statements)
+        for shape, count in repeated.items():
+            if count >= self.repeat_threshold:
+                current_app.logger.warning(
+                    f"Possible N+1 in {request.method} {request.path}: "
+                    f"same query shape ran {count} times: {shape}"
+                )
+
+
+def init_app(app, db):
+    """Check query budgets on every request, and profile queries if DB_PROFILE is set"""
+    app.config.setdefault('DB_PROFILE', False)
+    app.config.setdefault('DB_PROFILE_STRICT', False)
+    app.config.setdefault('DB_SLOW_QUERY_MS', 100)
+    app.config.setdefault('DB_REPEAT_THRESHOLD', 3)
+
+    return Profiler(app, db)
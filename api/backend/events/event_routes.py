@@ -0,0 +1,132 @@
+import json
+import time
+
+from flask import Blueprint, Response, request, jsonify, make_response
+from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.events.hub import DIETARY_ALERTS, TYPES, Scope, hub
+from backend.queries import event_queries
+
+events = Blueprint('events', __name__)
+
+# A stream sends a keepalive comment when it has been quiet this long, and ends
+# after STREAM_SECONDS so clients reconnect (with Last-Event-ID) and pick up
+# changes to their scope, e.g. an advisor's new clients
+KEEPALIVE_SECONDS = 15
+STREAM_SECONDS = 300
+RETRY_MS = 2000
+
+# Longest wait GET /events/poll accepts
+MAX_WAIT_SECONDS = 25
+
+
+def parse_scope(cursor):
+    """
+    The Scope of ?client_id= or ?advisor_id= (with ?types=) as (scope, None),
+    or (None, response) for an invalid or unknown one. One statement.
+    """
+    client_id = request.args.get('client_id', type=int)
+    advisor_id = request.args.get('advisor_id', type=int)
+    if (client_id is None) == (advisor_id is None):
+        response = make_response(jsonify({"error": "Either client_id or advisor_id is required"}))
+        response.status_code = 400
+        return None, response
+
+    types = [name for name in request.args.get('types', '').split(',') if name]
+    if any(name not in TYPES for name in types):
+        response = make_response(jsonify({"error": f"types must be a list of {', '.join(TYPES)}"}))
+        response.status_code = 400
+        return None, response
+
+    if advisor_id is not None:
+        cursor.execute(event_queries.ADVISOR_CLIENTS, (advisor_id,))
+        client_ids = [row['client_id'] for row in cursor.fetchall()]
+        return Scope(types or (DIETARY_ALERTS,), client_ids=client_ids), None
+
+    cursor.execute(event_queries.CLIENT_SCOPE, (client_id,))
+    client = cursor.fetchone()
+    if client is None:
+        response = make_response(jsonify({"error": "Client not found"}))
+        response.status_code = 404
+        return None, response
+    fridge_ids = [client['fridge_id']] if client['fridge_id'] is not None else []
+    return Scope(types or TYPES, fridge_ids=fridge_ids, client_ids=[client_id]), None
+
+
+def sse(event_type, data, event_id=None):
+    """One server-sent event"""
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event_type}", f"data: {json.dumps(data, default=str)}"]
+    return '\n'.join(lines) + '\n\n'
+
+
+@events.route('/stream', methods=['GET'])
+@query_budget(1)
+def stream_events():
+    """
+    Server-sent events with the fridge, leftover and dietary alert changes of
+    a client (?client_id=) or of an advisor's clients (?advisor_id=), optionally
+    only some ?types= (fridge, leftovers, dietary_alerts). A reconnecting
+    client's Last-Event-ID resumes where it left off; if that isn't possible
+    it gets a resync event and should reload what it shows.
+    """
+    scope, error = parse_scope(db.get_db().cursor())
+    if error:
+        return error
+
+    resume_from = request.headers.get('Last-Event-ID') or request.args.get('after')
+    position = hub.parse_cursor(resume_from) if resume_from else hub.latest()
+
+    # Runs after the request (and its DB connection) has ended
+    def generate(position):
+        yield f"retry: {RETRY_MS}\n\n"
+        ends_at = time.monotonic() + STREAM_SECONDS
+        while time.monotonic() < ends_at:
+            result = hub.wait(position, scope, KEEPALIVE_SECONDS) if position is not None else None
+            if result is None:
+                position = hub.latest()
+                yield sse('resync', {}, hub.cursor(position))
+                continue
+            messages, position = result
+            if not messages:
+                yield ": keepalive\n\n"
+            for message in messages:
+                yield sse(message['type'], message, message['cursor'])
+
+    response = Response(generate(position), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@events.route('/poll', methods=['GET'])
+@query_budget(1)
+def poll_events():
+    """
+    Long-poll version of /events/stream, with the same scope parameters.
+    Without ?after= it returns the cursor to start from. With one it returns
+    the changes since, waiting up to ?wait= seconds for one; resync is true
+    when the changes since can't be told apart and the client should reload.
+    """
+    scope, error = parse_scope(db.get_db().cursor())
+    if error:
+        return error
+
+    wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_WAIT_SECONDS)
+    after = request.args.get('after')
+    # Don't hold a connection while waiting
+    db.release()
+
+    result = None
+    if after:
+        position = hub.parse_cursor(after)
+        if position is not None:
+            result = hub.wait(position, scope, wait)
+
+    if result is None:
+        response = make_response(jsonify({"cursor": hub.cursor(), "events": [], "resync": bool(after)}))
+    else:
+        messages, position = result
+        response = make_response(jsonify({"cursor": hub.cursor(position), "events": messages, "resync": False}))
+    response.status_code = 200
+    return response
@@ -0,0 +1,133 @@
+#------------------------------------------------------------
+# In-process fan-out of change events to open streams
+#
+# An outbox subscriber turns the fridge, leftover and nutrition
+# events the relay (backend/outbox/relay.py) dispatches into
+# messages for the dashboards and appends them to a bounded
+# buffer; GET /events/stream and /events/poll wait on the buffer
+# for the messages in their scope. A message is one of:
+#   fridge          a fridge's lots changed (fridge_id is None for
+#                   the expiry sweeps, which touch every fridge)
+#   leftovers       the leftovers changed (they belong to no client)
+#   dietary_alerts  a client logged nutrition, which may change the
+#                   dietary alerts their advisors see
+# and carries the outbox event's topic, id and payload.
+#
+# Cursors are '<hub>-<n>', the position after the n-th message of
+# this process's hub. A cursor from another replica or from before
+# a restart, or one so old its messages left the buffer, can't be
+# resumed; the client is told to resync (reload what it shows).
+#------------------------------------------------------------
+import collections
+import threading
+import time
+import uuid
+
+from backend.outbox.outbox import subscriber
+
+FRIDGE = 'fridge'
+LEFTOVERS = 'leftovers'
+DIETARY_ALERTS = 'dietary_alerts'
+TYPES = (FRIDGE, LEFTOVERS, DIETARY_ALERTS)
+
+# Messages kept for streams and polls that are catching up
+BUFFER_SIZE = 1000
+
+
+class Scope(object):
+    """The messages one stream gets: its types, for the given fridges and clients"""
+
+    def __init__(self, types, fridge_ids=(), client_ids=()):
+        self.types = set(types)
+        self.fridge_ids = set(fridge_ids)
+        self.client_ids = set(client_ids)
+
+    def matches(self, message):
+        if message['type'] not in self.types:
+            return False
+        if message['type'] == FRIDGE:
+            return message['fridge_id'] is None or message['fridge_id'] in self.fridge_ids
+        if message['type'] == DIETARY_ALERTS:
+            return message['client_id'] in self.client_ids
+        return True
+
+
+class Hub(object):
+    """Thread-safe buffer of the latest messages that waiters are woken up for"""
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.name = uuid.uuid4().hex[:12]
+        self._messages = collections.deque(maxlen=size)
+        self._position = 0
+        self._changed = threading.Condition()
+
+    def latest(self):
+        """The current position: the number of messages published so far"""
+        return self._position
+
+    def cursor(self, position=None):
+        """The cursor for a position, by default the current one"""
+        return f"{self.name}-{self.latest() if position is None else position}"
+
+    def parse_cursor(self, cursor):
+        """The position a cursor of this hub stands for, or None if it can't be resumed here"""
+        name, _, position = (cursor or '').rpartition('-')
+        if name != self.name or not position.isdigit() or int(position) > self._position:
+            return None
+        return int(position)
+
+    def publish(self, message_type, event, **routing):
+        with self._changed:
+            self._position += 1
+            message = dict(routing, type=message_type, topic=event.topic, event_id=event.event_id,
+                           payload=event.payload, cursor=self.cursor(self._position))
+            self._messages.append((self._position, message))
+            self._changed.notify_all()
+
+    def wait(self, position, scope, timeout):
+        """
+        The messages after position that match scope, and the position to
+        continue from. Waits up to timeout seconds for a first one; returns
+        None if messages after position already left the buffer.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                if self._messages and self._messages[0][0] > position + 1:
+                    return None
+                found = []
+                for number, message in reversed(self._messages):
+                    if number <= position:
+                        break
+                    if scope.matches(message):
+                        found.append(message)
+                position = self._position
+                remaining = deadline - time.monotonic()
+                if found or remaining <= 0:
+                    return found[::-1], position
+                self._changed.wait(remaining)
+
+
+hub = Hub()
+
+
+def _id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@subscriber('fridge.*', 'leftover.*', 'recipe.cooked', 'nutrition.logged')
+def publish_event(event):
+    """Pass the events the dashboards show on to the hub"""
+    payload = event.payload
+    if event.topic == 'recipe.cooked':
+        hub.publish(FRIDGE, event, fridge_id=_id(payload.get('fridge_id')))
+        hub.publish(LEFTOVERS, event)
+    elif event.topic.startswith('fridge.'):
+        hub.publish(FRIDGE, event, fridge_id=_id(payload.get('fridge_id')))
+    elif event.topic.startswith('leftover.'):
+        hub.publish(LEFTOVERS, event)
+    else:
+        hub.publish(DIETARY_ALERTS, event, client_id=_id(payload.get('client_id')))
@@ -1,5 +1,13 @@
+import json
+from datetime import date
+
 from flask import Blueprint, request, jsonify, make_response, current_app
+from pymysql.err import IntegrityError
 from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.changes.change_feed import change_feed_response, parse_token
+from backend.outbox import outbox
+from backend.queries import digest_queries, fridge_queries
 
 fridge = Blueprint('fridge', __name__)
 
@@ -14,20 +22,91 @@ def get_fridge_inventory():
         return response
 
     cursor = db.get_db().cursor()
-    query = '''
-        SELECT fi.fridge_id, i.name, fi.quantity, i.expiration_date, fi.is_expired
-        FROM Fridge_Ingredient fi
-        JOIN Client c ON c.fridge_id = fi.fridge_id
-        JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
-        WHERE c.client_id = %s
-    '''
-    cursor.execute(query, (client_id,))
+    cursor.execute(fridge_queries.INVENTORY_FOR_CLIENT, (client_id,))
     inventory = cursor.fetchall()
     
     response = make_response(jsonify(inventory))
     response.status_code = 200
     return response
 
+@fridge.route('/changes', methods=['GET'])
+@query_budget(2)
+def get_fridge_changes():
+    """
+    A client's fridge lots changed since a change token (?since=), or all of
+    them without one, for incremental sync (see backend/changes/change_feed.py)
+    """
+    client_id = request.args.get('client_id')
+    since = parse_token(request.args.get('since'))
+
+    if not client_id:
+        response = make_response(jsonify({"error": "Client ID is required"}))
+        response.status_code = 400
+        return response
+
+    if since is False:
+        response = make_response(jsonify({"error": "since must be a change token from an earlier response"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    return change_feed_response(
+        cursor, since, fridge_queries.INVENTORY_FOR_CLIENT, fridge_queries.CHANGES_FOR_CLIENT,
+        keys=('fridge_id', 'ingredient_id', 'expiration_date'), scope=(client_id,)
+    )
+
+# Defaults and cap for GET /fridge/expiring
+EXPIRING_DAYS = 7
+EXPIRING_LIMIT = 10
+EXPIRING_MAX_LIMIT = 100
+
+@fridge.route('/expiring', methods=['GET'])
+@query_budget(1)
+def get_expiring_ingredients():
+    """Get the soonest expiring (but not yet expired) items in a client's fridge"""
+    client_id = request.args.get('client_id')
+    days = request.args.get('days', EXPIRING_DAYS, type=int)
+    limit = request.args.get('limit', EXPIRING_LIMIT, type=int)
+    
+    if not client_id:
+        response = make_response(jsonify({"error": "Client ID is required"}))
+        response.status_code = 400
+        return response
+    
+    if days < 0 or not 1 <= limit <= EXPIRING_MAX_LIMIT:
+        response = make_response(jsonify({
+            "error": f"days must be 0 or more and limit between 1 and {EXPIRING_MAX_LIMIT}"
+        }))
+        response.status_code = 400
+        return response
+    
+    cursor = db.get_db().cursor()
+    cursor.execute(fridge_queries.EXPIRING_FOR_CLIENT, (client_id, days, limit))
+    expiring = cursor.fetchall()
+    
+    response = make_response(jsonify(expiring))
+    response.status_code = 200
+    return response
+
+@fridge.route('/digest', methods=['GET'])
+@query_budget(1)
+def get_expiry_digest():
+    """Get a client's expiry digest, as last built by the expiry digest job"""
+    client_id = request.args.get('client_id')
+
+    if not client_id:
+        response = make_response(jsonify({"error": "Client ID is required"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    cursor.execute(digest_queries.FOR_CLIENT, (client_id,))
+    digest = cursor.fetchall()
+
+    response = make_response(jsonify(digest))
+    response.status_code = 200
+    return response
+
 @fridge.route('/<int:ingredient_id>', methods=['GET'])
 def get_fridge_ingredient(ingredient_id):
     """Get details for a specific ingredient"""
@@ -39,20 +118,23 @@ def get_fridge_ingredient(ingredient_id):
         return response
     
     cursor = db.get_db().cursor()
-    query = '''
-        SELECT fi.fridge_id, i.name, fi.quantity, i.expiration_date, fi.is_expired
-        FROM Fridge_Ingredient fi
-        JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
-        WHERE fi.fridge_id = %s AND fi.ingredient_id = %s
-    '''
-    cursor.execute(query, (fridge_id, ingredient_id))
-    ingredient = cursor.fetchone()
+    cursor.execute(fridge_queries.INGREDIENT_IN_FRIDGE, (fridge_id, ingredient_id))
+    lots = cursor.fetchall()
     
-    if not ingredient:
+    if not lots:
         response = make_response(jsonify({"error": "Ingredient not found in fridge"}))
         response.status_code = 404
         return response
     
+    # Totals across the ingredient's lots; the earliest lot decides the expiry
+    ingredient = dict(lots[0])
+    ingredient['quantity'] = sum(lot['quantity'] for lot in lots)
+    ingredient['is_expired'] = any(lot['is_expired'] for lot in lots)
+    ingredient['lots'] = [
+        {"expires_on": lot['expiration_date'], "quantity": lot['quantity'], "is_expired": lot['is_expired']}
+        for lot in lots
+    ]
+    
     response = make_response(jsonify(ingredient))
     response.status_code = 200
     return response
@@ -64,12 +146,9 @@ def update_expired_status():
     cursor = db.get_db().cursor()
 
     try:
-        cursor.execute('''
-                UPDATE Fridge_Ingredient fi
-                JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
-                SET fi.is_expired = TRUE
-                WHERE i.expiration_date < CURDATE()
-            ''')
+        cursor.execute(fridge_queries.MARK_EXPIRED)
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'fridge.expired_marked', rows=cursor.rowcount)
         db.get_db().commit()
         
         response = make_response(jsonify({"message": "Expired ingredients updated"}))
@@ -86,7 +165,9 @@ def remove_expired_ingredients():
     """Remove all expired ingredients"""
     cursor = db.get_db().cursor()
     try:
-        cursor.execute('DELETE FROM Fridge_Ingredient WHERE is_expired = TRUE')
+        cursor.execute(fridge_queries.DELETE_EXPIRED)
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'fridge.expired_removed', rows=cursor.rowcount)
         db.get_db().commit()
         
         count = cursor.rowcount
@@ -98,3 +179,250 @@ def remove_expired_ingredients():
         response = make_response(jsonify({"error": "Could not remove expired ingredients"}))
         response.status_code = 500
         return response
+
+
+def parse_quantity(value):
+    """A positive quantity from a request body, or None if it isn't one"""
+    try:
+        quantity = float(value)
+    except (TypeError, ValueError):
+        return None
+    return quantity if quantity > 0 else None
+
+
+def parse_expiry(value):
+    """
+    An expiry date (YYYY-MM-DD) from a request body as a string, None if it
+    was left out, or False if it isn't a valid date.
+    """
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_items(items, with_expiry=False):
+    """
+    Total quantity per (ingredient_id, expires_on) lot from a list of
+    {ingredient_id, quantity[, expires_on]} objects, or None if any item is
+    invalid; expires_on is None unless with_expiry is set. Repeated lots are
+    summed so each fridge row is written once, and the result is in
+    ingredient order so concurrent bulk requests lock rows in the same order.
+    """
+    if not isinstance(items, list) or not items:
+        return None
+    totals = {}
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        ingredient_id = item.get('ingredient_id')
+        quantity = parse_quantity(item.get('quantity'))
+        expires_on = parse_expiry(item.get('expires_on')) if with_expiry else None
+        if not isinstance(ingredient_id, int) or quantity is None or expires_on is False:
+            return None
+        key = (ingredient_id, expires_on)
+        totals[key] = totals.get(key, 0) + quantity
+    return dict(sorted(totals.items(), key=lambda lot: (lot[0][0], lot[0][1] or '')))
+
+
+@fridge.route('/<int:ingredient_id>', methods=['POST'])
+@query_budget(2)
+def add_fridge_ingredient(ingredient_id):
+    """
+    Add a quantity of an ingredient to a fridge, as the lot expiring on
+    expires_on (the ingredient's catalog date if left out)
+    """
+    data = request.json or {}
+    fridge_id = data.get('fridge_id')
+    quantity = parse_quantity(data.get('quantity'))
+    expires_on = parse_expiry(data.get('expires_on'))
+
+    if not fridge_id or quantity is None:
+        response = make_response(jsonify({"error": "Fridge ID and a positive quantity are required"}))
+        response.status_code = 400
+        return response
+
+    if expires_on is False:
+        response = make_response(jsonify({"error": "expires_on must be a YYYY-MM-DD date"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    try:
+        cursor.execute(
+            fridge_queries.ADD_STOCK,
+            (fridge_id, expires_on, quantity, data.get('unit'), ingredient_id)
+        )
+        if cursor.rowcount == 0:
+            db.get_db().rollback()
+            response = make_response(jsonify({"error": "Ingredient not found"}))
+            response.status_code = 404
+            return response
+        outbox.record(db.get_db(), 'fridge.stocked', fridge_id=fridge_id, ingredient_ids=[ingredient_id])
+        db.get_db().commit()
+
+        # ON DUPLICATE KEY UPDATE reports 1 for a new lot and 2 for an updated one
+        response = make_response(jsonify({
+            "message": "Ingredient added to fridge",
+            "created": cursor.rowcount == 1
+        }))
+        response.status_code = 201
+        return response
+    except IntegrityError:
+        db.get_db().rollback()
+        response = make_response(jsonify({"error": "Fridge not found"}))
+        response.status_code = 404
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error adding ingredient to fridge: {str(e)}")
+        response = make_response(jsonify({"error": "Could not add ingredient to fridge"}))
+        response.status_code = 500
+        return response
+
+
+@fridge.route('/<int:ingredient_id>/consume', methods=['POST'])
+@query_budget(4)
+def consume_fridge_ingredient(ingredient_id):
+    """
+    Take a quantity of an ingredient out of a fridge, earliest expiring lots
+    first, removing the lots that run out
+    """
+    data = request.json or {}
+    fridge_id = data.get('fridge_id')
+    quantity = parse_quantity(data.get('quantity'))
+
+    if not fridge_id or quantity is None:
+        response = make_response(jsonify({"error": "Fridge ID and a positive quantity are required"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    try:
+        cursor.execute(fridge_queries.LOCK_LOTS, (fridge_id, ingredient_id))
+        if not cursor.fetchall():
+            db.get_db().rollback()
+            response = make_response(jsonify({"error": "Ingredient not found in fridge"}))
+            response.status_code = 404
+            return response
+
+        cursor.execute(fridge_queries.CONSUME_STOCK, (fridge_id, ingredient_id, quantity, quantity))
+        cursor.execute(fridge_queries.DELETE_DEPLETED, (fridge_id, ingredient_id))
+        outbox.record(db.get_db(), 'fridge.consumed', fridge_id=fridge_id, ingredient_ids=[ingredient_id])
+        db.get_db().commit()
+
+        response = make_response(jsonify({
+            "message": "Ingredient consumed",
+            "lots_depleted": cursor.rowcount
+        }))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        db.get_db().rollback()
+        current_app.logger.error(f"Error consuming fridge ingredient: {str(e)}")
+        response = make_response(jsonify({"error": "Could not consume ingredient"}))
+        response.status_code = 500
+        return response
+
+
+@fridge.route('/bulk', methods=['POST'])
+@query_budget(3)
+def add_fridge_ingredients():
+    """
+    Add several ingredients to a fridge in one upsert. Each item may carry an
+    expires_on date; unknown ingredients are skipped and listed in skipped_ids.
+    """
+    data = request.json or {}
+    fridge_id = data.get('fridge_id')
+    totals = parse_items(data.get('items'), with_expiry=True)
+
+    if not fridge_id or totals is None:
+        response = make_response(jsonify({
+            "error": "Fridge ID and a list of items with ingredient_id and a positive quantity are required"
+        }))
+        response.status_code = 400
+        return response
+
+    items = []
+    for (ingredient_id, expires_on), quantity in totals.items():
+        item = {"ingredient_id": ingredient_id, "quantity": quantity}
+        # Left out, the lot falls back to the ingredient's catalog date
+        if expires_on:
+            item["expires_on"] = expires_on
+        items.append(item)
+    items = json.dumps(items)
+    cursor = db.get_db().cursor()
+    try:
+        cursor.execute(fridge_queries.KNOWN_INGREDIENTS_BULK, (items,))
+        known = {row['ingredient_id'] for row in cursor.fetchall()}
+        lots = [ingredient_id for ingredient_id, _ in totals if ingredient_id in known]
+        ingredient_ids = sorted(set(lots))
+        skipped_ids = sorted({ingredient_id for ingredient_id, _ in totals} - known)
+        if lots:
+            cursor.execute(fridge_queries.ADD_STOCK_BULK, (fridge_id, items))
+            outbox.record(db.get_db(), 'fridge.stocked', fridge_id=fridge_id, ingredient_ids=ingredient_ids)
+        db.get_db().commit()
+
+        response = make_response(jsonify({
+            "message": f"{len(lots)} lots added to fridge",
+            "ingredient_ids": ingredient_ids,
+            "skipped_ids": skipped_ids
+        }))
+        response.status_code = 201
+        return response
+    except IntegrityError:
+        db.get_db().rollback()
+        response = make_response(jsonify({"error": "Fridge not found"}))
+        response.status_code = 404
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error adding ingredients to fridge: {str(e)}")
+        response = make_response(jsonify({"error": "Could not add ingredients to fridge"}))
+        response.status_code = 500
+        return response
+
+
+@fridge.route('/bulk/consume', methods=['POST'])
+@query_budget(4)
+def consume_fridge_ingredients():
+    """Take several ingredients out of a fridge, earliest lots first, removing the lots that run out"""
+    data = request.json or {}
+    fridge_id = data.get('fridge_id')
+    totals = parse_items(data.get('items'))
+
+    if not fridge_id or totals is None:
+        response = make_response(jsonify({
+            "error": "Fridge ID and a list of items with ingredient_id and a positive quantity are required"
+        }))
+        response.status_code = 400
+        return response
+
+    items = json.dumps([
+        {"ingredient_id": ingredient_id, "quantity": quantity} for (ingredient_id, _), quantity in totals.items()
+    ])
+    cursor = db.get_db().cursor()
+    try:
+        cursor.execute(fridge_queries.LOCK_LOTS_BULK, (items, fridge_id))
+        found = {row['ingredient_id'] for row in cursor.fetchall()}
+        cursor.execute(fridge_queries.CONSUME_STOCK_BULK, (items, fridge_id))
+        cursor.execute(fridge_queries.DELETE_DEPLETED_BULK, (items, fridge_id))
+        depleted = cursor.rowcount
+        if found:
+            outbox.record(db.get_db(), 'fridge.consumed', fridge_id=fridge_id, ingredient_ids=sorted(found))
+        db.get_db().commit()
+
+        response = make_response(jsonify({
+            "message": f"{len(found)} ingredients consumed",
+            "consumed": len(found),
+            "lots_depleted": depleted,
+            "missing": len(totals) - len(found)
+        }))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        db.get_db().rollback()
+        current_app.logger.error(f"Error consuming fridge ingredients: {str(e)}")
+        response = make_response(jsonify({"error": "Could not consume ingredients"}))
+        response.status_code = 500
+        return response
@@ -1,5 +1,12 @@
+import json
+
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.changes.change_feed import change_feed_response, parse_token
+from backend.outbox import outbox
+from backend.queries import CONFLICT, NOT_FOUND, ingredient_queries, run_partial_update
+from backend.meal_plans.recipe_macros import recipes_using_ingredient, recipes_using_ingredients, refresh_recipes
 
 ingredients = Blueprint('ingredients', __name__)
 
@@ -7,20 +14,36 @@ ingredients = Blueprint('ingredients', __name__)
 def get_all_ingredients():
     """Get list of all ingredients"""
     cursor = db.get_db().cursor()
-    cursor.execute('SELECT * FROM Ingredient')
+    cursor.execute(ingredient_queries.ALL_INGREDIENTS)
     ingredients_data = cursor.fetchall()
     
     response = make_response(jsonify(ingredients_data))
     response.status_code = 200
     return response
 
+@ingredients.route('/changes', methods=['GET'])
+@query_budget(2)
+def get_ingredient_changes():
+    """Ingredients changed since a change token (?since=), or all of them without one, for incremental sync"""
+    since = parse_token(request.args.get('since'))
+
+    if since is False:
+        response = make_response(jsonify({"error": "since must be a change token from an earlier response"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    return change_feed_response(
+        cursor, since, ingredient_queries.ALL_INGREDIENTS, ingredient_queries.CHANGES, keys=('ingredient_id',)
+    )
+
 @ingredients.route('/<int:ingredient_id>', methods=['GET'])
 def get_ingredient(ingredient_id):
     """Get ingredient details with macronutrients"""
     cursor = db.get_db().cursor()
 
     # Get ingredient basic info
-    cursor.execute('SELECT * FROM Ingredient WHERE ingredient_id = %s', (ingredient_id,))
+    cursor.execute(ingredient_queries.INGREDIENT_BY_ID, (ingredient_id,))
     ingredient = cursor.fetchone()
 
     if not ingredient:
@@ -29,11 +52,7 @@ def get_ingredient(ingredient_id):
         return response
     
     # Get macronutrients
-    cursor.execute('''
-        SELECT m.* 
-        FROM Macronutrients m
-        WHERE m.ingredient_id = %s
-    ''', (ingredient_id,))
+    cursor.execute(ingredient_queries.MACROS_FOR_INGREDIENT, (ingredient_id,))
     macros = cursor.fetchone()
     
     result = {
@@ -65,16 +84,14 @@ def add_ingredient():
     try:
         # Insert ingredient
         cursor.execute(
-            'INSERT INTO Ingredient (name, expiration_date) VALUES (%s, %s)',
+            ingredient_queries.INSERT_INGREDIENT,
             (name, expiration_date)
         )
         ingredient_id = cursor.lastrowid
 
         if macros:
             cursor.execute(
-                '''INSERT INTO Macronutrients (
-                    ingredient_id, protein, fat, fiber, vitamin, sodium, calories, carbs
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)''',
+                ingredient_queries.INSERT_MACROS,
                 (
                     ingredient_id, 
                     macros.get('protein', 0), 
@@ -87,7 +104,8 @@ def add_ingredient():
                 )
             )
 
-            db.get_db().commit()
+        outbox.record(db.get_db(), 'ingredient.created', ingredient_id=ingredient_id)
+        db.get_db().commit()
         
         response = make_response(jsonify({
             "message": "Ingredient added successfully", 
@@ -102,45 +120,52 @@ def add_ingredient():
         return response
 
 @ingredients.route('/<int:ingredient_id>', methods=['PUT'])
+@query_budget(2)
 def update_ingredient(ingredient_id):
     """Update ingredient details"""
     data = request.json
     
-    cursor = db.get_db().cursor()
-
-    # Check if ingredient exists
-    cursor.execute('SELECT * FROM Ingredient WHERE ingredient_id = %s', (ingredient_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "Ingredient not found"}))
-        response.status_code = 404
-        return response
-    
     name = data.get('name')
     expiration_date = data.get('expiration_date')
     
-    update_fields = []
-    params = []
+    updates = {}
     
     if name:
-        update_fields.append('name = %s')
-        params.append(name)
+        updates['name'] = name
     
     if expiration_date:
-        update_fields.append('expiration_date = %s')
-        params.append(expiration_date)
+        updates['expiration_date'] = expiration_date
 
-    if not update_fields:
+    if not updates:
         response = make_response(jsonify({"error": "No fields to update"}))
         response.status_code = 400
         return response
     
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
+        response.status_code = 400
+        return response
+    
+    cursor = db.get_db().cursor()
+    
     try:
-        query = f"UPDATE Ingredient SET {', '.join(update_fields)} WHERE ingredient_id = %s"
-        params.append(ingredient_id)
-        cursor.execute(query, params)
+        outcome, version = run_partial_update(
+            cursor, ingredient_queries.UPDATE_INGREDIENT, updates, ingredient_id, version
+        )
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "Ingredient not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "Ingredient was changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+        outbox.record(db.get_db(), 'ingredient.updated', ingredient_id=ingredient_id, fields=sorted(updates),
+                      version=version)
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "Ingredient updated successfully"}))
+        response = make_response(jsonify({"message": "Ingredient updated successfully", "version": version}))
         response.status_code = 200
         return response
     
@@ -148,36 +173,30 @@ def update_ingredient(ingredient_id):
         current_app.logger.error(f"Error updating ingredient: {str(e)}")
         response = make_response(jsonify({"error": "Could not update ingredient"}))
         response.status_code = 500
-    
+        return response
+
 
 @ingredients.route('/<int:ingredient_id>', methods=['DELETE'])
+@query_budget(4)
 def delete_ingredient(ingredient_id):
-    """Delete unused/expired ingredient"""
+    """Delete unused/expired ingredient, with every row that refers to it"""
     cursor = db.get_db().cursor()
 
     try:
-        # Delete from Error_Log entries connected to Food_Scan_Log
-        cursor.execute('''
-            DELETE el FROM Error_Log el
-            JOIN Food_Scan_Log fsl ON el.log_id = fsl.log_id
-            WHERE fsl.ingredient_id = %s
-        ''', (ingredient_id,))
-        
-        # Delete from Food_Scan_Log
-        cursor.execute('DELETE FROM Food_Scan_Log WHERE ingredient_id = %s', (ingredient_id,))
-        
-        # Delete from all other tables with foreign key relationships to Ingredient
-        cursor.execute('DELETE FROM Fridge_Ingredient WHERE ingredient_id = %s', (ingredient_id,))
-        cursor.execute('DELETE FROM Recipe_Ingredient WHERE ingredient_id = %s', (ingredient_id,))
-        cursor.execute('DELETE FROM Ingredient_Macronutrient WHERE ingredient_id = %s', (ingredient_id,))
-        cursor.execute('DELETE FROM Macronutrients WHERE ingredient_id = %s', (ingredient_id,))
-        cursor.execute('DELETE FROM ShoppingList_Ingredient WHERE ingredient_id = %s', (ingredient_id,))
-        
-        # Now delete the ingredient itself
-        cursor.execute('DELETE FROM Ingredient WHERE ingredient_id = %s', (ingredient_id,))
+        # Remember which recipes lose this ingredient so their macros can be recomputed
+        affected_recipes = recipes_using_ingredient(cursor, ingredient_id)
+
+        # Fridge lots, recipe and shopping list rows, macros and scans cascade
+        cursor.execute(ingredient_queries.DELETE_INGREDIENT, (ingredient_id,))
+        deleted = cursor.rowcount
+
+        refresh_recipes(cursor, affected_recipes)
+        if deleted:
+            outbox.record(db.get_db(), 'ingredient.deleted', ingredient_ids=[ingredient_id],
+                          recipe_ids=affected_recipes)
         db.get_db().commit()
 
-        if cursor.rowcount == 0:
+        if deleted == 0:
             response = make_response(jsonify({"error": "Ingredient not found"}))
             response.status_code = 404
             return response
@@ -186,7 +205,64 @@ def delete_ingredient(ingredient_id):
         response.status_code = 200
         return response
     except Exception as e:
+        db.get_db().rollback()
         current_app.logger.error(f"Error deleting ingredient: {str(e)}")
         response = make_response(jsonify({"error": "Could not delete ingredient"}))
         response.status_code = 500
-        return response
\ No newline at end of file
+        return response
+
+# Most ids DELETE /ingredients takes, and how many are deleted per transaction
+BULK_DELETE_MAX_IDS = 1000
+BULK_DELETE_CHUNK_SIZE = 100
+
+@ingredients.route('/', methods=['DELETE'], strict_slashes=False)
+@query_budget(4 * BULK_DELETE_MAX_IDS // BULK_DELETE_CHUNK_SIZE)
+def delete_ingredients():
+    """
+    Delete many ingredients (?ids=1,2,3) with every row that refers to them,
+    BULK_DELETE_CHUNK_SIZE at a time, each chunk in its own transaction so a
+    large delete doesn't hold all of its locks until the end
+    """
+    try:
+        ids = sorted({int(ingredient_id) for ingredient_id in request.args.get('ids', '').split(',')})
+    except ValueError:
+        ids = []
+
+    if not ids or len(ids) > BULK_DELETE_MAX_IDS:
+        response = make_response(jsonify({
+            "error": f"ids must be a comma separated list of 1 to {BULK_DELETE_MAX_IDS} ingredient ids"
+        }))
+        response.status_code = 400
+        return response
+
+    conn = db.get_db()
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        for start in range(0, len(ids), BULK_DELETE_CHUNK_SIZE):
+            chunk = ids[start:start + BULK_DELETE_CHUNK_SIZE]
+            affected_recipes = recipes_using_ingredients(cursor, chunk)
+            cursor.execute(ingredient_queries.DELETE_INGREDIENTS, (json.dumps(chunk),))
+            chunk_deleted = cursor.rowcount
+            refresh_recipes(cursor, affected_recipes)
+            # Ids in the chunk that didn't exist are named too
+            if chunk_deleted:
+                outbox.record(conn, 'ingredient.deleted', ingredient_ids=chunk, recipe_ids=affected_recipes)
+            conn.commit()
+            # Only count the chunk once it can't be rolled back
+            deleted += chunk_deleted
+
+        response = make_response(jsonify({
+            "message": f"{deleted} ingredients deleted",
+            "deleted": deleted,
+            "not_found": len(ids) - deleted
+        }))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        conn.rollback()
+        current_app.logger.error(f"Error deleting ingredients: {str(e)}")
+        # Earlier chunks stay deleted; say how far it got
+        response = make_response(jsonify({"error": "Could not delete all ingredients", "deleted": deleted}))
+        response.status_code = 500
+        return response
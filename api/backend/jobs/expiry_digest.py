@@ -0,0 +1,151 @@
+#------------------------------------------------------------
+# Expiry digest job
+#
+# Builds, for every client at once, the list of fridge lots that
+# expire within the next few days and stores it in Expiry_Digest,
+# which GET /fridge/digest (and the dashboard) read instead of
+# working it out on every page view.
+#
+# The work is split into ranges of client ids. Each range is one
+# set-based DELETE + INSERT ... SELECT (see
+# backend/queries/digest_queries.py) committed on its own, and with
+# --workers > 1 the ranges are built by a pool of processes, each
+# with its own connection. The job's connections read at READ
+# COMMITTED so the INSERT ... SELECT doesn't lock the fridge rows
+# it reads and block the API's writes while it runs.
+#
+# The API's job scheduler runs it every night; to run it by hand
+# (e.g. with more workers), from the api folder:
+#   python -m backend.jobs.expiry_digest --days 3 --workers 4
+#------------------------------------------------------------
+import argparse
+import datetime
+import multiprocessing
+import time
+
+from backend.db_connection import connect
+from backend.jobs.job_queue import job_type
+from backend.jobs.scheduler import scheduled
+from backend.queries import digest_queries
+
+# Days ahead a digest looks, and client ids per range
+DIGEST_DAYS = 3
+CHUNK_SIZE = 5000
+
+READ_COMMITTED = 'SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED'
+
+# Connection of a pool worker process, opened by _open_worker_connection()
+_worker_conn = None
+
+
+def open_connection():
+    return connect(autocommit=False, init_command=READ_COMMITTED)
+
+
+def client_ranges(conn, chunk_size):
+    """(first, last) client id ranges covering every client"""
+    cursor = conn.cursor()
+    cursor.execute(digest_queries.CLIENT_ID_RANGE)
+    row = cursor.fetchone()
+    if row['first_id'] is None:
+        return []
+    return [(first, min(first + chunk_size - 1, row['last_id']))
+            for first in range(row['first_id'], row['last_id'] + 1, chunk_size)]
+
+
+def build_range(conn, first, last, digest_date, days):
+    """Rebuild the digest of clients first..last; returns the number of rows written"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(digest_queries.CLEAR_RANGE, (first, last))
+        cursor.execute(digest_queries.BUILD_RANGE, (digest_date, first, last, digest_date, digest_date, days))
+        written = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return written
+
+
+def _open_worker_connection():
+    global _worker_conn
+    _worker_conn = open_connection()
+
+
+def _build_range_in_worker(task):
+    return build_range(_worker_conn, *task)
+
+
+def run(days=DIGEST_DAYS, chunk_size=CHUNK_SIZE, workers=1, digest_date=None, progress=None):
+    """
+    Rebuild the whole digest. Returns a summary with the number of client
+    ranges built and digest rows written. progress(done, total), if given,
+    is called as ranges complete.
+    """
+    digest_date = digest_date or datetime.date.today()
+    conn = open_connection()
+    try:
+        tasks = [(first, last, digest_date, days) for first, last in client_ranges(conn, chunk_size)]
+        if progress:
+            progress(0, len(tasks))
+        written = 0
+        if workers > 1 and len(tasks) > 1:
+            with multiprocessing.Pool(min(workers, len(tasks)), initializer=_open_worker_connection) as pool:
+                for done, rows in enumerate(pool.imap_unordered(_build_range_in_worker, tasks), 1):
+                    written += rows
+                    if progress:
+                        progress(done)
+        else:
+            for done, task in enumerate(tasks, 1):
+                written += build_range(conn, *task)
+                if progress:
+                    progress(done)
+
+        cursor = conn.cursor()
+        cursor.execute(digest_queries.DELETE_STALE, (digest_date,))
+        conn.commit()
+    finally:
+        conn.close()
+    return {"ranges": len(tasks), "rows": written}
+
+
+@scheduled('expiry_digest', '15 0 * * *')
+def scheduled_run(conn):
+    """Rebuild the expiry digest for every client, after the nightly expiry sweep"""
+    return run()["rows"]
+
+
+def validate_params(params):
+    """An error message if a queued rebuild's parameters can't be run with"""
+    minimums = {'days': 0, 'chunk_size': 1, 'workers': 1}
+    for name, minimum in minimums.items():
+        value = params.get(name)
+        if value is not None and (not isinstance(value, int) or value < minimum):
+            return f"{name} must be a whole number of at least {minimum}"
+    return None
+
+
+@job_type('expiry_digest', validate=validate_params)
+def queued_run(conn, params, progress):
+    """Rebuild the expiry digest for every client; optional days, chunk_size and workers"""
+    return run(params.get('days', DIGEST_DAYS), params.get('chunk_size', CHUNK_SIZE),
+               params.get('workers', 1), progress=progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the expiry digest for every client")
+    parser.add_argument('--days', type=int, default=DIGEST_DAYS, help="days ahead to include")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="client ids per range")
+    parser.add_argument('--workers', type=int, default=1, help="processes building ranges in parallel")
+    parser.add_argument('--date', type=datetime.date.fromisoformat, default=None,
+                        help="day the digest is built for (YYYY-MM-DD), defaults to today")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = run(args.days, args.chunk_size, args.workers, args.date)
+    print(f"{summary['rows']} digest rows for {summary['ranges']} client ranges "
+          f"in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#------------------------------------------------------------
+# Scheduled housekeeping jobs
+#
+# The same sweeps the admin dashboard's buttons run through
+# PUT/DELETE /fridge/expired and /leftovers/expired, on a timer.
+# Expired fridge lots and leftovers are marked nightly and deleted
+# by a weekly sweep once they have been expired for more than
+# EXPIRED_GRACE_DAYS (see fridge_queries and leftover_queries), so
+# they show as expired for a few days first. The routes and
+# purge_expired delete everything expired right away.
+#
+# purge_expired does both deletes on demand, through the job queue.
+# Each sweep that changes rows records the same outbox event as its
+# route.
+#------------------------------------------------------------
+from backend.jobs.job_queue import job_type
+from backend.jobs.scheduler import scheduled
+from backend.outbox import outbox
+from backend.queries import change_queries, fridge_queries, job_queries, leftover_queries, outbox_queries
+
+
+def execute(conn, query):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    return cursor.rowcount
+
+
+def sweep(conn, topic, *queries):
+    """execute() a sweep's statements and record topic in the outbox if they changed any rows"""
+    rows = sum(execute(conn, query) for query in queries)
+    if rows:
+        outbox.record(conn, topic, rows=rows)
+    return rows
+
+
+@scheduled('fridge.mark_expired', '5 0 * * *')
+def mark_expired_ingredients(conn):
+    """Mark fridge lots past their expiry date as expired"""
+    return sweep(conn, 'fridge.expired_marked', fridge_queries.MARK_EXPIRED)
+
+
+@scheduled('leftovers.mark_expired', '5 0 * * *')
+def mark_expired_leftovers(conn):
+    """Mark leftovers past their expiry date as expired"""
+    return sweep(conn, 'leftover.expired_marked', leftover_queries.MARK_EXPIRED)
+
+
+@scheduled('fridge.delete_expired', '30 3 * * 0')
+def delete_expired_ingredients(conn):
+    """Delete fridge lots that have been expired for more than EXPIRED_GRACE_DAYS"""
+    return sweep(conn, 'fridge.expired_removed', fridge_queries.DELETE_EXPIRED_AFTER_GRACE)
+
+
+@scheduled('leftovers.delete_expired', '30 3 * * 0')
+def delete_expired_leftovers(conn):
+    """Delete leftovers that have been expired for more than EXPIRED_GRACE_DAYS"""
+    return sweep(conn, 'leftover.expired_removed', leftover_queries.DELETE_EXPIRED_AFTER_GRACE)
+
+
+@scheduled('jobs.prune_runs', '45 3 * * *')
+def prune_job_runs(conn):
+    """Delete job run history older than job_queries.HISTORY_DAYS"""
+    return execute(conn, job_queries.PRUNE_RUNS)
+
+
+@scheduled('changes.prune', '50 3 * * *')
+def prune_change_log(conn):
+    """Delete change log rows older than change_queries.RETENTION_DAYS"""
+    return execute(conn, change_queries.PRUNE)
+
+
+@scheduled('outbox.prune', '55 3 * * *')
+def prune_outbox(conn):
+    """Delete outbox events older than outbox_queries.RETENTION_DAYS"""
+    return execute(conn, outbox_queries.PRUNE)
+
+
+@job_type('purge_expired')
+def purge_expired(conn, params, progress):
+    """Delete all expired fridge lots and leftovers"""
+    progress(0, 2)
+    fridge_lots = sweep(conn, 'fridge.expired_removed', fridge_queries.DELETE_EXPIRED)
+    progress(1)
+    leftovers = sweep(conn, 'leftover.expired_removed',
+                        leftover_queries.DELETE_EXPIRED, leftover_queries.DELETE_MARKED_EXPIRED)
+    progress(2)
+    return {"fridge_lots": fridge_lots, "leftovers": leftovers}
@@ -0,0 +1,62 @@
+#------------------------------------------------------------
+# Bulk import jobs
+#
+# fridge.import adds any number of lots to a fridge, the same way
+# POST /fridge/bulk does, in chunks so progress can be reported.
+# The chunks share one transaction that the worker commits at the
+# end: a failed or retried import never leaves half of its stock
+# behind or adds it twice.
+#------------------------------------------------------------
+import json
+
+from backend.fridge.fridge_routes import parse_items
+from backend.jobs.job_queue import job_type
+from backend.outbox import outbox
+from backend.queries import fridge_queries
+
+# Lots per ADD_STOCK_BULK statement
+IMPORT_CHUNK_SIZE = 1000
+
+
+def validate_fridge_import(params):
+    """An error message if the import's parameters can't be run with"""
+    if not isinstance(params.get('fridge_id'), int):
+        return "fridge_id is required"
+    if parse_items(params.get('items'), with_expiry=True) is None:
+        return "items must be a list of items with ingredient_id and a positive quantity"
+    return None
+
+
+@job_type('fridge.import', validate=validate_fridge_import)
+def import_fridge_items(conn, params, progress):
+    """Add a list of {ingredient_id, quantity, expires_on} lots to a fridge; unknown ingredients are skipped"""
+    totals = parse_items(params['items'], with_expiry=True)
+    lots = []
+    for (ingredient_id, expires_on), quantity in totals.items():
+        lot = {"ingredient_id": ingredient_id, "quantity": quantity}
+        if expires_on:
+            lot["expires_on"] = expires_on
+        lots.append(lot)
+
+    progress(0, len(lots))
+    cursor = conn.cursor()
+    known = set()
+    for start in range(0, len(lots), IMPORT_CHUNK_SIZE):
+        chunk = json.dumps(lots[start:start + IMPORT_CHUNK_SIZE])
+        cursor.execute(fridge_queries.KNOWN_INGREDIENTS_BULK, (chunk,))
+        chunk_known = {row['ingredient_id'] for row in cursor.fetchall()}
+        if chunk_known:
+            cursor.execute(fridge_queries.ADD_STOCK_BULK, (params['fridge_id'], chunk))
+        known |= chunk_known
+        progress(min(start + IMPORT_CHUNK_SIZE, len(lots)))
+
+    ingredient_ids = sorted(known)
+    skipped_ids = sorted({ingredient_id for ingredient_id, _ in totals} - known)
+    if ingredient_ids:
+        outbox.record(conn, 'fridge.stocked', fridge_id=params['fridge_id'], ingredient_ids=ingredient_ids)
+    return {
+        "fridge_id": params['fridge_id'],
+        "lots": sum(1 for lot in lots if lot["ingredient_id"] in known),
+        "ingredient_ids": ingredient_ids,
+        "skipped_ids": skipped_ids
+    }
@@ -0,0 +1,45 @@
+#------------------------------------------------------------
+# Registry of the job types the queue can run
+#
+# Long-running operations are registered with @job_type(name) and
+# queued through POST /jobs; a worker process (backend/jobs/worker.py)
+# picks them up and calls fn(conn, params, progress):
+#   conn      a connection of the worker's own; the worker commits
+#             it when fn returns and rolls it back if fn raises
+#   params    the JSON object the job was queued with
+#   progress  progress(done, total=None), to report how far along
+#             the job is; it is written straight away, outside conn's
+#             transaction, and also counts as a heartbeat
+# fn returns a JSON-serializable result, stored with the job.
+#
+# A job type may also name validate(params), which returns an error
+# message for parameters it can't run with, so POST /jobs can reject
+# them with a 400 instead of queuing a job that will fail.
+#------------------------------------------------------------
+
+
+class JobType(object):
+    """A registered kind of queued job"""
+
+    def __init__(self, name, fn, validate, description):
+        self.name = name
+        self.fn = fn
+        self.validate = validate
+        self.description = description
+
+
+job_types = {}
+
+
+def job_type(name, validate=None):
+    """Register the decorated fn(conn, params, progress) as a queued job type"""
+    def decorator(fn):
+        if name in job_types:
+            raise ValueError(f"Job type '{name}' is already registered")
+        job_types[name] = JobType(name, fn, validate, (fn.__doc__ or '').strip())
+        return fn
+    return decorator
+
+
+# Importing the modules registers their job types
+from backend.jobs import housekeeping, expiry_digest, imports  # noqa: E402
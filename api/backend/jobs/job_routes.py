@@ -0,0 +1,166 @@
+import datetime
+import json
+
+from flask import Blueprint, request, jsonify, make_response, current_app
+from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.jobs.job_queue import job_types
+from backend.jobs.scheduler import jobs as registered_jobs, run_job
+from backend.outbox import outbox
+from backend.queries import job_queries, job_queue_queries
+
+jobs = Blueprint('jobs', __name__)
+
+# Default and cap for GET /jobs/runs
+RUNS_LIMIT = 50
+RUNS_MAX_LIMIT = 500
+
+@jobs.route('/scheduled', methods=['GET'])
+@query_budget(1)
+def get_scheduled_jobs():
+    """
+    Get the registered jobs with their schedule, latest run and duration and
+    row count statistics over the last job_queries.STATS_DAYS days
+    """
+    cursor = db.get_db().cursor()
+    cursor.execute(job_queries.SCHEDULED_STATS)
+    stats = {row['job_name']: row for row in cursor.fetchall()}
+
+    scheduled_jobs = []
+    for job in registered_jobs.values():
+        job_stats = stats.get(job.name, {})
+        scheduled_jobs.append({
+            "job_name": job.name,
+            "schedule": job.schedule.expression,
+            "description": job.description,
+            "runs": job_stats.get('runs', 0),
+            "failures": job_stats.get('failures', 0),
+            "avg_duration_ms": job_stats.get('avg_duration_ms'),
+            "max_duration_ms": job_stats.get('max_duration_ms'),
+            "total_rows": job_stats.get('total_rows'),
+            "last_scheduled_for": job_stats.get('last_scheduled_for'),
+            "last_host": job_stats.get('last_host'),
+            "last_status": job_stats.get('last_status'),
+            "last_duration_ms": job_stats.get('last_duration_ms'),
+            "last_row_count": job_stats.get('last_row_count'),
+            "last_error": job_stats.get('last_error')
+        })
+
+    response = make_response(jsonify(scheduled_jobs))
+    response.status_code = 200
+    return response
+
+@jobs.route('/runs', methods=['GET'])
+@query_budget(1)
+def get_job_runs():
+    """Get the most recent job runs, optionally of one job (?job=)"""
+    job_name = request.args.get('job')
+    limit = request.args.get('limit', RUNS_LIMIT, type=int)
+
+    if not 1 <= limit <= RUNS_MAX_LIMIT:
+        response = make_response(jsonify({"error": f"limit must be between 1 and {RUNS_MAX_LIMIT}"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    if job_name:
+        cursor.execute(job_queries.RECENT_RUNS_FOR_JOB, (job_name, limit))
+    else:
+        cursor.execute(job_queries.RECENT_RUNS, (limit,))
+    runs = cursor.fetchall()
+
+    response = make_response(jsonify(runs))
+    response.status_code = 200
+    return response
+
+@jobs.route('/scheduled/<job_name>/run', methods=['POST'])
+def run_scheduled_job(job_name):
+    """Run a scheduled job now, recorded in the run history like a scheduled run"""
+    job = registered_jobs.get(job_name)
+    if job is None:
+        response = make_response(jsonify({"error": "Job not found"}))
+        response.status_code = 404
+        return response
+
+    conn = db.get_db()
+    try:
+        run_id = run_job(conn, job, datetime.datetime.now().replace(microsecond=0))
+        if run_id is None:
+            response = make_response(jsonify({"error": "The job was already started this second"}))
+            response.status_code = 409
+            return response
+
+        cursor = conn.cursor()
+        cursor.execute(job_queries.RUN_BY_ID, (run_id, 1))
+        response = make_response(jsonify(cursor.fetchone()))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error running job {job_name}: {str(e)}")
+        response = make_response(jsonify({"error": "Could not run job"}))
+        response.status_code = 500
+        return response
+
+@jobs.route('/', methods=['POST'], strict_slashes=False)
+@query_budget(2)
+def queue_job():
+    """
+    Queue a long-running job ({"type": ..., "params": {...}}) for the job
+    workers. Responds 202 with the job's id; poll GET /jobs/<id> for progress.
+    """
+    data = request.json or {}
+    job_type = job_types.get(data.get('type'))
+    params = data.get('params', {})
+
+    if job_type is None:
+        response = make_response(jsonify({"error": f"type must be one of {', '.join(sorted(job_types))}"}))
+        response.status_code = 400
+        return response
+
+    if not isinstance(params, dict):
+        error = "params must be an object"
+    else:
+        error = job_type.validate(params) if job_type.validate else None
+    if error:
+        response = make_response(jsonify({"error": error}))
+        response.status_code = 400
+        return response
+
+    conn = db.get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(job_queue_queries.ENQUEUE, (job_type.name, json.dumps(params)))
+        job_id = cursor.lastrowid
+        outbox.record(conn, 'job.queued', job_id=job_id, job_type=job_type.name)
+        conn.commit()
+
+        response = make_response(jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}))
+        response.headers['Location'] = f"/jobs/{job_id}"
+        response.status_code = 202
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error queuing job: {str(e)}")
+        response = make_response(jsonify({"error": "Could not queue job"}))
+        response.status_code = 500
+        return response
+
+@jobs.route('/<int:job_id>', methods=['GET'])
+@query_budget(1)
+def get_job(job_id):
+    """Get a queued job's status, progress and, once it finished, its result or error"""
+    cursor = db.get_db().cursor()
+    cursor.execute(job_queue_queries.JOB_BY_ID, (job_id,))
+    job = cursor.fetchone()
+
+    if not job:
+        response = make_response(jsonify({"error": "Job not found"}))
+        response.status_code = 404
+        return response
+
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    job['progress'] = round(100 * job['progress_done'] / job['progress_total'], 1) \
+        if job['progress_total'] else None
+
+    response = make_response(jsonify(job))
+    response.status_code = 200
+    return response
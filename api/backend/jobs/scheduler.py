@@ -0,0 +1,196 @@
+#------------------------------------------------------------
+# In-API job scheduler
+#
+# Jobs are registered with @scheduled(name, cron) and run by a
+# background thread that create_app() starts (JOB_SCHEDULER=false
+# turns it off). Schedules use the five cron fields, minute hour
+# day-of-month month day-of-week, each either *, a number, a range
+# (a-b), a step (*/n, a-b/n) or a comma separated list of those.
+#
+# Every replica of the API runs its own scheduler. When a job is
+# due, each one tries to insert the Job_Run row for that job and
+# minute; the unique (job_name, scheduled_for) key lets only one
+# insert through, and only that replica runs the job. The row then
+# records the run's status, duration and the rows it changed.
+#------------------------------------------------------------
+import datetime
+import logging
+import socket
+import threading
+import time
+
+from backend.db_connection import connect
+from backend.queries import job_queries
+
+# Seconds between checks for due jobs, and the most minutes a scheduler that
+# fell behind (e.g. a suspended container) catches up on
+POLL_SECONDS = 20
+MAX_CATCH_UP_MINUTES = 60
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule(object):
+    """A parsed five-field cron expression"""
+
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 6))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != len(self.FIELDS):
+            raise ValueError(f"Cron expression '{expression}' needs {len(self.FIELDS)} fields")
+        self.expression = expression
+        self.values = {}
+        for part, (field, low, high) in zip(parts, self.FIELDS):
+            # 7 is Sunday too
+            top = 7 if field == 'weekday' else high
+            values = self._parse_field(part, low, top, expression)
+            self.values[field] = {value % 7 for value in values} if field == 'weekday' else values
+        # As in cron, a restricted day of month and day of week match either
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse_field(part, low, high, expression):
+        values = set()
+        for item in part.split(','):
+            spec, _, step = item.partition('/')
+            if spec == '*':
+                first, last = low, high
+            elif '-' in spec:
+                first, last = (int(bound) for bound in spec.split('-', 1))
+            else:
+                first = last = int(spec)
+            step = int(step) if step else 1
+            if not low <= first <= last <= high or step < 1:
+                raise ValueError(f"Cron expression '{expression}' has an invalid field '{part}'")
+            values.update(range(first, last + 1, step))
+        return values
+
+    def matches(self, moment):
+        """Whether the schedule is due at moment (to the minute)"""
+        if moment.minute not in self.values['minute'] or moment.hour not in self.values['hour']:
+            return False
+        if moment.month not in self.values['month']:
+            return False
+        day = moment.day in self.values['day']
+        # datetime counts Monday as 0, cron counts Sunday as 0
+        weekday = (moment.weekday() + 1) % 7 in self.values['weekday']
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+
+class Job(object):
+    """A registered job: fn(conn) does the work and returns the rows it changed"""
+
+    def __init__(self, name, schedule, fn, description):
+        self.name = name
+        self.schedule = schedule
+        self.fn = fn
+        self.description = description
+
+
+jobs = {}
+
+
+def scheduled(name, cron):
+    """Register the decorated fn(conn) as a job that runs on the cron schedule"""
+    def decorator(fn):
+        if name in jobs:
+            raise ValueError(f"Job '{name}' is already registered")
+        jobs[name] = Job(name, CronSchedule(cron), fn, (fn.__doc__ or '').strip())
+        return fn
+    return decorator
+
+
+def run_job(conn, job, scheduled_for):
+    """
+    Claim the (job, scheduled_for) run and, if this caller got it, run the job.
+    Returns the run id, or None if the run was already claimed.
+    """
+    cursor = conn.cursor()
+    cursor.execute(job_queries.CLAIM_RUN, (job.name, scheduled_for, socket.gethostname()))
+    conn.commit()
+    if cursor.rowcount != 1:
+        return None
+    run_id = cursor.lastrowid
+
+    started = time.perf_counter()
+    try:
+        rows = job.fn(conn)
+        conn.commit()
+        status, error = 'succeeded', None
+    except Exception as e:
+        conn.rollback()
+        logger.exception(f"Job {job.name} scheduled for {scheduled_for} failed")
+        rows, status, error = None, 'failed', str(e)
+
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    cursor = conn.cursor()
+    cursor.execute(job_queries.FINISH_RUN, (status, duration_ms, rows, error, run_id))
+    conn.commit()
+    return run_id
+
+
+class Scheduler(object):
+    """Background thread that runs the registered jobs when they are due"""
+
+    def __init__(self, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        # The minute the scheduler starts in counts as due
+        checked = self._minute(datetime.datetime.now()) - datetime.timedelta(minutes=1)
+        while not self._stop.is_set():
+            now = self._minute(datetime.datetime.now())
+            if now > checked:
+                try:
+                    self.run_due(max(checked, now - datetime.timedelta(minutes=MAX_CATCH_UP_MINUTES)), now)
+                    checked = now
+                except Exception:
+                    # Keep going; the next check retries the same minutes
+                    logger.exception("Job scheduler could not check for due jobs")
+            self._stop.wait(self.poll_seconds)
+
+    def run_due(self, after, until):
+        """Run every job due in the minutes after `after` up to and including `until`"""
+        conn = connect(autocommit=False)
+        try:
+            moment = after + datetime.timedelta(minutes=1)
+            while moment <= until:
+                for job in jobs.values():
+                    if job.schedule.matches(moment):
+                        run_job(conn, job, moment)
+                moment += datetime.timedelta(minutes=1)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _minute(moment):
+        return moment.replace(second=0, microsecond=0)
+
+
+def init_app(app):
+    """Start the scheduler for this API process unless JOB_SCHEDULER is off"""
+    if not app.config['JOB_SCHEDULER']:
+        return None
+    scheduler = Scheduler()
+    scheduler.start()
+    app.extensions['job_scheduler'] = scheduler
+    return scheduler
+
+
+# Importing the modules registers their jobs
+from backend.jobs import housekeeping, expiry_digest  # noqa: E402
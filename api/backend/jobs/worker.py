@@ -0,0 +1,193 @@
+#------------------------------------------------------------
+# Job queue worker
+#
+# Runs the jobs queued through POST /jobs (see
+# backend/jobs/job_queue.py for the job types) off the request
+# path. Each worker process loops: claim the oldest queued job,
+# run it, store its result or error, and poll again after a short
+# sleep when the queue is empty. Claims use FOR UPDATE SKIP LOCKED,
+# so the processes never hand the same job out twice nor wait on
+# each other, and more processes (or machines) means more jobs run
+# in parallel.
+#
+# While a job runs, a heartbeat thread keeps its heartbeat_at
+# fresh. Workers also requeue running jobs whose heartbeat stopped
+# (the process died), failing them after MAX_ATTEMPTS.
+#
+# Run from the api folder:
+#   python -m backend.jobs.worker --processes 4
+#------------------------------------------------------------
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+from backend.db_connection import connect
+from backend.jobs.job_queue import job_types
+from backend.queries import job_queue_queries
+
+# Seconds between polls of an empty queue and between heartbeats; a running
+# job without a heartbeat for STALE_SECONDS is requeued
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15
+STALE_SECONDS = 120
+MAX_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(object):
+    """Claims and runs queued jobs, one at a time"""
+
+    def __init__(self, name):
+        self.name = name
+        # Jobs run on conn; claims, progress and results go through status_conn,
+        # which autocommits so they are visible while the job's transaction is open
+        self.conn = connect(autocommit=False)
+        self.status_conn = connect(autocommit=True)
+        self.job_id = None
+        self._status_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._next_sweep = 0
+
+    def run_forever(self):
+        heartbeat = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= self._next_sweep:
+                    self.requeue_stale()
+                    self._next_sweep = time.monotonic() + HEARTBEAT_SECONDS
+                if not self.run_next():
+                    self._stop.wait(POLL_SECONDS)
+            except Exception:
+                logger.exception(f"Worker {self.name} could not poll the job queue")
+                self._stop.wait(POLL_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+
+    def claim(self):
+        """Mark the oldest queued job as ours and return it, or None if there is none"""
+        with self._status_lock:
+            self.status_conn.begin()
+            try:
+                cursor = self.status_conn.cursor()
+                cursor.execute(job_queue_queries.CLAIM_NEXT)
+                job = cursor.fetchone()
+                if job is not None:
+                    cursor.execute(job_queue_queries.START, (self.name, job['job_id']))
+                self.status_conn.commit()
+            except Exception:
+                self.status_conn.rollback()
+                raise
+        return job
+
+    def reconnect(self):
+        """Reopen the connections if they dropped (wait_timeout, a database restart...)"""
+        self.conn.ping(reconnect=True)
+        with self._status_lock:
+            self.status_conn.ping(reconnect=True)
+
+    def run_next(self):
+        """Run one queued job; returns False if the queue was empty"""
+        self.reconnect()
+        job = self.claim()
+        if job is None:
+            return False
+
+        self.job_id = job['job_id']
+        job_type = job_types.get(job['job_type'])
+        try:
+            if job_type is None:
+                raise ValueError(f"Unknown job type '{job['job_type']}'")
+            params = json.loads(job['params']) if job['params'] else {}
+            result = job_type.fn(self.conn, params, self.progress)
+            self.conn.commit()
+            self.finish('succeeded', result=json.dumps(result, default=str))
+        except Exception as e:
+            logger.exception(f"Job {job['job_id']} ({job['job_type']}) failed")
+            try:
+                self.conn.rollback()
+            except Exception:
+                # The connection is gone, and the transaction with it; the job still gets finished
+                logger.exception(f"Worker {self.name} could not roll back job {job['job_id']}")
+            self.finish('failed', error=str(e))
+        finally:
+            self.job_id = None
+        return True
+
+    def progress(self, done, total=None):
+        """Passed to job functions as their progress(done, total=None) callback"""
+        self._update_status(job_queue_queries.PROGRESS, (done, total, self.job_id))
+
+    def finish(self, status, result=None, error=None):
+        self._update_status(job_queue_queries.FINISH, (status, result, error, self.job_id))
+
+    def requeue_stale(self):
+        requeued = self._update_status(job_queue_queries.REQUEUE_STALE, (MAX_ATTEMPTS, MAX_ATTEMPTS, STALE_SECONDS))
+        if requeued:
+            logger.warning(f"Worker {self.name} requeued {requeued} stale job(s)")
+
+    def _update_status(self, query, args):
+        with self._status_lock:
+            cursor = self.status_conn.cursor()
+            cursor.execute(query, args)
+            return cursor.rowcount
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            job_id = self.job_id
+            if job_id is None:
+                continue
+            try:
+                self._update_status(job_queue_queries.HEARTBEAT, (job_id,))
+            except Exception:
+                logger.exception(f"Worker {self.name} could not send a heartbeat for job {job_id}")
+
+
+def work(index):
+    """Entry point of one worker process"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(message)s')
+    worker = Worker(f"{socket.gethostname()}:{os.getpid()}")
+    logger.info(f"Worker {worker.name} started ({index})")
+    worker.run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued jobs")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes to run")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        work(0)
+        return
+
+    # Not daemonic, so a job can start a pool of its own (e.g. expiry_digest's workers)
+    processes = [multiprocessing.Process(target=work, args=(i,), name=f"worker-{i}")
+                 for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        return
+
+    # A worker only exits when it failed (e.g. it couldn't connect at startup);
+    # exit non-zero so the container is restarted
+    failed = [process.name for process in processes if process.exitcode]
+    if failed:
+        logger.error(f"Worker processes {', '.join(failed)} exited with an error")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,50 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
-from datetime import datetime, timedelta
+from backend.db_connection.profiler import query_budget
+from backend.changes.change_feed import change_feed_response, parse_token
+from backend.fridge.fridge_routes import parse_expiry
+from backend.outbox import outbox
+from backend.queries import CONFLICT, NOT_FOUND, leftover_queries, run_partial_update
 
 leftovers = Blueprint('leftovers', __name__)
 
 @leftovers.route('/', methods=['GET'])
 def get_leftovers():
-    """Get all leftovers"""
+    """
+    Get all leftovers with their status and days left. Filter with one of
+    ?recipe_id=, ?status=good|eat_soon|expired or ?expiring_within=<days>.
+    """
     recipe_id = request.args.get('recipe_id')
+    status = request.args.get('status')
+    expiring_within = request.args.get('expiring_within')
+    
+    if sum(arg is not None for arg in (recipe_id, status, expiring_within)) > 1:
+        response = make_response(jsonify({"error": "Use only one of recipe_id, status and expiring_within"}))
+        response.status_code = 400
+        return response
+    
+    if status is not None and status not in leftover_queries.BY_STATUS:
+        response = make_response(jsonify({
+            "error": f"status must be one of {', '.join(leftover_queries.BY_STATUS)}"
+        }))
+        response.status_code = 400
+        return response
+    
+    if expiring_within is not None and (not expiring_within.isdigit() or int(expiring_within) < 1):
+        response = make_response(jsonify({"error": "expiring_within must be a positive number of days"}))
+        response.status_code = 400
+        return response
     
     cursor = db.get_db().cursor()
     
     if recipe_id:
-        cursor.execute('''
-            SELECT l.*, r.name as recipe_name
-            FROM Leftover l
-            JOIN Recipe r ON l.recipe_id = r.recipe_id
-            WHERE l.recipe_id = %s
-        ''', (recipe_id,))
+        cursor.execute(leftover_queries.FOR_RECIPE, (recipe_id,))
+    elif status:
+        cursor.execute(leftover_queries.BY_STATUS[status])
+    elif expiring_within:
+        cursor.execute(leftover_queries.EXPIRING_WITHIN, (int(expiring_within),))
     else:
-        cursor.execute('''
-            SELECT l.*, r.name as recipe_name
-            FROM Leftover l
-            JOIN Recipe r ON l.recipe_id = r.recipe_id
-        ''')
+        cursor.execute(leftover_queries.ALL_LEFTOVERS)
     
     leftovers = cursor.fetchall()
     
@@ -31,17 +52,28 @@ def get_leftovers():
     response.status_code = 200
     return response
 
+@leftovers.route('/changes', methods=['GET'])
+@query_budget(2)
+def get_leftover_changes():
+    """Leftovers changed since a change token (?since=), or all of them without one, for incremental sync"""
+    since = parse_token(request.args.get('since'))
+
+    if since is False:
+        response = make_response(jsonify({"error": "since must be a change token from an earlier response"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    return change_feed_response(
+        cursor, since, leftover_queries.ALL_LEFTOVERS, leftover_queries.CHANGES, keys=('leftover_id',)
+    )
+
 @leftovers.route('/<int:leftover_id>', methods=['GET'])
 def get_leftover(leftover_id):
     """Get specific leftover details"""
     cursor = db.get_db().cursor()
     
-    cursor.execute('''
-        SELECT l.*, r.name as recipe_name, r.instructions
-        FROM Leftover l
-        JOIN Recipe r ON l.recipe_id = r.recipe_id
-        WHERE l.leftover_id = %s
-    ''', (leftover_id,))
+    cursor.execute(leftover_queries.LEFTOVER_BY_ID, (leftover_id,))
     
     leftover = cursor.fetchone()
     
@@ -61,29 +93,34 @@ def add_leftover():
     
     recipe_id = data.get('recipe_id')
     quantity = data.get('quantity', 1)
+    expires_on = parse_expiry(data.get('expires_on'))
     
     if not recipe_id:
         response = make_response(jsonify({"error": "Recipe ID is required"}))
         response.status_code = 400
         return response
     
+    if expires_on is False:
+        response = make_response(jsonify({"error": "expires_on must be a YYYY-MM-DD date"}))
+        response.status_code = 400
+        return response
+    
     cursor = db.get_db().cursor()
     
     # Check if recipe exists
-    cursor.execute('SELECT * FROM Recipe WHERE recipe_id = %s', (recipe_id,))
+    cursor.execute(leftover_queries.RECIPE_EXISTS, (recipe_id,))
     if not cursor.fetchone():
         response = make_response(jsonify({"error": "Recipe not found"}))
         response.status_code = 404
         return response
     
     try:
-        # Calculate expiration date (e.g., 5 days from now)
-        expiration_date = datetime.now() + timedelta(days=5)
-        
+        # Without an expires_on the leftover keeps for SHELF_LIFE_DAYS from today
         cursor.execute(
-            'INSERT INTO Leftover (recipe_id, quantity, is_expired) VALUES (%s, %s, FALSE)',
-            (recipe_id, quantity)
+            leftover_queries.INSERT_LEFTOVER,
+            (recipe_id, quantity, expires_on)
         )
+        outbox.record(db.get_db(), 'leftover.created', leftover_id=cursor.lastrowid, recipe_id=recipe_id)
         db.get_db().commit()
         
         response = make_response(jsonify({
@@ -99,45 +136,59 @@ def add_leftover():
         return response
 
 @leftovers.route('/<int:leftover_id>', methods=['PUT'])
+@query_budget(2)
 def update_leftover(leftover_id):
     """Update leftover details"""
     data = request.json
     
     quantity = data.get('quantity')
     is_expired = data.get('is_expired')
+    expires_on = parse_expiry(data.get('expires_on'))
     
-    if quantity is None and is_expired is None:
+    if quantity is None and is_expired is None and expires_on is None:
         response = make_response(jsonify({"error": "No fields to update"}))
         response.status_code = 400
         return response
     
-    cursor = db.get_db().cursor()
-    
-    # Check if leftover exists
-    cursor.execute('SELECT * FROM Leftover WHERE leftover_id = %s', (leftover_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "Leftover not found"}))
-        response.status_code = 404
+    if expires_on is False:
+        response = make_response(jsonify({"error": "expires_on must be a YYYY-MM-DD date"}))
+        response.status_code = 400
         return response
     
-    update_fields = []
-    params = []
+    updates = {}
     
     if quantity is not None:
-        update_fields.append('quantity = %s')
-        params.append(quantity)
+        updates['quantity'] = quantity
     
     if is_expired is not None:
-        update_fields.append('is_expired = %s')
-        params.append(is_expired)
+        updates['is_expired'] = is_expired
+    
+    if expires_on is not None:
+        updates['expires_on'] = expires_on
+    
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
+        response.status_code = 400
+        return response
+    
+    cursor = db.get_db().cursor()
     
     try:
-        query = f"UPDATE Leftover SET {', '.join(update_fields)} WHERE leftover_id = %s"
-        params.append(leftover_id)
-        cursor.execute(query, params)
+        outcome, version = run_partial_update(cursor, leftover_queries.UPDATE_LEFTOVER, updates, leftover_id, version)
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "Leftover not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "Leftover was changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+        outbox.record(db.get_db(), 'leftover.updated', leftover_id=leftover_id, fields=sorted(updates),
+                      version=version)
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "Leftover updated successfully"}))
+        response = make_response(jsonify({"message": "Leftover updated successfully", "version": version}))
         response.status_code = 200
         return response
     except Exception as e:
@@ -152,7 +203,9 @@ def delete_leftover(leftover_id):
     cursor = db.get_db().cursor()
     
     try:
-        cursor.execute('DELETE FROM Leftover WHERE leftover_id = %s', (leftover_id,))
+        cursor.execute(leftover_queries.DELETE_LEFTOVER, (leftover_id,))
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'leftover.deleted', leftover_id=leftover_id)
         db.get_db().commit()
         
         if cursor.rowcount == 0:
@@ -175,10 +228,14 @@ def remove_expired_leftovers():
     cursor = db.get_db().cursor()
     
     try:
-        cursor.execute('DELETE FROM Leftover WHERE is_expired = TRUE')
+        cursor.execute(leftover_queries.DELETE_EXPIRED)
+        count = cursor.rowcount
+        cursor.execute(leftover_queries.DELETE_MARKED_EXPIRED)
+        count += cursor.rowcount
+        if count:
+            outbox.record(db.get_db(), 'leftover.expired_removed', rows=count)
         db.get_db().commit()
         
-        count = cursor.rowcount
         response = make_response(jsonify({"message": f"{count} expired leftovers removed"}))
         response.status_code = 200
         return response
@@ -195,14 +252,9 @@ def update_expired_leftovers():
 
     try:
         # Update leftovers as expired based on associated recipes' ingredients
-        cursor.execute('''
-            UPDATE Leftover l
-            JOIN Recipe r ON l.recipe_id = r.recipe_id
-            JOIN Recipe_Ingredient ri ON r.recipe_id = ri.recipe_id
-            JOIN Ingredient i ON ri.ingredient_id = i.ingredient_id
-            SET l.is_expired = TRUE
-            WHERE i.expiration_date < CURDATE() AND l.is_expired = FALSE
-        ''')
+        cursor.execute(leftover_queries.MARK_EXPIRED)
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'leftover.expired_marked', rows=cursor.rowcount)
         db.get_db().commit()
         
         count = cursor.rowcount
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.outbox import outbox
+from backend.queries import log_queries
 from datetime import datetime
 
 logs = Blueprint('logs', __name__)
@@ -12,23 +14,9 @@ def get_scan_history():
     cursor = db.get_db().cursor()
     
     if client_id:
-        query = '''
-            SELECT fsl.*, i.name as ingredient_name
-            FROM Food_Scan_Log fsl
-            JOIN Ingredient i ON fsl.ingredient_id = i.ingredient_id
-            JOIN Client c ON c.log_id = fsl.log_id
-            WHERE c.client_id = %s
-            ORDER BY fsl.timestamp DESC
-        '''
-        cursor.execute(query, (client_id,))
+        cursor.execute(log_queries.SCANS_FOR_CLIENT, (client_id,))
     else:
-        query = '''
-            SELECT fsl.*, i.name as ingredient_name
-            FROM Food_Scan_Log fsl
-            JOIN Ingredient i ON fsl.ingredient_id = i.ingredient_id
-            ORDER BY fsl.timestamp DESC
-        '''
-        cursor.execute(query)
+        cursor.execute(log_queries.ALL_SCANS)
 
     scans = cursor.fetchall()
 
@@ -52,23 +40,25 @@ def log_food_scan():
     cursor = db.get_db().cursor()
     try:
         cursor.execute(
-            'INSERT INTO Food_Scan_Log (ingredient_id, status, timestamp) VALUES (%s, %s, %s)',
+            log_queries.INSERT_SCAN,
             (ingredient_id, status, datetime.now())
         )
-        db.get_db().commit()
-        
         log_id = cursor.lastrowid
         
+        client_id = None
         if status == 'FAILED':
             message = data.get('message', 'Unknown error during scan')
             client_id = data.get('client_id')
             
             if client_id:
                 cursor.execute(
-                    'INSERT INTO Error_Log (client_id, log_id, message, timestamp) VALUES (%s, %s, %s, %s)',
+                    log_queries.INSERT_ERROR,
                     (client_id, log_id, message, datetime.now())
                 )
-                db.get_db().commit()
+
+        outbox.record(db.get_db(), 'scan.logged', log_id=log_id, ingredient_id=ingredient_id, status=status,
+                      client_id=client_id)
+        db.get_db().commit()
         
         response = make_response(jsonify({
             "message": "Food scan logged successfully", 
@@ -87,13 +77,7 @@ def get_error_logs():
     """Get error logs"""
     cursor = db.get_db().cursor()
     
-    cursor.execute('''
-        SELECT el.*, fsl.status as scan_status, i.name as ingredient_name
-        FROM Error_Log el
-        JOIN Food_Scan_Log fsl ON el.log_id = fsl.log_id
-        JOIN Ingredient i ON fsl.ingredient_id = i.ingredient_id
-        ORDER BY el.timestamp DESC
-    ''')
+    cursor.execute(log_queries.ALL_ERRORS)
     
     errors = cursor.fetchall()
     
@@ -119,9 +103,10 @@ def log_error():
     
     try:
         cursor.execute(
-            'INSERT INTO Error_Log (client_id, log_id, message, timestamp) VALUES (%s, %s, %s, %s)',
+            log_queries.INSERT_ERROR,
             (client_id, log_id, message, datetime.now())
         )
+        outbox.record(db.get_db(), 'error.logged', error_id=cursor.lastrowid, client_id=client_id, log_id=log_id)
         db.get_db().commit()
         
         response = make_response(jsonify({
@@ -141,12 +126,7 @@ def get_nutrition_logs(client_id):
     """Get nutrition tracking logs"""
     cursor = db.get_db().cursor()
     
-    cursor.execute('''
-        SELECT nt.*
-        FROM Nutrition_Tracking nt
-        WHERE nt.client_id = %s
-        ORDER BY nt.tracking_id DESC
-    ''', (client_id,))
+    cursor.execute(log_queries.NUTRITION_FOR_CLIENT, (client_id,))
     
     nutrition_logs = cursor.fetchall()
     
@@ -177,11 +157,10 @@ def create_nutrition_log():
     
     try:
         cursor.execute(
-            '''INSERT INTO Nutrition_Tracking 
-               (client_id, protein, fat, fiber, sodium, vitamins, calories, carbs) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)''',
+            log_queries.INSERT_NUTRITION,
             (client_id, protein, fat, fiber, sodium, vitamins, calories, carbs)
         )
+        outbox.record(db.get_db(), 'nutrition.logged', tracking_id=cursor.lastrowid, client_id=client_id)
         db.get_db().commit()
         
         response = make_response(jsonify({
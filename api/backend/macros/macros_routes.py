@@ -1,5 +1,13 @@
+import json
+from collections import Counter
+
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.changes.change_feed import change_feed_response, parse_token
+from backend.outbox import outbox
+from backend.queries import CONFLICT, NOT_FOUND, UPDATED, macro_queries, run_partial_update
+from backend.meal_plans.recipe_macros import refresh_for_macro, refresh_for_macros
 
 macros = Blueprint('macros', __name__)
 
@@ -11,11 +19,7 @@ def get_macronutrients():
     cursor = db.get_db().cursor()
     
     if ingredient_id:
-        cursor.execute('''
-            SELECT * 
-            FROM Macronutrients 
-            WHERE ingredient_id = %s
-        ''', (ingredient_id,))
+        cursor.execute(macro_queries.MACROS_FOR_INGREDIENT, (ingredient_id,))
         macros = cursor.fetchone()
         
         if not macros:
@@ -23,84 +27,188 @@ def get_macronutrients():
             response.status_code = 404
             return response
     else:
-        cursor.execute('''
-            SELECT m.*, i.name as ingredient_name
-            FROM Macronutrients m
-            JOIN Ingredient i ON m.ingredient_id = i.ingredient_id
-        ''')
+        cursor.execute(macro_queries.ALL_MACROS)
         macros = cursor.fetchall()
     
     response = make_response(jsonify(macros))
     response.status_code = 200
     return response
 
+@macros.route('/changes', methods=['GET'])
+@query_budget(2)
+def get_macronutrient_changes():
+    """Macronutrients rows changed since a change token (?since=), or all of them without one, for incremental sync"""
+    since = parse_token(request.args.get('since'))
+
+    if since is False:
+        response = make_response(jsonify({"error": "since must be a change token from an earlier response"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    return change_feed_response(
+        cursor, since, macro_queries.ALL_MACROS, macro_queries.CHANGES, keys=('macro_id',)
+    )
+
 @macros.route('/<int:macro_id>', methods=['PUT'])
+@query_budget(3)
 def update_macronutrients(macro_id):
     """Update macronutrient values"""
     data = request.json
     
-    protein = data.get('protein')
-    fat = data.get('fat')
-    fiber = data.get('fiber')
-    vitamin = data.get('vitamin')
-    sodium = data.get('sodium')
-    calories = data.get('calories')
-    carbs = data.get('carbs')
-
-    update_fields = []
-    params = []
-
-    if protein is not None:
-        update_fields.append('protein = %s')
-        params.append(protein)
-
-    if fat is not None:
-        update_fields.append('fat = %s')
-        params.append(fat)
-
-    if fiber is not None:
-        update_fields.append('fiber = %s')
-        params.append(fiber)
-
-    if vitamin is not None:
-        update_fields.append('vitamin = %s')
-        params.append(vitamin)
-
-    if sodium is not None:
-        update_fields.append('sodium = %s')
-        params.append(sodium)
-
-    if calories is not None:
-        update_fields.append('calories = %s')
-        params.append(calories)
-
-    if carbs is not None:
-        update_fields.append('carbs = %s')
-        params.append(carbs)
-
-    if not update_fields:
+    # Only the fields sent with a value are changed
+    updates = {
+        field: data[field] for field in macro_queries.UPDATE_MACROS.columns
+        if data.get(field) is not None
+    }
+
+    if not updates:
         response = make_response(jsonify({"error": "No fields to update"}))
         response.status_code = 400
         return response
     
-    cursor = db.get_db().cursor()
-    cursor.execute('SELECT * FROM Macronutrients WHERE macro_id = %s', (macro_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "Macronutrients not found"}))
-        response.status_code = 404
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
+        response.status_code = 400
         return response
     
+    cursor = db.get_db().cursor()
+    
     try:
-        query = f"UPDATE Macronutrients SET {', '.join(update_fields)} WHERE macro_id = %s"
-        params.append(macro_id)
-        cursor.execute(query, params)
+        outcome, version = run_partial_update(cursor, macro_queries.UPDATE_MACROS, updates, macro_id, version)
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "Macronutrients not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "Macronutrients were changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+
+        # Recompute the macro rollups of recipes that use this ingredient
+        refresh_for_macro(cursor, macro_id)
+        outbox.record(db.get_db(), 'macros.updated', macro_ids=[macro_id])
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "Macronutrients updated successfully"}))
+        response = make_response(jsonify({"message": "Macronutrients updated successfully", "version": version}))
         response.status_code = 200
         return response
     except Exception as e:
         current_app.logger.error(f"Error updating macronutrients: {str(e)}")
         response = make_response(jsonify({"error": "Could not update macronutrients"}))
         response.status_code = 500
-        return response
\ No newline at end of file
+        return response
+
+# Most items PATCH /macronutrients/bulk takes, and how many rows are updated per transaction
+BULK_UPDATE_MAX_ITEMS = 5000
+BULK_UPDATE_CHUNK_SIZE = 500
+
+# Result status of a bulk item that couldn't be applied as sent
+INVALID = 'invalid'
+
+
+def parse_bulk_item(item):
+    """((macro_id, updates, version), None) for a valid bulk update item, else (None, error message)"""
+    if not isinstance(item, dict) or not isinstance(item.get('macro_id'), int):
+        return None, "macro_id is required"
+
+    updates = {}
+    for field in macro_queries.UPDATE_MACROS.columns:
+        value = item.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            return None, f"{field} must be a non-negative number"
+        updates[field] = value
+    if not updates:
+        return None, "No fields to update"
+
+    version = item.get('version')
+    if version is not None and not isinstance(version, int):
+        return None, "version must be an integer"
+    return (item['macro_id'], updates, version), None
+
+
+@macros.route('/bulk', methods=['PATCH'])
+@query_budget(4 * BULK_UPDATE_MAX_ITEMS // BULK_UPDATE_CHUNK_SIZE)
+def update_macronutrients_bulk():
+    """
+    Update many Macronutrients rows from a list of {macro_id, version, protein, ...}
+    items (version optional, as for PUT), BULK_UPDATE_CHUNK_SIZE rows at a time,
+    each chunk in its own transaction. Returns a result per item, in order:
+    updated (with the new version), not_found, conflict (with the current
+    version) or invalid (with the reason).
+    """
+    data = request.json or {}
+    items = data.get('items')
+
+    if not isinstance(items, list) or not items or len(items) > BULK_UPDATE_MAX_ITEMS:
+        response = make_response(jsonify({
+            "error": f"items must be a list of 1 to {BULK_UPDATE_MAX_ITEMS} macronutrient updates"
+        }))
+        response.status_code = 400
+        return response
+
+    results = [None] * len(items)
+    valid = {}
+    for index, item in enumerate(items):
+        parsed, error = parse_bulk_item(item)
+        if parsed and parsed[0] in valid:
+            parsed, error = None, "macro_id is repeated"
+        if error:
+            macro_id = item.get('macro_id') if isinstance(item, dict) else None
+            results[index] = {"macro_id": macro_id, "status": INVALID, "error": error}
+        else:
+            valid[parsed[0]] = (index,) + parsed[1:]
+
+    # In macro_id order, so concurrent bulk updates lock rows in the same order
+    macro_ids = sorted(valid)
+    conn = db.get_db()
+    cursor = conn.cursor()
+    updated = 0
+    try:
+        for start in range(0, len(macro_ids), BULK_UPDATE_CHUNK_SIZE):
+            chunk = macro_ids[start:start + BULK_UPDATE_CHUNK_SIZE]
+            cursor.execute(macro_queries.LOCK_MACROS_BULK, (json.dumps(chunk),))
+            versions = {row['macro_id']: row['version'] for row in cursor.fetchall()}
+
+            chunk_results, changes = {}, []
+            for macro_id in chunk:
+                index, updates, version = valid[macro_id]
+                current = versions.get(macro_id)
+                if current is None:
+                    chunk_results[index] = {"macro_id": macro_id, "status": NOT_FOUND}
+                elif version is not None and version != current:
+                    chunk_results[index] = {"macro_id": macro_id, "status": CONFLICT, "version": current}
+                else:
+                    chunk_results[index] = {"macro_id": macro_id, "status": UPDATED, "version": current + 1}
+                    changes.append(dict(updates, macro_id=macro_id))
+
+            if changes:
+                changed_ids = [change['macro_id'] for change in changes]
+                cursor.execute(macro_queries.UPDATE_MACROS_BULK, (json.dumps(changes),))
+                # Recompute the macro rollups of recipes that use these ingredients
+                refresh_for_macros(cursor, changed_ids)
+                outbox.record(conn, 'macros.updated', macro_ids=changed_ids)
+            conn.commit()
+
+            updated += len(changes)
+            for index, result in chunk_results.items():
+                results[index] = result
+
+        counts = Counter(result['status'] for result in results)
+        response = make_response(jsonify({
+            "message": f"{updated} macronutrients updated",
+            "counts": {status: counts[status] for status in (UPDATED, NOT_FOUND, CONFLICT, INVALID)},
+            "results": results
+        }))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        conn.rollback()
+        current_app.logger.error(f"Error updating macronutrients in bulk: {str(e)}")
+        # Earlier chunks stay updated; say how far it got
+        response = make_response(jsonify({"error": "Could not update all macronutrients", "updated": updated}))
+        response.status_code = 500
+        return response
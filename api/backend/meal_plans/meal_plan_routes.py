@@ -1,5 +1,11 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.outbox import outbox
+from backend.meal_plans.optimizer import MACRO_FIELDS, greedy_plan, targets_for_diet
+from backend.queries import CONFLICT, NOT_FOUND, meal_plan_queries, run_partial_update
+import numpy as np
+import re
 
 meal_plans = Blueprint('meal_plans', __name__)
 
@@ -11,21 +17,9 @@ def get_all_meal_plans():
     cursor = db.get_db().cursor()
     
     if client_id:
-        query = '''
-            SELECT mp.meal_id, mp.pc_id, mp.recipe_id, mp.quantity, r.name AS recipe_name
-            FROM Meal_Plan mp
-            JOIN Client c ON mp.pc_id = c.pc_id
-            JOIN Recipe r ON mp.recipe_id = r.recipe_id
-            WHERE c.client_id = %s
-        '''
-        cursor.execute(query, (client_id,))
+        cursor.execute(meal_plan_queries.FOR_CLIENT, (client_id,))
     else:
-        query = '''
-            SELECT mp.meal_id, mp.pc_id, mp.recipe_id, mp.quantity, r.name AS recipe_name
-            FROM Meal_Plan mp
-            JOIN Recipe r ON mp.recipe_id = r.recipe_id
-        '''
-        cursor.execute(query)
+        cursor.execute(meal_plan_queries.ALL_MEAL_PLANS)
         
     meal_plans = cursor.fetchall()
     
@@ -38,13 +32,7 @@ def get_meal_plan(meal_id):
     """Get specific meal plan details"""
     cursor = db.get_db().cursor()
     
-    query = '''
-        SELECT mp.meal_id, mp.pc_id, mp.recipe_id, mp.quantity, r.name AS recipe_name, r.instructions
-        FROM Meal_Plan mp
-        JOIN Recipe r ON mp.recipe_id = r.recipe_id
-        WHERE mp.meal_id = %s
-    '''
-    cursor.execute(query, (meal_id,))
+    cursor.execute(meal_plan_queries.MEAL_PLAN_BY_ID, (meal_id,))
     meal_plan = cursor.fetchone()
     
     if not meal_plan:
@@ -73,9 +61,11 @@ def create_meal_plan():
     cursor = db.get_db().cursor()
     try:
         cursor.execute(
-            'INSERT INTO Meal_Plan (pc_id, recipe_id, quantity) VALUES (%s, %s, %s)',
+            meal_plan_queries.INSERT_MEAL_PLAN,
             (pc_id, recipe_id, quantity)
         )
+        outbox.record(db.get_db(), 'meal_plan.created', meal_ids=[cursor.lastrowid], pc_id=pc_id,
+                      recipe_ids=[recipe_id])
         db.get_db().commit()
         
         response = make_response(jsonify({
@@ -91,6 +81,7 @@ def create_meal_plan():
         return response
 
 @meal_plans.route('/<int:meal_id>', methods=['PUT'])
+@query_budget(2)
 def update_meal_plan(meal_id):
     """Update meal plan details - Used by Nancy to modify client plans [Nancy-3]"""
     data = request.json
@@ -102,23 +93,30 @@ def update_meal_plan(meal_id):
         response.status_code = 400
         return response
     
-    cursor = db.get_db().cursor()
-    
-    # Check if meal plan exists
-    cursor.execute('SELECT * FROM Meal_Plan WHERE meal_id = %s', (meal_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "Meal plan not found"}))
-        response.status_code = 404
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
+        response.status_code = 400
         return response
     
+    cursor = db.get_db().cursor()
+    
     try:
-        cursor.execute(
-            'UPDATE Meal_Plan SET quantity = %s WHERE meal_id = %s',
-            (quantity, meal_id)
+        outcome, version = run_partial_update(
+            cursor, meal_plan_queries.UPDATE_MEAL_PLAN, {'quantity': quantity}, meal_id, version
         )
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "Meal plan not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "Meal plan was changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+        outbox.record(db.get_db(), 'meal_plan.updated', meal_id=meal_id, fields=['quantity'], version=version)
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "Meal plan updated successfully"}))
+        response = make_response(jsonify({"message": "Meal plan updated successfully", "version": version}))
         response.status_code = 200
         return response
     except Exception as e:
@@ -133,7 +131,9 @@ def delete_meal_plan(meal_id):
     cursor = db.get_db().cursor()
     
     try:
-        cursor.execute('DELETE FROM Meal_Plan WHERE meal_id = %s', (meal_id,))
+        cursor.execute(meal_plan_queries.DELETE_MEAL_PLAN, (meal_id,))
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'meal_plan.deleted', meal_ids=[meal_id])
         db.get_db().commit()
         
         if cursor.rowcount == 0:
@@ -156,7 +156,9 @@ def delete_outdated_meal_plans(recipe_id):
     cursor = db.get_db().cursor()
     
     try:
-        cursor.execute('DELETE FROM Meal_Plan WHERE recipe_id = %s', (recipe_id,))
+        cursor.execute(meal_plan_queries.DELETE_FOR_RECIPE, (recipe_id,))
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'meal_plan.deleted', recipe_id=recipe_id, rows=cursor.rowcount)
         db.get_db().commit()
         
         count = cursor.rowcount
@@ -172,12 +174,16 @@ def delete_outdated_meal_plans(recipe_id):
 
 @meal_plans.route('/recipes', methods=['GET'])
 def get_all_recipes():
-    """Get all recipes"""
+    """Get all recipes, optionally with their total and per-serving macros (?include=macros)"""
+    include = request.args.get('include', '').split(',')
+    
     cursor = db.get_db().cursor()
     
     try:
-        query = 'SELECT * FROM Recipe'
-        cursor.execute(query)
+        if 'macros' in include:
+            cursor.execute(meal_plan_queries.RECIPES_WITH_MACROS)
+        else:
+            cursor.execute(meal_plan_queries.ALL_RECIPES)
         recipes = cursor.fetchall()
         
         response = make_response(jsonify(recipes))
@@ -187,4 +193,141 @@ def get_all_recipes():
         current_app.logger.error(f"Error fetching recipes: {str(e)}")
         response = make_response(jsonify({"error": "Could not fetch recipes"}))
         response.status_code = 500
-        return response
\ No newline at end of file
+        return response
+
+def is_number(value):
+    return not isinstance(value, bool) and isinstance(value, (int, float))
+
+
+def parse_optimize_options(data, constraints):
+    """
+    ((days, targets, budget, max_servings, time_budget_ms), None) for the
+    options of an optimize request, defaulting from the client's constraints,
+    else (None, error message)
+    """
+    days = data.get('days', 1)
+    if isinstance(days, bool) or not isinstance(days, int) or days < 1:
+        return None, "days must be a positive integer"
+
+    targets = data.get('targets')
+    if targets is None:
+        targets = targets_for_diet(constraints['personal_diet'], days)
+    elif not isinstance(targets, dict) or any(
+        field not in MACRO_FIELDS or not is_number(value) or value < 0 for field, value in targets.items()
+    ):
+        return None, f"targets must map {', '.join(MACRO_FIELDS)} to non-negative numbers"
+
+    if 'budget' in data:
+        budget = data['budget']
+        if budget is not None and (not is_number(budget) or budget < 0):
+            return None, "budget must be a non-negative number"
+    else:
+        # Personal_Constraints.budget is a DECIMAL
+        budget = float(constraints['budget']) if constraints['budget'] is not None else None
+
+    max_servings = data.get('max_servings', 3)
+    if isinstance(max_servings, bool) or not isinstance(max_servings, int) or max_servings < 1:
+        return None, "max_servings must be a positive integer"
+
+    time_budget_ms = data.get('time_budget_ms', 250)
+    if not is_number(time_budget_ms) or time_budget_ms <= 0:
+        return None, "time_budget_ms must be a positive number"
+
+    return (days, targets, budget, max_servings, time_budget_ms), None
+
+
+@meal_plans.route('/optimize', methods=['POST'])
+def optimize_meal_plan():
+    """Suggest recipe servings that best fit a client's macro targets and budget"""
+    data = request.json
+    
+    pc_id = data.get('pc_id')
+    
+    if not pc_id:
+        response = make_response(jsonify({"error": "Personal constraint ID is required"}))
+        response.status_code = 400
+        return response
+    
+    cursor = db.get_db().cursor()
+    
+    cursor.execute(meal_plan_queries.CONSTRAINTS_FOR_PLAN, (pc_id,))
+    constraints = cursor.fetchone()
+    
+    if not constraints:
+        response = make_response(jsonify({"error": "Personal constraints not found"}))
+        response.status_code = 404
+        return response
+    
+    options, error = parse_optimize_options(data, constraints)
+    if error:
+        response = make_response(jsonify({"error": error}))
+        response.status_code = 400
+        return response
+    days, targets, budget, max_servings, time_budget_ms = options
+    
+    # Skip recipes with an ingredient named in the client's restrictions (e.g. "egg", "peanuts");
+    # they are matched as one REGEXP so the statement has the same shape for every client
+    restrictions = [
+        term.strip() for term in (constraints['dietary_restrictions'] or '').split(',')
+        if term.strip() and term.strip().lower() != 'none'
+    ]
+    restriction_pattern = '|'.join(re.escape(term) for term in restrictions) or None
+    
+    try:
+        cursor.execute(meal_plan_queries.OPTIMIZER_CANDIDATES, (restriction_pattern,))
+        recipes = cursor.fetchall()
+        
+        macros = np.array(
+            [[recipe[field] for field in MACRO_FIELDS] for recipe in recipes],
+            dtype=np.float32
+        ).reshape(len(recipes), len(MACRO_FIELDS))
+        costs = np.array([recipe['cost'] for recipe in recipes], dtype=np.float32)
+        target_vector = np.array([targets.get(field, 0) for field in MACRO_FIELDS], dtype=np.float32)
+        
+        servings, totals, cost, truncated = greedy_plan(
+            macros, costs, target_vector,
+            budget=budget,
+            max_servings=max_servings,
+            days=days,
+            time_budget=time_budget_ms / 1000
+        )
+        
+        plan = [
+            {
+                "recipe_id": recipes[i]['recipe_id'],
+                "recipe_name": recipes[i]['name'],
+                "servings": int(servings[i]),
+                "cost": round(float(costs[i]) * int(servings[i]), 2)
+            }
+            for i in np.flatnonzero(servings)
+        ]
+        
+        result = {
+            "pc_id": pc_id,
+            "plan": plan,
+            "totals": {field: round(float(totals[i]), 2) for i, field in enumerate(MACRO_FIELDS)},
+            "targets": targets,
+            "budget": budget,
+            "cost": round(cost, 2),
+            "truncated": truncated
+        }
+        
+        # Optionally store the plan as Meal_Plan rows (executemany sends one multi-row insert)
+        if data.get('save') and plan:
+            cursor.executemany(
+                meal_plan_queries.INSERT_MEAL_PLAN,
+                [(pc_id, item['recipe_id'], item['servings']) for item in plan]
+            )
+            outbox.record(db.get_db(), 'meal_plan.created', pc_id=pc_id,
+                          recipe_ids=[item['recipe_id'] for item in plan])
+            db.get_db().commit()
+            result["saved"] = True
+        
+        response = make_response(jsonify(result))
+        response.status_code = 201 if result.get("saved") else 200
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error optimizing meal plan: {str(e)}")
+        response = make_response(jsonify({"error": "Could not optimize meal plan"}))
+        response.status_code = 500
+        return response
@@ -0,0 +1,97 @@
+#------------------------------------------------------------
+# Meal plan optimizer
+#
+# Picks recipe servings so the plan's summed macros land as close
+# as possible to a set of targets without going over budget. The
+# solver is a greedy search over the recipe x macro matrix: every
+# step scores all recipes at once with NumPy and adds one serving
+# of the best one, so a step costs O(recipes x macros) and a full
+# plan for a 50k recipe catalog stays in the tens of milliseconds.
+#------------------------------------------------------------
+import time
+
+import numpy as np
+
+# Order of the columns in the recipe x macro matrix
+MACRO_FIELDS = ('protein', 'fat', 'fiber', 'vitamin', 'sodium', 'calories', 'carbs')
+
+# Daily macro targets used when the request doesn't provide its own,
+# keyed by Personal_Constraints.personal_diet
+DIET_TARGETS = {
+    'balanced': {'calories': 2000, 'protein': 75, 'carbs': 250, 'fat': 65},
+    'high-protein': {'calories': 2200, 'protein': 150, 'carbs': 200, 'fat': 70},
+    'keto': {'calories': 1800, 'protein': 90, 'carbs': 30, 'fat': 140},
+    'low-carb': {'calories': 1800, 'protein': 100, 'carbs': 100, 'fat': 90},
+    'paleo': {'calories': 2000, 'protein': 110, 'carbs': 150, 'fat': 90},
+}
+
+
+def targets_for_diet(personal_diet, days=1):
+    """Get the default macro targets for a diet, scaled to the plan length"""
+    targets = DIET_TARGETS.get((personal_diet or '').lower(), DIET_TARGETS['balanced'])
+    return {field: value * days for field, value in targets.items()}
+
+
+def greedy_plan(macros, costs, targets, budget=None, max_servings=3,
+                max_total_servings=7, days=1, time_budget=None):
+    """
+    Choose servings per recipe that minimize the relative distance to the targets.
+
+    macros is an (n_recipes, n_macros) array of per-serving values, costs the
+    per-serving cost of each recipe and targets an n_macros array (for the
+    whole plan) where a zero means "don't care". max_servings (per recipe) and
+    max_total_servings are per day and scale with days. Returns (servings,
+    totals, cost, truncated) where truncated is True if time_budget (seconds)
+    ran out before the plan converged.
+    """
+    macros = np.asarray(macros, dtype=np.float32)
+    costs = np.asarray(costs, dtype=np.float32)
+    targets = np.asarray(targets, dtype=np.float32)
+
+    n_recipes = macros.shape[0]
+    servings = np.zeros(n_recipes, dtype=np.int32)
+    totals = np.zeros(macros.shape[1], dtype=np.float32)
+    spent = 0.0
+
+    if n_recipes == 0:
+        return servings, totals, spent, False
+
+    # Scale every macro by its target so the error is a sum of relative
+    # deviations, and drop the macros without a target
+    tracked = targets > 0
+    scale = np.zeros_like(targets)
+    scale[tracked] = 1.0 / targets[tracked]
+    scaled = macros[:, tracked] * scale[tracked]
+    goal = np.ones(int(tracked.sum()), dtype=np.float32)
+    current = np.zeros_like(goal)
+    error = float(np.abs(goal - current).sum())
+
+    max_servings *= days
+    max_total_servings *= days
+
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    truncated = False
+
+    for _ in range(max_total_servings):
+        if deadline and time.perf_counter() > deadline:
+            truncated = True
+            break
+
+        candidate_error = np.abs(current + scaled - goal).sum(axis=1)
+
+        blocked = servings >= max_servings
+        if budget is not None:
+            blocked |= costs > (budget - spent)
+        candidate_error[blocked] = np.inf
+
+        best = int(np.argmin(candidate_error))
+        if candidate_error[best] >= error:
+            break
+
+        servings[best] += 1
+        current += scaled[best]
+        totals += macros[best]
+        spent += float(costs[best])
+        error = float(candidate_error[best])
+
+    return servings, totals, spent, truncated
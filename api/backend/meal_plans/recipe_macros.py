@@ -0,0 +1,47 @@
+#------------------------------------------------------------
+# Helpers that keep the materialized Recipe_Macros table current.
+# Each helper recomputes only the recipes affected by a change,
+# using the caller's cursor so the refresh happens in the same
+# transaction as the write that triggered it.
+#------------------------------------------------------------
+import json
+
+from backend.queries import meal_plan_queries
+
+
+def refresh_recipes(cursor, recipe_ids):
+    """Recompute Recipe_Macros for the given recipe ids"""
+    recipe_ids = [int(recipe_id) for recipe_id in recipe_ids]
+    if not recipe_ids:
+        return 0
+
+    cursor.execute(meal_plan_queries.REFRESH_RECIPE_MACROS, (json.dumps(recipe_ids),))
+    return cursor.rowcount
+
+
+def refresh_for_macro(cursor, macro_id):
+    """Recompute Recipe_Macros for every recipe that uses a Macronutrients row"""
+    cursor.execute(meal_plan_queries.REFRESH_MACROS_FOR_MACRO, (macro_id,))
+    return cursor.rowcount
+
+
+def refresh_for_macros(cursor, macro_ids):
+    """Recompute Recipe_Macros for every recipe that uses any of the Macronutrients rows"""
+    macro_ids = [int(macro_id) for macro_id in macro_ids]
+    if not macro_ids:
+        return 0
+
+    cursor.execute(meal_plan_queries.REFRESH_MACROS_FOR_MACROS, (json.dumps(macro_ids),))
+    return cursor.rowcount
+
+
+def recipes_using_ingredient(cursor, ingredient_id):
+    """Get the ids of recipes that use an ingredient"""
+    cursor.execute(meal_plan_queries.RECIPES_USING_INGREDIENT, (ingredient_id,))
+    return [row['recipe_id'] for row in cursor.fetchall()]
+
+
+def recipes_using_ingredients(cursor, ingredient_ids):
+    """Get the ids of recipes that use any of the ingredients"""
+    cursor.execute(meal_plan_queries.RECIPES_USING_INGREDIENTS, (json.dumps([int(i) for i in ingredient_ids]),))
+    return [row['recipe_id'] for row in cursor.fetchall()]
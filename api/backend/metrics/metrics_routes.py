@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, make_response
+from backend.metrics.request_metrics import registry
+
+metrics = Blueprint('metrics', __name__)
+
+@metrics.route('/', methods=['GET'], strict_slashes=False)
+def get_metrics():
+    """Per-route latency and SQL metrics in Prometheus text format"""
+    response = make_response(registry.render_prometheus())
+    response.mimetype = 'text/plain'
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.status_code = 200
+    return response
+
+@metrics.route('/summary', methods=['GET'])
+def get_metrics_summary():
+    """Per-route averages of the collected metrics - Used by Alvin to monitor API performance"""
+    response = make_response(jsonify(registry.summary()))
+    response.status_code = 200
+    return response
@@ -0,0 +1,180 @@
+#------------------------------------------------------------
+# Per-route request and SQL metrics
+#
+# A before/after_request pair times every request, and a DB
+# statement listener adds up the SQL work done while handling it.
+# Totals are kept in memory per process and exported in the
+# Prometheus text format by the metrics blueprint.
+#------------------------------------------------------------
+import threading
+import time
+
+from flask import request, has_request_context
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Key used to keep the in-flight request's counters in its WSGI environ
+ENVIRON_KEY = 'backend.metrics'
+
+
+class RouteStats(object):
+    """Running totals for one (route, method) pair"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.sql_rows = 0
+        self.response_bytes = 0
+
+
+class MetricsRegistry(object):
+    """Thread-safe store of RouteStats keyed by (route, method)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, method, status, latency, sql_statements, sql_seconds, sql_rows, response_bytes):
+        with self._lock:
+            stats = self._routes.get((route, method))
+            if stats is None:
+                stats = self._routes[(route, method)] = RouteStats()
+
+            stats.requests += 1
+            if status >= 500:
+                stats.errors += 1
+            stats.latency_sum += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.buckets[i] += 1
+            stats.sql_statements += sql_statements
+            stats.sql_seconds += sql_seconds
+            stats.sql_rows += sql_rows
+            stats.response_bytes += response_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(
+                ((route, method, vars(stats).copy()) for (route, method), stats in self._routes.items()),
+                key=lambda item: (item[0], item[1])
+            )
+
+    def render_prometheus(self):
+        """Export every route's totals in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        lines.append('# HELP fridgefriend_request_duration_seconds Request latency by route.')
+        lines.append('# TYPE fridgefriend_request_duration_seconds histogram')
+        for route, method, stats in snapshot:
+            labels = f'route="{route}",method="{method}"'
+            # Buckets are stored per bound already, so they are cumulative as Prometheus expects
+            for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+                lines.append(f'fridgefriend_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'fridgefriend_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["requests"]}')
+            lines.append(f'fridgefriend_request_duration_seconds_sum{{{labels}}} {stats["latency_sum"]:.6f}')
+            lines.append(f'fridgefriend_request_duration_seconds_count{{{labels}}} {stats["requests"]}')
+
+        counters = (
+            ('fridgefriend_request_errors_total', 'Requests that returned a 5xx status.', 'errors', '{}'),
+            ('fridgefriend_sql_statements_total', 'SQL statements executed.', 'sql_statements', '{}'),
+            ('fridgefriend_sql_duration_seconds_total', 'Time spent executing SQL.', 'sql_seconds', '{:.6f}'),
+            ('fridgefriend_sql_rows_total', 'Rows returned or affected by SQL statements.', 'sql_rows', '{}'),
+            ('fridgefriend_response_bytes_total', 'Response body bytes sent.', 'response_bytes', '{}'),
+        )
+        for name, help_text, field, value_format in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for route, method, stats in snapshot:
+                value = value_format.format(stats[field])
+                lines.append(f'{name}{{route="{route}",method="{method}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Per-route averages for the admin System Logs page"""
+        rows = []
+        for route, method, stats in self.snapshot():
+            count = stats['requests'] or 1
+            rows.append({
+                "route": route,
+                "method": method,
+                "requests": stats['requests'],
+                "errors": stats['errors'],
+                "avg_ms": round(stats['latency_sum'] / count * 1000, 2),
+                "p95_ms": approximate_percentile(stats['buckets'], stats['requests'], 0.95),
+                "max_ms": round(stats['latency_max'] * 1000, 2),
+                "avg_sql_statements": round(stats['sql_statements'] / count, 2),
+                "avg_sql_ms": round(stats['sql_seconds'] / count * 1000, 2),
+                "avg_sql_rows": round(stats['sql_rows'] / count, 2),
+                "avg_response_bytes": round(stats['response_bytes'] / count),
+            })
+        return rows
+
+
+def approximate_percentile(buckets, total, quantile):
+    """Upper bound (ms) of the histogram bucket holding the given quantile"""
+    if not total:
+        return None
+    wanted = total * quantile
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        if count >= wanted:
+            return bound * 1000
+    return None
+
+
+registry = MetricsRegistry()
+
+
+def start_request():
+    request.environ[ENVIRON_KEY] = {
+        "start": time.perf_counter(),
+        "sql_statements": 0,
+        "sql_seconds": 0.0,
+        "sql_rows": 0,
+    }
+
+
+def record_statement(query, args, duration, rowcount):
+    # Statements run outside a request (CLI jobs, workers) aren't attributed to a route
+    if not has_request_context():
+        return
+    stats = request.environ.get(ENVIRON_KEY)
+    if stats is None:
+        return
+    stats["sql_statements"] += 1
+    stats["sql_seconds"] += duration
+    stats["sql_rows"] += max(rowcount or 0, 0)
+
+
+def finish_request(response):
+    stats = request.environ.get(ENVIRON_KEY)
+    if stats is None:
+        return response
+
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    registry.observe(
+        route,
+        request.method,
+        response.status_code,
+        time.perf_counter() - stats["start"],
+        stats["sql_statements"],
+        stats["sql_seconds"],
+        stats["sql_rows"],
+        response.calculate_content_length() or 0
+    )
+    return response
+
+
+def init_app(app, db):
+    """Start collecting request and SQL metrics for every route of the app"""
+    db.add_statement_listener(record_statement)
+    app.before_request(start_request)
+    app.after_request(finish_request)
@@ -0,0 +1,61 @@
+#------------------------------------------------------------
+# Transactional outbox for write events
+#
+# A route that changes rows also records what it changed with
+# record(conn, topic, **payload) before it commits. The event is a
+# row in the Outbox table, so it commits or rolls back together
+# with the change: an event is never sent for a change that didn't
+# happen, and no committed change goes without one.
+#
+# The relay (backend/outbox/relay.py) tails the table and passes
+# each event to the functions registered for its topic with
+# @subscriber(topic, ...), in the API process, so cache
+# invalidation, alerts and notifications can follow changes without
+# polling the tables they're about. A topic is '<entity>.<what
+# happened>', e.g. 'fridge.stocked'; subscribing to 'fridge.*'
+# gets every fridge event.
+#------------------------------------------------------------
+import json
+
+from backend.queries import outbox_queries
+
+
+class Event(object):
+    """An event read back from the outbox"""
+
+    def __init__(self, event_id, topic, payload, created_at):
+        self.event_id = event_id
+        self.topic = topic
+        self.payload = payload
+        self.created_at = created_at
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['event_id'], row['topic'], json.loads(row['payload']), row['created_at'])
+
+
+def record(conn, topic, **payload):
+    """
+    Add an event to conn's open transaction. Uses a cursor of its own, so the
+    caller's cursor keeps its rowcount and lastrowid. One statement.
+    """
+    cursor = conn.cursor()
+    cursor.execute(outbox_queries.INSERT, (topic, json.dumps(payload, default=str)))
+
+
+subscribers = {}
+
+
+def subscriber(*topics):
+    """Register the decorated fn(event) for events of the given topics ('fridge.stocked', 'fridge.*')"""
+    def decorator(fn):
+        for topic in topics:
+            subscribers.setdefault(topic, []).append(fn)
+        return fn
+    return decorator
+
+
+def subscribers_for(topic):
+    """The functions subscribed to a topic, exactly or through its '<entity>.*' wildcard"""
+    entity = topic.split('.', 1)[0]
+    return subscribers.get(topic, []) + subscribers.get(f"{entity}.*", [])
@@ -0,0 +1,135 @@
+#------------------------------------------------------------
+# Outbox relay
+#
+# Background thread that create_app() starts (OUTBOX_RELAY=false
+# turns it off). It starts at the newest event in the outbox, then
+# reads the events after the last one it dispatched, up to
+# BATCH_SIZE at a time, and calls their subscribers (see
+# backend/outbox/outbox.py) in event_id order. When there are no
+# new events it polls again after POLL_SECONDS.
+#
+# An event_id is handed out when the row is inserted but only shows
+# up once its transaction commits, so an id lower than ones already
+# read can still appear. The relay remembers the ids it skipped and
+# looks for them again on every poll for GAP_SECONDS (a rolled back
+# transaction leaves its id missing for good), so such an event is
+# dispatched late instead of being lost.
+#
+# Every replica of the API runs its own relay and delivers every
+# event to its own subscribers. A subscriber that raises is logged
+# and the event is not retried.
+#------------------------------------------------------------
+import json
+import logging
+import threading
+import time
+
+from backend.db_connection import connect
+from backend.outbox.outbox import Event, subscribers, subscribers_for
+from backend.queries import outbox_queries
+
+POLL_SECONDS = 0.5
+BATCH_SIZE = 500
+
+# How long a skipped event_id is looked for, and the most ids remembered for one
+# jump (ids can jump by a lot, e.g. after a bulk insert is rolled back)
+GAP_SECONDS = 60
+MAX_GAP_IDS = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class Relay(object):
+    """Background thread that dispatches new outbox events to their subscribers"""
+
+    def __init__(self, app, poll_seconds=POLL_SECONDS, batch_size=BATCH_SIZE):
+        self.app = app
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        # The last event_id read in order, and the skipped ids below it with
+        # the time they stop being looked for
+        self.position = None
+        self.gaps = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='outbox-relay', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        # Autocommit, so every read sees the transactions committed since the last one
+        conn = None
+        while not self._stop.is_set():
+            try:
+                if conn is None:
+                    conn = connect(autocommit=True)
+                if self.position is None:
+                    cursor = conn.cursor()
+                    cursor.execute(outbox_queries.LATEST)
+                    self.position = cursor.fetchone()['latest']
+                if self.poll(conn) < self.batch_size:
+                    self._stop.wait(self.poll_seconds)
+            except Exception:
+                # Reconnect and carry on from the same position
+                logger.exception("Outbox relay could not read the outbox")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+                self._stop.wait(self.poll_seconds)
+        if conn is not None:
+            conn.close()
+
+    def poll(self, conn):
+        """Dispatch the events committed since the last poll; returns how many new ones were read"""
+        cursor = conn.cursor()
+        now = time.monotonic()
+        self.gaps = {event_id: until for event_id, until in self.gaps.items() if until > now}
+
+        late = []
+        if self.gaps:
+            cursor.execute(outbox_queries.BY_IDS, (json.dumps(sorted(self.gaps)),))
+            late = cursor.fetchall()
+            for row in late:
+                del self.gaps[row['event_id']]
+
+        cursor.execute(outbox_queries.AFTER, (self.position, self.batch_size))
+        rows = cursor.fetchall()
+        expected = self.position + 1
+        for row in rows:
+            for event_id in range(expected, min(row['event_id'], expected + MAX_GAP_IDS)):
+                self.gaps[event_id] = now + GAP_SECONDS
+            expected = row['event_id'] + 1
+        if rows:
+            self.position = rows[-1]['event_id']
+
+        with self.app.app_context():
+            for row in late + rows:
+                self.dispatch(Event.from_row(row))
+        return len(rows)
+
+    @staticmethod
+    def dispatch(event):
+        for fn in subscribers_for(event.topic):
+            try:
+                fn(event)
+            except Exception:
+                logger.exception(f"Outbox subscriber {fn.__name__} failed on event {event.event_id} ({event.topic})")
+
+
+def init_app(app):
+    """Start the relay for this API process unless OUTBOX_RELAY is off or nothing subscribes"""
+    if not app.config['OUTBOX_RELAY'] or not subscribers:
+        return None
+    relay = Relay(app)
+    relay.start()
+    app.extensions['outbox_relay'] = relay
+    return relay
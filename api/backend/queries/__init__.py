@@ -0,0 +1,129 @@
+#------------------------------------------------------------
+# Registry of the SQL statements the API runs
+#
+# Every statement lives in one of the *_queries modules of this
+# package under a dotted name (e.g. 'fridge.inventory_for_client'),
+# so routes don't build SQL inline, each statement has exactly one
+# shape, and benchmarks can look statements up by name.
+#
+# Partial updates use one fixed statement per table instead of
+# building a SET list from the fields that were sent: each column is
+# written as `col = IF(%s, %s, col)` (plus a version check) and gets
+# an (is_set, value) pair of parameters, see Query.update_args().
+#
+# The tables they update carry a version column that every partial
+# update bumps, as `version = LAST_INSERT_ID(version + 1)`, and a
+# caller may pass the version it last read so the update only
+# applies if nobody changed the row since. Bumping the version means
+# the update never leaves a matched row unchanged, and cursor.lastrowid
+# is the row's new version, or 0 if it wasn't updated (no row had the
+# key, or it was at another version). See run_partial_update().
+#------------------------------------------------------------
+
+registry = {}
+
+
+class Query(str):
+    """
+    A registered SQL statement. It is a str, so it can be passed straight
+    to cursor.execute(), and carries its registry name for tooling.
+    """
+
+    def __new__(cls, name, sql, columns=()):
+        query = super().__new__(cls, sql)
+        query.name = name
+        query.columns = columns
+        return query
+
+    def update_args(self, values, *key, version=None):
+        """
+        Parameters for a partial update statement: an (is_set, value) pair for
+        each of its columns, in order, followed by the key. Columns missing
+        from values are left unchanged. version is the version the row must be
+        at for the update to apply (None for any); the statement checks it once
+        per column and once for the version column itself.
+        """
+        args = []
+        for column in self.columns:
+            args.extend((column in values, version, version, values.get(column)))
+        args.extend((version, version))
+        args.extend(key)
+        return args
+
+
+def register(name, sql):
+    """Add a statement to the registry and return it"""
+    if name in registry:
+        raise ValueError(f"Query '{name}' is already registered")
+    registry[name] = Query(name, sql)
+    return registry[name]
+
+
+def register_partial_update(name, table, columns, key):
+    """Register a fixed-shape UPDATE that can set any subset of columns and bumps the row's version"""
+    if name in registry:
+        raise ValueError(f"Query '{name}' is already registered")
+    # Assignments run left to right, so the columns are checked against the
+    # version the row had before this statement, which is bumped last
+    matches = '(%s IS NULL OR version = %s)'
+    assignments = ',\n           '.join(f"{column} = IF(%s AND {matches}, %s, {column})" for column in columns)
+    sql = f'''
+    UPDATE {table}
+       SET {assignments},
+           version = IF({matches}, LAST_INSERT_ID(version + 1), version)
+     WHERE {key} = %s
+    '''
+    query = registry[name] = Query(name, sql, columns)
+    query.version_query = register(f"{name}.version", f"SELECT version FROM {table} WHERE {key} = %s")
+    return query
+
+
+# Outcomes of run_partial_update()
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+CONFLICT = 'conflict'
+
+
+def run_partial_update(cursor, query, values, key, version=None):
+    """
+    Run a partial update. Returns (outcome, version): UPDATED with the row's
+    new version, NOT_FOUND if no row has the key, or CONFLICT with the row's
+    current version if a version was given and the row is no longer at it
+    (nothing is changed then). That takes one statement, or two when a
+    versioned update misses and the row's version has to be looked up.
+    """
+    cursor.execute(query, query.update_args(values, key, version=version))
+    if cursor.lastrowid:
+        return UPDATED, cursor.lastrowid
+    if version is None:
+        return NOT_FOUND, None
+    cursor.execute(query.version_query, (key,))
+    row = cursor.fetchone()
+    if row is None:
+        return NOT_FOUND, None
+    return CONFLICT, row['version']
+
+
+def get(name):
+    """Look up a registered statement by name"""
+    return registry[name]
+
+
+# Importing the modules registers their statements
+from backend.queries import (  # noqa: E402
+    user_queries,
+    fridge_queries,
+    ingredient_queries,
+    meal_plan_queries,
+    macro_queries,
+    log_queries,
+    leftover_queries,
+    shopping_list_queries,
+    recipe_queries,
+    digest_queries,
+    job_queries,
+    job_queue_queries,
+    change_queries,
+    outbox_queries,
+    event_queries,
+)
@@ -0,0 +1,42 @@
+#------------------------------------------------------------
+# Statements used by the change feeds (GET .../changes)
+#
+# Triggers log every change to the fed tables in Change_Log (see
+# database-files/fridgefriend.sql). A client's change token is the
+# last change_id it has synced; each feed's own query (in the
+# blueprint's *_queries module) reads the distinct rows changed
+# after it and LEFT JOINs them to the table, so a row that is gone
+# comes back as deleted and any other as its current state.
+#------------------------------------------------------------
+from backend.queries import register
+
+# Changes younger than this may belong to transactions that haven't committed
+# yet, whose change_ids are lower than ones already visible. Tokens stop short
+# of them, so they are sent again on the next sync rather than skipped.
+SETTLE_SECONDS = 60
+
+# How long changes are kept; older tokens need a full sync
+RETENTION_DAYS = 7
+
+# oldest and latest change_id, and the latest one older than SETTLE_SECONDS
+BOUNDS = register('changes.bounds', f'''
+    SELECT MIN(change_id) AS oldest, MAX(change_id) AS latest,
+           (SELECT change_id FROM Change_Log
+            WHERE changed_at <= NOW(3) - INTERVAL {SETTLE_SECONDS} SECOND
+            ORDER BY changed_at DESC, change_id DESC
+            LIMIT 1) AS settled
+    FROM Change_Log
+''')
+
+PRUNE = register('changes.prune', f'''
+    DELETE FROM Change_Log WHERE changed_at < NOW() - INTERVAL {RETENTION_DAYS} DAY
+''')
+
+# The distinct keys of one table's rows changed in a range of change_ids; the
+# feeds' queries join the table to it. Params: the range's bounds.
+CHANGED_ROWS_TEMPLATE = '''
+    SELECT DISTINCT scope_id, row_id, row_date
+    FROM Change_Log
+    WHERE table_name = '{table}' AND scope_id {scope}
+      AND change_id > %s AND change_id <= %s
+'''
@@ -0,0 +1,47 @@
+#------------------------------------------------------------
+# Statements used by the expiry digest job and GET /fridge/digest
+#
+# The job rebuilds Expiry_Digest one range of client ids at a
+# time: each range is cleared and refilled by a single
+# INSERT ... SELECT that reads the clients' fridges through the
+# (fridge_id, expires_on) index, so a full run reads the expiring
+# part of that index once. Ranges don't overlap, so they can be
+# built in parallel.
+#------------------------------------------------------------
+from backend.queries import register
+
+CLIENT_ID_RANGE = register('digest.client_id_range', '''
+    SELECT MIN(client_id) AS first_id, MAX(client_id) AS last_id FROM Client
+''')
+
+CLEAR_RANGE = register('digest.clear_range', '''
+    DELETE FROM Expiry_Digest WHERE client_id BETWEEN %s AND %s
+''')
+
+# Params: digest date, first and last client id, digest date again and the
+# number of days to look ahead. Dates are relative to the digest date rather
+# than CURDATE() so every range of one run agrees, even across midnight.
+BUILD_RANGE = register('digest.build_range', '''
+    INSERT INTO Expiry_Digest (client_id, expires_on, ingredient_id, name, quantity, unit, digest_date)
+    SELECT c.client_id, fi.expires_on, fi.ingredient_id, i.name, fi.quantity, fi.unit, %s
+    FROM Client c
+    JOIN Fridge_Ingredient fi FORCE INDEX (idx_fridge_ingredient_fridge_expiry)
+        ON fi.fridge_id = c.fridge_id
+    JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
+    WHERE c.client_id BETWEEN %s AND %s
+      AND fi.expires_on BETWEEN %s AND %s + INTERVAL %s DAY
+''')
+
+# Rows of clients no range covered this run (i.e. deleted clients)
+DELETE_STALE = register('digest.delete_stale', '''
+    DELETE FROM Expiry_Digest WHERE digest_date < %s
+''')
+
+# Read in key order; lots that expired since the digest was built are skipped
+FOR_CLIENT = register('digest.for_client', '''
+    SELECT ingredient_id, name, quantity, unit, expires_on AS expiration_date,
+           DATEDIFF(expires_on, CURDATE()) AS days_left, digest_date
+    FROM Expiry_Digest
+    WHERE client_id = %s AND expires_on >= CURDATE()
+    ORDER BY expires_on, ingredient_id
+''')
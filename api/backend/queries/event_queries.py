@@ -0,0 +1,19 @@
+#------------------------------------------------------------
+# Statements used by the event streams (GET /events/...)
+#
+# Each looks up, once per stream or poll, which fridge and client
+# messages a client or advisor gets (see backend/events/hub.py).
+#------------------------------------------------------------
+from backend.queries import register
+
+CLIENT_SCOPE = register('events.client_scope', '''
+    SELECT client_id, fridge_id
+    FROM Client
+    WHERE client_id = %s
+''')
+
+ADVISOR_CLIENTS = register('events.advisor_clients', '''
+    SELECT client_id
+    FROM Client_Health_Advisor
+    WHERE advisor_id = %s
+''')
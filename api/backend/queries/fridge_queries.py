@@ -0,0 +1,185 @@
+#------------------------------------------------------------
+# Statements used by the fridge blueprint
+#
+# Fridge_Ingredient holds one row per lot: the stock of an
+# ingredient in a fridge that expires on the same day (expires_on
+# is part of the key). Expiry is read from the lot itself, so the
+# sweep and the per-fridge expiry lookups are range scans on the
+# expires_on indexes. Consuming takes from the earliest lots first.
+#------------------------------------------------------------
+from backend.queries import register
+from backend.queries.change_queries import CHANGED_ROWS_TEMPLATE
+
+INVENTORY_FOR_CLIENT = register('fridge.inventory_for_client', '''
+    SELECT fi.fridge_id, fi.ingredient_id, i.name, fi.quantity, fi.unit,
+           fi.expires_on AS expiration_date, fi.is_expired
+    FROM Client c
+    JOIN Fridge_Ingredient fi ON fi.fridge_id = c.fridge_id
+    JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
+    WHERE c.client_id = %s
+    ORDER BY i.name, fi.expires_on
+''')
+
+# One row per lot, earliest first
+INGREDIENT_IN_FRIDGE = register('fridge.ingredient_in_fridge', '''
+    SELECT fi.fridge_id, fi.ingredient_id, i.name, fi.quantity, fi.unit,
+           fi.expires_on AS expiration_date, fi.is_expired
+    FROM Fridge_Ingredient fi
+    JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
+    WHERE fi.fridge_id = %s AND fi.ingredient_id = %s
+    ORDER BY fi.expires_on
+''')
+
+# The next lots to expire in a client's fridge within a number of days. Reads
+# the (fridge_id, expires_on) index in order and stops after the limit, so the
+# cost depends on the limit rather than the size of the fridge.
+EXPIRING_FOR_CLIENT = register('fridge.expiring_for_client', '''
+    SELECT fi.fridge_id, fi.ingredient_id, i.name, fi.quantity, fi.unit,
+           fi.expires_on AS expiration_date,
+           DATEDIFF(fi.expires_on, CURDATE()) AS days_left
+    FROM Client c
+    JOIN Fridge_Ingredient fi FORCE INDEX (idx_fridge_ingredient_fridge_expiry)
+        ON fi.fridge_id = c.fridge_id
+    JOIN Ingredient i ON fi.ingredient_id = i.ingredient_id
+    WHERE c.client_id = %s
+      AND fi.expires_on >= CURDATE()
+      AND fi.expires_on <= CURDATE() + INTERVAL %s DAY
+    ORDER BY fi.expires_on
+    LIMIT %s
+''')
+
+MARK_EXPIRED = register('fridge.mark_expired', '''
+    UPDATE Fridge_Ingredient
+    SET is_expired = TRUE
+    WHERE expires_on < CURDATE() AND is_expired = FALSE
+''')
+
+DELETE_EXPIRED = register('fridge.delete_expired', '''
+    DELETE FROM Fridge_Ingredient WHERE expires_on < CURDATE()
+''')
+
+# Days expired lots are kept, and shown as expired, before the scheduled sweep
+# deletes them (DELETE /fridge/expired deletes them right away)
+EXPIRED_GRACE_DAYS = 3
+
+DELETE_EXPIRED_AFTER_GRACE = register('fridge.delete_expired_after_grace', f'''
+    DELETE FROM Fridge_Ingredient WHERE expires_on < CURDATE() - INTERVAL {EXPIRED_GRACE_DAYS} DAY
+''')
+
+# Adding stock is a single upsert on the lot's key, so concurrent adds never
+# read-modify-write the row. A lot without an explicit expiry takes the
+# ingredient's catalog date, or a week from today (the default the Streamlit
+# pages offer) when the catalog has none. Inserts nothing for an unknown
+# ingredient.
+ADD_STOCK = register('fridge.add_stock', '''
+    INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, expires_on, quantity, unit)
+    SELECT %s, i.ingredient_id, COALESCE(%s, i.expiration_date, CURDATE() + INTERVAL 7 DAY), %s, %s
+    FROM Ingredient i
+    WHERE i.ingredient_id = %s
+    ON DUPLICATE KEY UPDATE
+        quantity = Fridge_Ingredient.quantity + VALUES(quantity),
+        unit = COALESCE(VALUES(unit), Fridge_Ingredient.unit)
+''')
+
+# The ingredients of a JSON array of {"ingredient_id", ...} items that exist,
+# which ADD_STOCK_BULK stocks; shared locks keep them until it has
+KNOWN_INGREDIENTS_BULK = register('fridge.known_ingredients_bulk', '''
+    SELECT DISTINCT i.ingredient_id
+    FROM Ingredient i
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (ingredient_id INT PATH '$.ingredient_id')) AS items
+        ON items.ingredient_id = i.ingredient_id
+    FOR SHARE OF i
+''')
+
+# Items are a JSON array of {"ingredient_id", "quantity", "expires_on"} objects,
+# one per lot; all of them are upserted by this one statement
+ADD_STOCK_BULK = register('fridge.add_stock_bulk', '''
+    INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, expires_on, quantity)
+    SELECT %s, i.ingredient_id,
+           COALESCE(items.expires_on, i.expiration_date, CURDATE() + INTERVAL 7 DAY), items.quantity
+    FROM JSON_TABLE(%s, '$[*]' COLUMNS (
+        ingredient_id INT PATH '$.ingredient_id',
+        quantity DECIMAL(10,2) PATH '$.quantity',
+        expires_on DATE PATH '$.expires_on'
+    )) AS items
+    JOIN Ingredient i ON i.ingredient_id = items.ingredient_id
+    ON DUPLICATE KEY UPDATE
+        quantity = Fridge_Ingredient.quantity + VALUES(quantity)
+''')
+
+# Consuming computes each lot's share from running totals over the lots, so it
+# has to see them as they are: lock them first with one of these.
+LOCK_LOTS = register('fridge.lock_lots', '''
+    SELECT ingredient_id FROM Fridge_Ingredient
+    WHERE fridge_id = %s AND ingredient_id = %s
+    FOR UPDATE
+''')
+
+LOCK_LOTS_BULK = register('fridge.lock_lots_bulk', '''
+    SELECT fi.ingredient_id
+    FROM Fridge_Ingredient fi
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (ingredient_id INT PATH '$.ingredient_id')) AS items
+        ON items.ingredient_id = fi.ingredient_id
+    WHERE fi.fridge_id = %s
+    FOR UPDATE OF fi
+''')
+
+# Takes a quantity from the earliest lots first: before_lot is the stock in the
+# lots that expire earlier, so a lot gives up whatever the earlier ones couldn't
+# cover. Lots that earlier ones fully cover are left alone.
+CONSUME_STOCK = register('fridge.consume_stock', '''
+    UPDATE Fridge_Ingredient fi
+    JOIN (
+        SELECT fridge_id, ingredient_id, expires_on,
+               SUM(quantity) OVER (ORDER BY expires_on ROWS UNBOUNDED PRECEDING) - quantity AS before_lot
+        FROM Fridge_Ingredient
+        WHERE fridge_id = %s AND ingredient_id = %s
+    ) AS lots USING (fridge_id, ingredient_id, expires_on)
+    SET fi.quantity = GREATEST(fi.quantity - (%s - lots.before_lot), 0)
+    WHERE lots.before_lot < %s
+''')
+
+# Items are a JSON array of {"ingredient_id", "quantity"} objects, one per ingredient
+CONSUME_STOCK_BULK = register('fridge.consume_stock_bulk', '''
+    UPDATE Fridge_Ingredient fi
+    JOIN (
+        SELECT f.fridge_id, f.ingredient_id, f.expires_on, items.quantity AS wanted,
+               SUM(f.quantity) OVER (
+                   PARTITION BY f.ingredient_id ORDER BY f.expires_on ROWS UNBOUNDED PRECEDING
+               ) - f.quantity AS before_lot
+        FROM Fridge_Ingredient f
+        JOIN JSON_TABLE(%s, '$[*]' COLUMNS (
+            ingredient_id INT PATH '$.ingredient_id',
+            quantity DECIMAL(10,2) PATH '$.quantity'
+        )) AS items ON items.ingredient_id = f.ingredient_id
+        WHERE f.fridge_id = %s
+    ) AS lots USING (fridge_id, ingredient_id, expires_on)
+    SET fi.quantity = GREATEST(fi.quantity - (lots.wanted - lots.before_lot), 0)
+    WHERE lots.before_lot < lots.wanted
+''')
+
+DELETE_DEPLETED = register('fridge.delete_depleted', '''
+    DELETE FROM Fridge_Ingredient WHERE fridge_id = %s AND ingredient_id = %s AND quantity <= 0
+''')
+
+# Only touches the consumed rows, so it doesn't lock the rest of the fridge
+DELETE_DEPLETED_BULK = register('fridge.delete_depleted_bulk', '''
+    DELETE fi FROM Fridge_Ingredient fi
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (ingredient_id INT PATH '$.ingredient_id')) AS items
+        ON items.ingredient_id = fi.ingredient_id
+    WHERE fi.fridge_id = %s AND fi.quantity <= 0
+''')
+
+# A client's lots changed in a range of change_ids (GET /fridge/changes), in
+# the shape of INVENTORY_FOR_CLIENT; deleted is set for lots that are gone.
+# Params: client id and the range's bounds.
+CHANGES_FOR_CLIENT = register('fridge.changes_for_client', '''
+    SELECT ch.scope_id AS fridge_id, ch.row_id AS ingredient_id, i.name, fi.quantity, fi.unit,
+           ch.row_date AS expiration_date, fi.is_expired, fi.fridge_id IS NULL AS deleted
+    FROM (''' + CHANGED_ROWS_TEMPLATE.format(
+        table='Fridge_Ingredient', scope='= (SELECT fridge_id FROM Client WHERE client_id = %s)'
+    ) + ''') AS ch
+    LEFT JOIN Fridge_Ingredient fi
+        ON fi.fridge_id = ch.scope_id AND fi.ingredient_id = ch.row_id AND fi.expires_on = ch.row_date
+    LEFT JOIN Ingredient i ON i.ingredient_id = fi.ingredient_id
+''')
@@ -0,0 +1,55 @@
+#------------------------------------------------------------
+# Statements used by the ingredients blueprint
+#------------------------------------------------------------
+from backend.queries import register, register_partial_update
+from backend.queries.change_queries import CHANGED_ROWS_TEMPLATE
+
+ALL_INGREDIENTS = register('ingredients.all', '''
+    SELECT * FROM Ingredient
+''')
+
+INGREDIENT_BY_ID = register('ingredients.by_id', '''
+    SELECT * FROM Ingredient WHERE ingredient_id = %s
+''')
+
+MACROS_FOR_INGREDIENT = register('ingredients.macros_for_ingredient', '''
+    SELECT m.*
+    FROM Macronutrients m
+    WHERE m.ingredient_id = %s
+''')
+
+INSERT_INGREDIENT = register('ingredients.insert', '''
+    INSERT INTO Ingredient (name, expiration_date) VALUES (%s, %s)
+''')
+
+INSERT_MACROS = register('ingredients.insert_macros', '''
+    INSERT INTO Macronutrients (
+        ingredient_id, protein, fat, fiber, vitamin, sodium, calories, carbs
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+''')
+
+UPDATE_INGREDIENT = register_partial_update(
+    'ingredients.update', 'Ingredient', ('name', 'expiration_date'), 'ingredient_id'
+)
+
+# Rows that refer to the ingredient go with it (ON DELETE CASCADE / SET NULL in
+# the schema), so one statement removes everything
+DELETE_INGREDIENT = register('ingredients.delete', '''
+    DELETE FROM Ingredient WHERE ingredient_id = %s
+''')
+
+# Takes the ingredient ids as one JSON array (e.g. '[4, 8, 15]')
+DELETE_INGREDIENTS = register('ingredients.delete_many', '''
+    DELETE i FROM Ingredient i
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (ingredient_id INT PATH '$')) AS ids
+        ON ids.ingredient_id = i.ingredient_id
+''')
+
+# Ingredients changed in a range of change_ids (GET /ingredients/changes), in
+# the shape of ALL_INGREDIENTS; deleted is set for ingredients that are gone
+CHANGES = register('ingredients.changes', '''
+    SELECT ch.row_id AS ingredient_id, i.expiration_date, i.name, i.version,
+           i.ingredient_id IS NULL AS deleted
+    FROM (''' + CHANGED_ROWS_TEMPLATE.format(table='Ingredient', scope='IS NULL') + ''') AS ch
+    LEFT JOIN Ingredient i ON i.ingredient_id = ch.row_id
+''')
@@ -0,0 +1,70 @@
+#------------------------------------------------------------
+# Statements used by the job scheduler and the jobs blueprint
+#
+# A run is claimed by inserting its (job_name, scheduled_for) row:
+# the unique key lets exactly one replica's insert through, and a
+# duplicate is a no-op with a rowcount of 0 rather than an error.
+#------------------------------------------------------------
+from backend.queries import register
+
+# Days of history the /jobs/scheduled statistics cover, and kept at all
+STATS_DAYS = 7
+HISTORY_DAYS = 30
+
+CLAIM_RUN = register('jobs.claim_run', '''
+    INSERT INTO Job_Run (job_name, scheduled_for, host)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE run_id = run_id
+''')
+
+FINISH_RUN = register('jobs.finish_run', '''
+    UPDATE Job_Run
+       SET status = %s,
+           finished_at = CURRENT_TIMESTAMP(3),
+           duration_ms = %s,
+           row_count = %s,
+           error = %s
+     WHERE run_id = %s
+''')
+
+# Per job: the latest run and duration/row count statistics over recent runs
+SCHEDULED_STATS = register('jobs.scheduled_stats', f'''
+    SELECT job_name, runs, failures, avg_duration_ms, max_duration_ms, total_rows,
+           scheduled_for AS last_scheduled_for, host AS last_host, status AS last_status,
+           duration_ms AS last_duration_ms, row_count AS last_row_count, error AS last_error
+    FROM (
+        SELECT jr.*,
+               ROW_NUMBER() OVER (PARTITION BY job_name ORDER BY scheduled_for DESC) AS recency,
+               COUNT(*) OVER (PARTITION BY job_name) AS runs,
+               SUM(status = 'failed') OVER (PARTITION BY job_name) AS failures,
+               AVG(duration_ms) OVER (PARTITION BY job_name) AS avg_duration_ms,
+               MAX(duration_ms) OVER (PARTITION BY job_name) AS max_duration_ms,
+               SUM(row_count) OVER (PARTITION BY job_name) AS total_rows
+        FROM Job_Run jr
+        WHERE jr.scheduled_for >= NOW() - INTERVAL {STATS_DAYS} DAY
+    ) AS recent
+    WHERE recency = 1
+''')
+
+RUNS_TEMPLATE = '''
+    SELECT run_id, job_name, scheduled_for, host, status, started_at, finished_at,
+           duration_ms, row_count, error
+    FROM Job_Run
+    {where}
+    ORDER BY scheduled_for DESC
+    LIMIT %s
+'''
+
+RUN_BY_ID = register('jobs.run_by_id', RUNS_TEMPLATE.format(where='''
+    WHERE run_id = %s
+'''))
+
+RECENT_RUNS = register('jobs.recent_runs', RUNS_TEMPLATE.format(where=''))
+
+RECENT_RUNS_FOR_JOB = register('jobs.recent_runs_for_job', RUNS_TEMPLATE.format(where='''
+    WHERE job_name = %s
+'''))
+
+PRUNE_RUNS = register('jobs.prune_runs', f'''
+    DELETE FROM Job_Run WHERE scheduled_for < NOW() - INTERVAL {HISTORY_DAYS} DAY
+''')
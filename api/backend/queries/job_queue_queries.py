@@ -0,0 +1,72 @@
+#------------------------------------------------------------
+# Statements used by the job queue (POST/GET /jobs and the workers)
+#
+# Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+# number of them can poll the queue at once: each locks the oldest
+# queued job no other worker has locked, marks it running and
+# commits, without waiting on the others.
+#------------------------------------------------------------
+from backend.queries import register
+
+ENQUEUE = register('job_queue.enqueue', '''
+    INSERT INTO Job_Queue (job_type, params) VALUES (%s, %s)
+''')
+
+JOB_BY_ID = register('job_queue.by_id', '''
+    SELECT job_id, job_type, status, attempts, worker, progress_done, progress_total,
+           result, error, created_at, started_at, heartbeat_at, finished_at
+    FROM Job_Queue
+    WHERE job_id = %s
+''')
+
+CLAIM_NEXT = register('job_queue.claim_next', '''
+    SELECT job_id, job_type, params
+    FROM Job_Queue
+    WHERE status = 'queued'
+    ORDER BY job_id
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+''')
+
+START = register('job_queue.start', '''
+    UPDATE Job_Queue
+       SET status = 'running',
+           worker = %s,
+           attempts = attempts + 1,
+           started_at = CURRENT_TIMESTAMP(3),
+           heartbeat_at = CURRENT_TIMESTAMP(3)
+     WHERE job_id = %s
+''')
+
+# Params: done, total (NULL keeps the current total), job id
+PROGRESS = register('job_queue.progress', '''
+    UPDATE Job_Queue
+       SET progress_done = %s,
+           progress_total = COALESCE(%s, progress_total),
+           heartbeat_at = CURRENT_TIMESTAMP(3)
+     WHERE job_id = %s
+''')
+
+HEARTBEAT = register('job_queue.heartbeat', '''
+    UPDATE Job_Queue SET heartbeat_at = CURRENT_TIMESTAMP(3) WHERE job_id = %s
+''')
+
+FINISH = register('job_queue.finish', '''
+    UPDATE Job_Queue
+       SET status = %s,
+           result = %s,
+           error = %s,
+           finished_at = CURRENT_TIMESTAMP(3)
+     WHERE job_id = %s
+''')
+
+# Jobs whose worker stopped sending heartbeats go back in the queue, or fail
+# once they used up their attempts. Params: max attempts (twice), stale seconds.
+REQUEUE_STALE = register('job_queue.requeue_stale', '''
+    UPDATE Job_Queue
+       SET status = IF(attempts >= %s, 'failed', 'queued'),
+           error = IF(attempts >= %s, 'The worker running the job stopped responding', error),
+           finished_at = IF(status = 'failed', CURRENT_TIMESTAMP(3), NULL)
+     WHERE status = 'running'
+       AND heartbeat_at < CURRENT_TIMESTAMP(3) - INTERVAL %s SECOND
+''')
@@ -0,0 +1,129 @@
+#------------------------------------------------------------
+# Statements used by the leftovers blueprint
+#
+# A leftover's status is evaluated from its expires_on, with the
+# thresholds the Leftovers page uses: Expired on or after the expiry
+# day (or once marked expired), Eat Soon the day before, Good
+# otherwise. The listings compute status and days_left in SQL and
+# each status filter is one or two ranges on the expires_on and
+# (is_expired, expires_on) indexes: expired leftovers are those past
+# their expiry day plus those marked expired before it.
+#------------------------------------------------------------
+from backend.queries import register, register_partial_update
+from backend.queries.change_queries import CHANGED_ROWS_TEMPLATE
+
+# Days a leftover keeps when no expiry is given (matches the column default)
+SHELF_LIFE_DAYS = 5
+
+LISTING_SELECT = '''
+    SELECT l.*, r.name as recipe_name,
+           DATEDIFF(l.expires_on, CURDATE()) AS days_left,
+           CASE
+               WHEN l.is_expired OR l.expires_on <= CURDATE() THEN 'Expired'
+               WHEN l.expires_on <= CURDATE() + INTERVAL 1 DAY THEN 'Eat Soon'
+               ELSE 'Good'
+           END AS status
+    FROM Leftover l
+    JOIN Recipe r ON l.recipe_id = r.recipe_id
+'''
+
+LISTING_TEMPLATE = LISTING_SELECT + '''
+    {where}
+    ORDER BY l.expires_on
+'''
+
+FOR_RECIPE = register('leftovers.for_recipe', LISTING_TEMPLATE.format(where='''
+    WHERE l.recipe_id = %s
+'''))
+
+ALL_LEFTOVERS = register('leftovers.all', LISTING_TEMPLATE.format(where=''))
+
+# ?status= filters, keyed by the value the API accepts
+BY_STATUS = {
+    'expired': register('leftovers.expired', '''
+    (''' + LISTING_SELECT + '''
+    WHERE l.expires_on <= CURDATE())
+    UNION ALL
+    (''' + LISTING_SELECT + '''
+    WHERE l.is_expired = TRUE AND l.expires_on > CURDATE())
+    ORDER BY expires_on
+    '''),
+    'eat_soon': register('leftovers.eat_soon', LISTING_TEMPLATE.format(where='''
+    WHERE l.expires_on = CURDATE() + INTERVAL 1 DAY AND l.is_expired = FALSE
+    ''')),
+    'good': register('leftovers.good', LISTING_TEMPLATE.format(where='''
+    WHERE l.expires_on > CURDATE() + INTERVAL 1 DAY AND l.is_expired = FALSE
+    ''')),
+}
+
+# Not yet expired, but will be within the given number of days
+EXPIRING_WITHIN = register('leftovers.expiring_within', LISTING_TEMPLATE.format(where='''
+    WHERE l.expires_on > CURDATE() AND l.expires_on <= CURDATE() + INTERVAL %s DAY
+      AND l.is_expired = FALSE
+'''))
+
+LEFTOVER_BY_ID = register('leftovers.by_id', '''
+    SELECT l.*, r.name as recipe_name, r.instructions,
+           DATEDIFF(l.expires_on, CURDATE()) AS days_left
+    FROM Leftover l
+    JOIN Recipe r ON l.recipe_id = r.recipe_id
+    WHERE l.leftover_id = %s
+''')
+
+RECIPE_EXISTS = register('leftovers.recipe_exists', '''
+    SELECT 1 FROM Recipe WHERE recipe_id = %s
+''')
+
+INSERT_LEFTOVER = register('leftovers.insert', f'''
+    INSERT INTO Leftover (recipe_id, quantity, is_expired, expires_on)
+    VALUES (%s, %s, FALSE, COALESCE(%s, CURDATE() + INTERVAL {SHELF_LIFE_DAYS} DAY))
+''')
+
+UPDATE_LEFTOVER = register_partial_update(
+    'leftovers.update', 'Leftover', ('quantity', 'is_expired', 'expires_on'), 'leftover_id'
+)
+
+DELETE_LEFTOVER = register('leftovers.delete', '''
+    DELETE FROM Leftover WHERE leftover_id = %s
+''')
+
+# Removing the expired leftovers takes both: those past their expiry day, and
+# those marked expired before it
+DELETE_EXPIRED = register('leftovers.delete_expired', '''
+    DELETE FROM Leftover WHERE expires_on <= CURDATE()
+''')
+
+DELETE_MARKED_EXPIRED = register('leftovers.delete_marked_expired', '''
+    DELETE FROM Leftover WHERE is_expired = TRUE AND expires_on > CURDATE()
+''')
+
+# Days expired leftovers are kept, and shown as expired, before the scheduled
+# sweep deletes them (DELETE /leftovers/expired deletes them right away)
+EXPIRED_GRACE_DAYS = 3
+
+DELETE_EXPIRED_AFTER_GRACE = register('leftovers.delete_expired_after_grace', f'''
+    DELETE FROM Leftover WHERE expires_on <= CURDATE() - INTERVAL {EXPIRED_GRACE_DAYS} DAY
+''')
+
+MARK_EXPIRED = register('leftovers.mark_expired', '''
+    UPDATE Leftover
+    SET is_expired = TRUE, version = version + 1
+    WHERE expires_on <= CURDATE() AND is_expired = FALSE
+''')
+
+# Leftovers changed in a range of change_ids (GET /leftovers/changes), in the
+# shape of ALL_LEFTOVERS; deleted is set for leftovers that are gone
+CHANGES = register('leftovers.changes', '''
+    SELECT ch.row_id AS leftover_id, l.recipe_id, l.quantity, l.is_expired, l.created_at,
+           l.expires_on, l.version, r.name as recipe_name,
+           DATEDIFF(l.expires_on, CURDATE()) AS days_left,
+           CASE
+               WHEN l.is_expired OR l.expires_on <= CURDATE() THEN 'Expired'
+               WHEN l.expires_on <= CURDATE() + INTERVAL 1 DAY THEN 'Eat Soon'
+               ELSE 'Good'
+           END AS status,
+           l.leftover_id IS NULL AS deleted
+    FROM (''' + CHANGED_ROWS_TEMPLATE.format(table='Leftover', scope='IS NULL') + ''') AS ch
+    LEFT JOIN Leftover l ON l.leftover_id = ch.row_id
+    LEFT JOIN Recipe r ON r.recipe_id = l.recipe_id
+''')
@@ -0,0 +1,49 @@
+#------------------------------------------------------------
+# Statements used by the logs blueprint
+#------------------------------------------------------------
+from backend.queries import register
+
+SCANS_FOR_CLIENT = register('logs.scans_for_client', '''
+    SELECT fsl.*, i.name as ingredient_name
+    FROM Food_Scan_Log fsl
+    JOIN Ingredient i ON fsl.ingredient_id = i.ingredient_id
+    JOIN Client c ON c.log_id = fsl.log_id
+    WHERE c.client_id = %s
+    ORDER BY fsl.timestamp DESC
+''')
+
+ALL_SCANS = register('logs.all_scans', '''
+    SELECT fsl.*, i.name as ingredient_name
+    FROM Food_Scan_Log fsl
+    JOIN Ingredient i ON fsl.ingredient_id = i.ingredient_id
+    ORDER BY fsl.timestamp DESC
+''')
+
+INSERT_SCAN = register('logs.insert_scan', '''
+    INSERT INTO Food_Scan_Log (ingredient_id, status, timestamp) VALUES (%s, %s, %s)
+''')
+
+INSERT_ERROR = register('logs.insert_error', '''
+    INSERT INTO Error_Log (client_id, log_id, message, timestamp) VALUES (%s, %s, %s, %s)
+''')
+
+ALL_ERRORS = register('logs.all_errors', '''
+    SELECT el.*, fsl.status as scan_status, i.name as ingredient_name
+    FROM Error_Log el
+    JOIN Food_Scan_Log fsl ON el.log_id = fsl.log_id
+    JOIN Ingredient i ON fsl.ingredient_id = i.ingredient_id
+    ORDER BY el.timestamp DESC
+''')
+
+NUTRITION_FOR_CLIENT = register('logs.nutrition_for_client', '''
+    SELECT nt.*
+    FROM Nutrition_Tracking nt
+    WHERE nt.client_id = %s
+    ORDER BY nt.tracking_id DESC
+''')
+
+INSERT_NUTRITION = register('logs.insert_nutrition', '''
+    INSERT INTO Nutrition_Tracking
+    (client_id, protein, fat, fiber, sodium, vitamins, calories, carbs)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+''')
@@ -0,0 +1,68 @@
+#------------------------------------------------------------
+# Statements used by the macronutrients blueprint
+#------------------------------------------------------------
+from backend.queries import register, register_partial_update
+from backend.queries.change_queries import CHANGED_ROWS_TEMPLATE
+
+# Macronutrients is unique on ingredient_id, so this is one index probe for at most one row
+MACROS_FOR_INGREDIENT = register('macros.macros_for_ingredient', '''
+    SELECT *
+    FROM Macronutrients
+    WHERE ingredient_id = %s
+''')
+
+ALL_MACROS = register('macros.all', '''
+    SELECT m.*, i.name as ingredient_name
+    FROM Macronutrients m
+    JOIN Ingredient i ON m.ingredient_id = i.ingredient_id
+''')
+
+UPDATE_MACROS = register_partial_update(
+    'macros.update', 'Macronutrients',
+    ('protein', 'fat', 'fiber', 'vitamin', 'sodium', 'calories', 'carbs'), 'macro_id'
+)
+
+# Takes the macro ids as one JSON array; locks the rows a bulk update changes
+LOCK_MACROS_BULK = register('macros.lock_many', '''
+    SELECT m.macro_id, m.version
+    FROM Macronutrients m
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (macro_id INT PATH '$')) AS ids
+        ON ids.macro_id = m.macro_id
+    FOR UPDATE OF m
+''')
+
+# Takes the items as one JSON array of {macro_id, protein, ...} objects, so a
+# whole chunk of rows is updated by one statement; fields an item leaves out
+# (or sets to null) keep their value
+UPDATE_MACROS_BULK = register('macros.update_many', '''
+    UPDATE Macronutrients m
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (
+        macro_id INT PATH '$.macro_id',
+        protein DECIMAL(8,2) PATH '$.protein',
+        fat DECIMAL(8,2) PATH '$.fat',
+        fiber DECIMAL(8,2) PATH '$.fiber',
+        vitamin DECIMAL(8,2) PATH '$.vitamin',
+        sodium DECIMAL(8,2) PATH '$.sodium',
+        calories INT PATH '$.calories',
+        carbs DECIMAL(8,2) PATH '$.carbs'
+    )) AS items ON items.macro_id = m.macro_id
+    SET m.protein = COALESCE(items.protein, m.protein),
+        m.fat = COALESCE(items.fat, m.fat),
+        m.fiber = COALESCE(items.fiber, m.fiber),
+        m.vitamin = COALESCE(items.vitamin, m.vitamin),
+        m.sodium = COALESCE(items.sodium, m.sodium),
+        m.calories = COALESCE(items.calories, m.calories),
+        m.carbs = COALESCE(items.carbs, m.carbs),
+        m.version = m.version + 1
+''')
+
+# Macronutrients rows changed in a range of change_ids (GET /macronutrients/changes),
+# in the shape of ALL_MACROS; deleted is set for rows that are gone
+CHANGES = register('macros.changes', '''
+    SELECT ch.row_id AS macro_id, m.ingredient_id, m.protein, m.fat, m.fiber, m.vitamin,
+           m.sodium, m.calories, m.carbs, m.version, i.name AS ingredient_name,
+           m.macro_id IS NULL AS deleted
+    FROM (''' + CHANGED_ROWS_TEMPLATE.format(table='Macronutrients', scope='IS NULL') + ''') AS ch
+    LEFT JOIN Macronutrients m ON m.macro_id = ch.row_id
+    LEFT JOIN Ingredient i ON i.ingredient_id = m.ingredient_id
+''')
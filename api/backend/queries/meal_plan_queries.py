@@ -0,0 +1,150 @@
+#------------------------------------------------------------
+# Statements used by the meal plans blueprint
+#------------------------------------------------------------
+from backend.queries import register, register_partial_update
+
+FOR_CLIENT = register('meal_plans.for_client', '''
+    SELECT mp.meal_id, mp.pc_id, mp.recipe_id, mp.quantity, r.name AS recipe_name
+    FROM Meal_Plan mp
+    JOIN Client c ON mp.pc_id = c.pc_id
+    JOIN Recipe r ON mp.recipe_id = r.recipe_id
+    WHERE c.client_id = %s
+''')
+
+ALL_MEAL_PLANS = register('meal_plans.all', '''
+    SELECT mp.meal_id, mp.pc_id, mp.recipe_id, mp.quantity, r.name AS recipe_name
+    FROM Meal_Plan mp
+    JOIN Recipe r ON mp.recipe_id = r.recipe_id
+''')
+
+MEAL_PLAN_BY_ID = register('meal_plans.by_id', '''
+    SELECT mp.meal_id, mp.pc_id, mp.recipe_id, mp.quantity, r.name AS recipe_name, r.instructions
+    FROM Meal_Plan mp
+    JOIN Recipe r ON mp.recipe_id = r.recipe_id
+    WHERE mp.meal_id = %s
+''')
+
+ALL_RECIPES = register('meal_plans.all_recipes', '''
+    SELECT * FROM Recipe
+''')
+
+# Served from the materialized Recipe_Macros rollup, one row per recipe
+RECIPES_WITH_MACROS = register('meal_plans.recipes_with_macros', '''
+    SELECT r.*,
+           rm.protein, rm.fat, rm.fiber, rm.vitamin, rm.sodium, rm.calories, rm.carbs,
+           ROUND(rm.protein / r.servings, 2) AS protein_per_serving,
+           ROUND(rm.fat / r.servings, 2) AS fat_per_serving,
+           ROUND(rm.fiber / r.servings, 2) AS fiber_per_serving,
+           ROUND(rm.vitamin / r.servings, 2) AS vitamin_per_serving,
+           ROUND(rm.sodium / r.servings, 2) AS sodium_per_serving,
+           ROUND(rm.calories / r.servings, 2) AS calories_per_serving,
+           ROUND(rm.carbs / r.servings, 2) AS carbs_per_serving
+    FROM Recipe r
+    LEFT JOIN Recipe_Macros rm ON rm.recipe_id = r.recipe_id
+''')
+
+# Per-serving macros come from the Recipe_Macros rollup; cost is estimated from
+# the average unit price each ingredient was bought at on shopping lists. Recipes
+# with an ingredient whose name matches the restriction pattern (a REGEXP such as
+# 'peanuts|egg', or NULL for no restrictions) are left out.
+OPTIMIZER_CANDIDATES = register('meal_plans.optimizer_candidates', '''
+    SELECT r.recipe_id, r.name,
+           rm.protein / r.servings AS protein,
+           rm.fat / r.servings AS fat,
+           rm.fiber / r.servings AS fiber,
+           rm.vitamin / r.servings AS vitamin,
+           rm.sodium / r.servings AS sodium,
+           rm.calories / r.servings AS calories,
+           rm.carbs / r.servings AS carbs,
+           COALESCE(rc.cost, 0) / r.servings AS cost
+    FROM Recipe r
+    JOIN Recipe_Macros rm ON rm.recipe_id = r.recipe_id
+    LEFT JOIN (
+        SELECT ri.recipe_id, SUM(ri.quantity * ic.unit_cost) AS cost
+        FROM Recipe_Ingredient ri
+        JOIN (
+            SELECT ingredient_id, AVG(cost / quantity) AS unit_cost
+            FROM ShoppingList_Ingredient
+            WHERE quantity > 0 AND cost IS NOT NULL
+            GROUP BY ingredient_id
+        ) ic ON ic.ingredient_id = ri.ingredient_id
+        GROUP BY ri.recipe_id
+    ) rc ON rc.recipe_id = r.recipe_id
+    WHERE r.recipe_id NOT IN (
+        SELECT ri.recipe_id
+        FROM Recipe_Ingredient ri
+        JOIN Ingredient i ON ri.ingredient_id = i.ingredient_id
+        WHERE i.name REGEXP %s
+    )
+''')
+
+INSERT_MEAL_PLAN = register('meal_plans.insert', '''
+    INSERT INTO Meal_Plan (pc_id, recipe_id, quantity) VALUES (%s, %s, %s)
+''')
+
+UPDATE_MEAL_PLAN = register_partial_update('meal_plans.update', 'Meal_Plan', ('quantity',), 'meal_id')
+
+DELETE_MEAL_PLAN = register('meal_plans.delete', '''
+    DELETE FROM Meal_Plan WHERE meal_id = %s
+''')
+
+DELETE_FOR_RECIPE = register('meal_plans.delete_for_recipe', '''
+    DELETE FROM Meal_Plan WHERE recipe_id = %s
+''')
+
+CONSTRAINTS_FOR_PLAN = register('meal_plans.constraints_for_plan', '''
+    SELECT budget, dietary_restrictions, personal_diet
+    FROM Personal_Constraints
+    WHERE pc_id = %s
+''')
+
+# Recompute Recipe_Macros for the recipes selected by {recipes}
+REFRESH_TEMPLATE = '''
+    REPLACE INTO Recipe_Macros (recipe_id, protein, fat, fiber, vitamin, sodium, calories, carbs)
+    SELECT r.recipe_id,
+           COALESCE(SUM(ri.quantity * m.protein), 0),
+           COALESCE(SUM(ri.quantity * m.fat), 0),
+           COALESCE(SUM(ri.quantity * m.fiber), 0),
+           COALESCE(SUM(ri.quantity * m.vitamin), 0),
+           COALESCE(SUM(ri.quantity * m.sodium), 0),
+           COALESCE(SUM(ri.quantity * m.calories), 0),
+           COALESCE(SUM(ri.quantity * m.carbs), 0)
+    FROM Recipe r
+    LEFT JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+    LEFT JOIN Macronutrients m ON m.ingredient_id = ri.ingredient_id
+    WHERE r.recipe_id IN ({recipes})
+    GROUP BY r.recipe_id
+'''
+
+# Takes the recipe ids as one JSON array (e.g. '[1, 5, 9]') so any number of
+# recipes goes through the same statement
+REFRESH_RECIPE_MACROS = register('meal_plans.refresh_recipe_macros', REFRESH_TEMPLATE.format(recipes='''
+        SELECT ids.recipe_id
+        FROM JSON_TABLE(%s, '$[*]' COLUMNS (recipe_id INT PATH '$')) AS ids
+    '''))
+
+REFRESH_MACROS_FOR_MACRO = register('meal_plans.refresh_macros_for_macro', REFRESH_TEMPLATE.format(recipes='''
+        SELECT ri.recipe_id
+        FROM Recipe_Ingredient ri
+        JOIN Macronutrients m ON m.ingredient_id = ri.ingredient_id
+        WHERE m.macro_id = %s
+    '''))
+
+# Takes the macro ids as one JSON array
+REFRESH_MACROS_FOR_MACROS = register('meal_plans.refresh_macros_for_macros', REFRESH_TEMPLATE.format(recipes='''
+        SELECT ri.recipe_id
+        FROM JSON_TABLE(%s, '$[*]' COLUMNS (macro_id INT PATH '$')) AS ids
+        JOIN Macronutrients m ON m.macro_id = ids.macro_id
+        JOIN Recipe_Ingredient ri ON ri.ingredient_id = m.ingredient_id
+    '''))
+
+RECIPES_USING_INGREDIENT = register('meal_plans.recipes_using_ingredient', '''
+    SELECT recipe_id FROM Recipe_Ingredient WHERE ingredient_id = %s
+''')
+
+# Takes the ingredient ids as one JSON array
+RECIPES_USING_INGREDIENTS = register('meal_plans.recipes_using_ingredients', '''
+    SELECT DISTINCT ri.recipe_id
+    FROM JSON_TABLE(%s, '$[*]' COLUMNS (ingredient_id INT PATH '$')) AS ids
+    JOIN Recipe_Ingredient ri ON ri.ingredient_id = ids.ingredient_id
+''')
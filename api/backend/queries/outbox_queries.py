@@ -0,0 +1,43 @@
+#------------------------------------------------------------
+# Statements used by the outbox (backend/outbox)
+#
+# Mutating routes insert one Outbox row per change in the same
+# transaction as the change; the relay reads the rows after the
+# last event_id it dispatched, plus any lower ids that were still
+# uncommitted when it passed them (see relay.py).
+#------------------------------------------------------------
+from backend.queries import register
+
+# How long events are kept. The relay only ever reads recent ones, so this is
+# just how far back they can be inspected.
+RETENTION_DAYS = 1
+
+INSERT = register('outbox.insert', '''
+    INSERT INTO Outbox (topic, payload) VALUES (%s, %s)
+''')
+
+LATEST = register('outbox.latest', '''
+    SELECT COALESCE(MAX(event_id), 0) AS latest FROM Outbox
+''')
+
+# Params: the last event_id dispatched, the most events to return
+AFTER = register('outbox.after', '''
+    SELECT event_id, topic, payload, created_at
+    FROM Outbox
+    WHERE event_id > %s
+    ORDER BY event_id
+    LIMIT %s
+''')
+
+# Params: a JSON array of event_ids
+BY_IDS = register('outbox.by_ids', '''
+    SELECT o.event_id, o.topic, o.payload, o.created_at
+    FROM Outbox o
+    JOIN JSON_TABLE(%s, '$[*]' COLUMNS (event_id BIGINT PATH '$')) AS ids
+      ON ids.event_id = o.event_id
+    ORDER BY o.event_id
+''')
+
+PRUNE = register('outbox.prune', f'''
+    DELETE FROM Outbox WHERE created_at < NOW() - INTERVAL {RETENTION_DAYS} DAY
+''')
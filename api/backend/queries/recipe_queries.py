@@ -0,0 +1,68 @@
+#------------------------------------------------------------
+# Statements used by the recipes blueprint
+#
+# Cooking scales each Recipe_Ingredient quantity (which is for the
+# whole recipe) by servings / Recipe.servings; a NULL servings
+# parameter cooks the recipe as written. Stock is summed over a
+# fridge's lots of an ingredient and taken earliest expiry first.
+#------------------------------------------------------------
+from backend.queries import register
+from backend.queries.change_queries import CHANGED_ROWS_TEMPLATE
+
+# Doubles as the recipe existence check: inserts nothing for an unknown recipe
+INSERT_COOKED_LEFTOVER = register('recipes.insert_cooked_leftover', '''
+    INSERT INTO Leftover (recipe_id, quantity, is_expired)
+    SELECT recipe_id, COALESCE(%s, servings), FALSE
+    FROM Recipe
+    WHERE recipe_id = %s
+''')
+
+# Recipe ingredients the fridge doesn't hold enough of across its lots. Locks
+# the lots so the stock can't change between this check and the decrement.
+COOK_SHORTAGES = register('recipes.cook_shortages', '''
+    SELECT ri.ingredient_id, i.name,
+           ri.quantity * COALESCE(%s, r.servings) / r.servings AS needed,
+           COALESCE(SUM(fi.quantity), 0) AS available
+    FROM Recipe r
+    JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+    JOIN Ingredient i ON i.ingredient_id = ri.ingredient_id
+    LEFT JOIN Fridge_Ingredient fi ON fi.fridge_id = %s AND fi.ingredient_id = ri.ingredient_id
+    WHERE r.recipe_id = %s
+    GROUP BY ri.ingredient_id, i.name, needed
+    HAVING available < needed
+    FOR UPDATE OF fi
+''')
+
+# Decrements every ingredient of the recipe in one statement, taking from the
+# earliest expiring lots first (see fridge_queries.CONSUME_STOCK)
+CONSUME_FOR_RECIPE = register('recipes.consume_for_recipe', '''
+    UPDATE Fridge_Ingredient fi
+    JOIN (
+        SELECT f.fridge_id, f.ingredient_id, f.expires_on,
+               ri.quantity * COALESCE(%s, r.servings) / r.servings AS wanted,
+               SUM(f.quantity) OVER (
+                   PARTITION BY f.ingredient_id ORDER BY f.expires_on ROWS UNBOUNDED PRECEDING
+               ) - f.quantity AS before_lot
+        FROM Recipe r
+        JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+        JOIN Fridge_Ingredient f ON f.fridge_id = %s AND f.ingredient_id = ri.ingredient_id
+        WHERE r.recipe_id = %s
+    ) AS lots USING (fridge_id, ingredient_id, expires_on)
+    SET fi.quantity = GREATEST(fi.quantity - (lots.wanted - lots.before_lot), 0)
+    WHERE lots.before_lot < lots.wanted
+''')
+
+DELETE_DEPLETED_FOR_RECIPE = register('recipes.delete_depleted_for_recipe', '''
+    DELETE fi FROM Fridge_Ingredient fi
+    JOIN Recipe_Ingredient ri ON ri.ingredient_id = fi.ingredient_id
+    WHERE fi.fridge_id = %s AND ri.recipe_id = %s AND fi.quantity <= 0
+''')
+
+# Recipes changed in a range of change_ids (GET /recipes/changes), in the shape
+# of meal_plan_queries.ALL_RECIPES; deleted is set for recipes that are gone
+CHANGES = register('recipes.changes', '''
+    SELECT ch.row_id AS recipe_id, r.name, r.instructions, r.servings,
+           r.recipe_id IS NULL AS deleted
+    FROM (''' + CHANGED_ROWS_TEMPLATE.format(table='Recipe', scope='IS NULL') + ''') AS ch
+    LEFT JOIN Recipe r ON r.recipe_id = ch.row_id
+''')
@@ -0,0 +1,89 @@
+#------------------------------------------------------------
+# Statements used by the shopping lists blueprint
+#------------------------------------------------------------
+from backend.queries import register
+
+ITEMS_FOR_CLIENT = register('shopping_lists.items_for_client', '''
+    SELECT sli.list_id, sli.ingredient_id, i.name, sli.quantity, sli.unit, sli.cost
+    FROM Client c
+    JOIN ShoppingList_Ingredient sli ON sli.list_id = c.list_id
+    JOIN Ingredient i ON sli.ingredient_id = i.ingredient_id
+    WHERE c.client_id = %s
+    ORDER BY i.name
+''')
+
+# What each list is short of: each ingredient needed per list across all of the
+# client's Meal_Plan servings (Meal_Plan.quantity is servings and Recipe_Ingredient
+# quantities are for the whole recipe, as when cooking), minus the unexpired
+# stock in the client's fridge (summed over its lots). {client_filter} narrows
+# it to one client.
+SHORTFALL_TEMPLATE = '''
+    SELECT needed.list_id, needed.ingredient_id, needed.unit,
+           needed.quantity - COALESCE((
+               SELECT SUM(fi.quantity)
+               FROM Fridge_Ingredient fi
+               WHERE fi.fridge_id = needed.fridge_id
+                 AND fi.ingredient_id = needed.ingredient_id
+                 AND fi.is_expired = FALSE
+           ), 0) AS shortfall
+    FROM (
+        SELECT c.list_id, c.fridge_id, ri.ingredient_id,
+               SUM(mp.quantity * ri.quantity / r.servings) AS quantity,
+               MAX(ri.unit) AS unit
+        FROM Client c
+        JOIN Meal_Plan mp ON mp.pc_id = c.pc_id
+        JOIN Recipe r ON r.recipe_id = mp.recipe_id
+        JOIN Recipe_Ingredient ri ON ri.recipe_id = mp.recipe_id
+        WHERE c.list_id IS NOT NULL {client_filter}
+        GROUP BY c.list_id, c.fridge_id, ri.ingredient_id
+    ) AS needed
+'''
+
+# Generating a list is two set-based statements in one transaction: PRUNE drops
+# the rows an earlier generation added (generated, without a cost) that are no
+# longer short, then GENERATE upserts the current shortfall. Rows added by hand or
+# carrying a cost are never deleted, and an upsert onto one keeps it that way.
+# There is one registered statement of each for all clients and for one client
+# ({owner_filter} and {client_filter}, one parameter each).
+PRUNE_TEMPLATE = '''
+    DELETE sli
+    FROM ShoppingList_Ingredient sli
+    JOIN Client cl ON cl.list_id = sli.list_id
+    LEFT JOIN (
+        {shortfall}
+    ) AS missing
+        ON missing.list_id = sli.list_id
+       AND missing.ingredient_id = sli.ingredient_id
+       AND missing.shortfall > 0
+    WHERE sli.generated = TRUE
+      AND sli.cost IS NULL
+      AND missing.list_id IS NULL {owner_filter}
+'''
+
+GENERATE_TEMPLATE = '''
+    INSERT INTO ShoppingList_Ingredient (list_id, ingredient_id, quantity, unit, generated)
+    SELECT missing.list_id, missing.ingredient_id, missing.shortfall, missing.unit, TRUE
+    FROM (
+        {shortfall}
+    ) AS missing
+    WHERE missing.shortfall > 0
+    ON DUPLICATE KEY UPDATE
+        quantity = missing.shortfall,
+        unit = missing.unit
+'''
+
+PRUNE_ALL = register('shopping_lists.prune_all', PRUNE_TEMPLATE.format(
+    shortfall=SHORTFALL_TEMPLATE.format(client_filter=''), owner_filter=''
+))
+
+PRUNE_FOR_CLIENT = register('shopping_lists.prune_for_client', PRUNE_TEMPLATE.format(
+    shortfall=SHORTFALL_TEMPLATE.format(client_filter='AND c.client_id = %s'), owner_filter='AND cl.client_id = %s'
+))
+
+GENERATE_ALL = register('shopping_lists.generate_all', GENERATE_TEMPLATE.format(
+    shortfall=SHORTFALL_TEMPLATE.format(client_filter='')
+))
+
+GENERATE_FOR_CLIENT = register('shopping_lists.generate_for_client', GENERATE_TEMPLATE.format(
+    shortfall=SHORTFALL_TEMPLATE.format(client_filter='AND c.client_id = %s')
+))
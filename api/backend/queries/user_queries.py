@@ -0,0 +1,148 @@
+#------------------------------------------------------------
+# Statements used by the users blueprint
+#------------------------------------------------------------
+from backend.queries import register, register_partial_update
+
+ALL_USERS = register('users.all', '''
+    SELECT user_id, f_name, l_name, username, email FROM User
+''')
+
+USER_BY_ID = register('users.by_id', '''
+    SELECT user_id, f_name, l_name, username, email, version FROM User WHERE user_id = %s
+''')
+
+INSERT_USER = register('users.insert', '''
+    INSERT INTO User (f_name, l_name, username, password, email) VALUES (%s, %s, %s, %s, %s)
+''')
+
+UPDATE_USER = register_partial_update(
+    'users.update', 'User', ('f_name', 'l_name', 'email', 'username'), 'user_id'
+)
+
+UPDATE_CONSTRAINTS = register_partial_update(
+    'users.update_constraints', 'Personal_Constraints',
+    ('budget', 'dietary_restrictions', 'personal_diet', 'age_group'), 'pc_id'
+)
+
+INSERT_CONSTRAINTS = register('users.insert_constraints', '''
+    INSERT INTO Personal_Constraints
+    (budget, dietary_restrictions, personal_diet, age_group)
+    VALUES (%s, %s, %s, %s)
+''')
+
+SET_CLIENT_CONSTRAINTS = register('users.set_client_constraints', '''
+    UPDATE Client SET pc_id = %s WHERE client_id = %s
+''')
+
+STUDENT_AUTH = register('users.student_auth', '''
+    SELECT u.user_id, u.f_name as firstName, u.l_name as lastName,
+            c.client_id, pc.personal_diet as dietaryPreferences,
+            pc.dietary_restrictions as allergies
+    FROM User u
+    JOIN Client c ON u.user_id = c.user_id
+    LEFT JOIN Personal_Constraints pc ON c.pc_id = pc.pc_id
+    WHERE u.user_id = %s
+''')
+
+ADMIN_AUTH = register('users.admin_auth', '''
+    SELECT u.user_id, u.f_name as firstName, u.l_name as lastName, a.admin_id
+    FROM User u
+    JOIN Admin a ON u.user_id = a.user_id
+    WHERE a.admin_id = %s
+''')
+
+HEALTH_AUTH = register('users.health_auth', '''
+    SELECT u.user_id, u.f_name as firstName, u.l_name as lastName, ha.advisor_id
+    FROM User u
+    JOIN Health_Advisor ha ON u.user_id = ha.user_id
+    WHERE ha.advisor_id = %s
+''')
+
+FRIDGE_FOR_USER = register('users.fridge_for_user', '''
+    SELECT c.fridge_id
+    FROM Client c
+    WHERE c.user_id = %s
+''')
+
+NUTRITIONIST_CLIENTS = register('users.nutritionist_clients', '''
+    SELECT c.client_id, c.pc_id, u.f_name, u.l_name, pc.age_group,
+           pc.dietary_restrictions, pc.personal_diet, pc.budget
+    FROM Client_Health_Advisor cha
+    JOIN Client c ON cha.client_id = c.client_id
+    JOIN User u ON c.user_id = u.user_id
+    LEFT JOIN Personal_Constraints pc ON c.pc_id = pc.pc_id
+    WHERE cha.advisor_id = %s
+    ORDER BY u.l_name, u.f_name
+''')
+
+# Clients of an advisor with nutrition tracking issues
+DIETARY_ALERTS = register('users.nutritionist_dietary_alerts', '''
+    SELECT c.client_id, u.f_name, u.l_name,
+           CASE
+               WHEN nt.sodium > 2300 THEN 'High sodium intake detected'
+               WHEN nt.protein < 50 THEN 'Low protein intake detected'
+               WHEN nt.calories < 1500 THEN 'Low calorie intake detected'
+               ELSE 'Unknown alert'
+           END as alert_message,
+           CASE
+               WHEN nt.sodium > 2300 THEN 'Medium'
+               WHEN nt.protein < 50 THEN 'High'
+               WHEN nt.calories < 1500 THEN 'Medium'
+               ELSE 'Low'
+           END as priority
+    FROM Client_Health_Advisor cha
+    JOIN Client c ON cha.client_id = c.client_id
+    JOIN User u ON c.user_id = u.user_id
+    JOIN Nutrition_Tracking nt ON c.client_id = nt.client_id
+    WHERE cha.advisor_id = %s
+    AND (nt.sodium > 2300 OR nt.protein < 50 OR nt.calories < 1500)
+    ORDER BY
+        CASE priority
+            WHEN 'High' THEN 1
+            WHEN 'Medium' THEN 2
+            WHEN 'Low' THEN 3
+            ELSE 4
+        END
+''')
+
+NUTRITION_SUMMARY = register('users.nutritionist_nutrition_summary', '''
+    SELECT
+        pc.personal_diet as diet_type,
+        AVG(nt.protein) as avg_protein,
+        AVG(nt.carbs) as avg_carbs,
+        AVG(nt.fat) as avg_fat
+    FROM Client_Health_Advisor cha
+    JOIN Client c ON cha.client_id = c.client_id
+    JOIN Personal_Constraints pc ON c.pc_id = pc.pc_id
+    JOIN Nutrition_Tracking nt ON c.client_id = nt.client_id
+    WHERE cha.advisor_id = %s
+    GROUP BY pc.personal_diet
+''')
+
+CLIENT_WORKOUTS = register('users.client_workouts', '''
+    SELECT w.workout_id, w.name, w.quantity, w.weight, w.calories_burnt
+    FROM Client_Workout cw
+    JOIN Workout w ON cw.workout_id = w.workout_id
+    WHERE cw.client_id = %s
+    ORDER BY w.workout_id
+''')
+
+INSERT_WORKOUT = register('users.insert_workout', '''
+    INSERT INTO Workout (name, quantity, weight, calories_burnt) VALUES (%s, %s, %s, %s)
+''')
+
+INSERT_CLIENT_WORKOUT = register('users.insert_client_workout', '''
+    INSERT INTO Client_Workout (client_id, workout_id) VALUES (%s, %s)
+''')
+
+UPDATE_WORKOUT = register_partial_update(
+    'users.update_workout', 'Workout', ('name', 'quantity', 'weight', 'calories_burnt'), 'workout_id'
+)
+
+DELETE_WORKOUT_CLIENTS = register('users.delete_workout_clients', '''
+    DELETE FROM Client_Workout WHERE workout_id = %s
+''')
+
+DELETE_WORKOUT = register('users.delete_workout', '''
+    DELETE FROM Workout WHERE workout_id = %s
+''')
@@ -0,0 +1,113 @@
+from flask import Blueprint, request, jsonify, make_response, current_app
+from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.changes.change_feed import change_feed_response, parse_token
+from backend.outbox import outbox
+from backend.queries import meal_plan_queries, recipe_queries
+
+recipes = Blueprint('recipes', __name__)
+
+@recipes.route('/', methods=['GET'])
+def get_recipes():
+    """Get all recipes, optionally with their total and per-serving macros (?include=macros)"""
+    include = request.args.get('include', '').split(',')
+
+    cursor = db.get_db().cursor()
+
+    try:
+        if 'macros' in include:
+            cursor.execute(meal_plan_queries.RECIPES_WITH_MACROS)
+        else:
+            cursor.execute(meal_plan_queries.ALL_RECIPES)
+        recipes_data = cursor.fetchall()
+
+        response = make_response(jsonify(recipes_data))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error fetching recipes: {str(e)}")
+        response = make_response(jsonify({"error": "Could not fetch recipes"}))
+        response.status_code = 500
+        return response
+
+@recipes.route('/changes', methods=['GET'])
+@query_budget(2)
+def get_recipe_changes():
+    """Recipes changed since a change token (?since=), or all of them without one, for incremental sync"""
+    since = parse_token(request.args.get('since'))
+
+    if since is False:
+        response = make_response(jsonify({"error": "since must be a change token from an earlier response"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    return change_feed_response(
+        cursor, since, meal_plan_queries.ALL_RECIPES, recipe_queries.CHANGES, keys=('recipe_id',)
+    )
+
+@recipes.route('/<int:recipe_id>/cook', methods=['POST'])
+@query_budget(5)
+def cook_recipe(recipe_id):
+    """
+    Cook a recipe from a fridge: take every ingredient it needs out of the
+    fridge and store the cooked servings as a leftover, all in one transaction.
+    Responds 409 with the missing ingredients if the fridge is short.
+    """
+    fridge_id = request.args.get('fridge_id', type=int)
+    servings = request.args.get('servings', type=int)
+
+    if not fridge_id:
+        response = make_response(jsonify({"error": "Fridge ID is required"}))
+        response.status_code = 400
+        return response
+
+    if servings is not None and servings < 1:
+        response = make_response(jsonify({"error": "Servings must be at least 1"}))
+        response.status_code = 400
+        return response
+
+    conn = db.get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(recipe_queries.INSERT_COOKED_LEFTOVER, (servings, recipe_id))
+        if cursor.rowcount == 0:
+            conn.rollback()
+            response = make_response(jsonify({"error": "Recipe not found"}))
+            response.status_code = 404
+            return response
+        leftover_id = cursor.lastrowid
+
+        cursor.execute(recipe_queries.COOK_SHORTAGES, (servings, fridge_id, recipe_id))
+        shortages = cursor.fetchall()
+        if shortages:
+            conn.rollback()
+            response = make_response(jsonify({
+                "error": "Not enough ingredients in the fridge",
+                "missing": shortages
+            }))
+            response.status_code = 409
+            return response
+
+        cursor.execute(recipe_queries.CONSUME_FOR_RECIPE, (servings, fridge_id, recipe_id))
+        used = cursor.rowcount
+        cursor.execute(recipe_queries.DELETE_DEPLETED_FOR_RECIPE, (fridge_id, recipe_id))
+        depleted = cursor.rowcount
+        # Both the fridge and the leftovers changed; one event covers them
+        outbox.record(conn, 'recipe.cooked', recipe_id=recipe_id, fridge_id=fridge_id, leftover_id=leftover_id)
+        conn.commit()
+
+        response = make_response(jsonify({
+            "message": "Recipe cooked",
+            "leftover_id": leftover_id,
+            "ingredients_used": used,
+            "ingredients_depleted": depleted
+        }))
+        response.status_code = 201
+        return response
+    except Exception as e:
+        conn.rollback()
+        current_app.logger.error(f"Error cooking recipe: {str(e)}")
+        response = make_response(jsonify({"error": "Could not cook recipe"}))
+        response.status_code = 500
+        return response
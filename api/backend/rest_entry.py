@@ -1,6 +1,6 @@
 from flask import Flask
 
-from backend.db_connection import db
+from backend.db_connection import db, profiler
 from backend.users.user_routes import users
 from backend.fridge.fridge_routes import fridge
 from backend.ingredients.ingredient_routes import ingredients
@@ -8,10 +8,23 @@ from backend.meal_plans.meal_plan_routes import meal_plans
 from backend.macros.macros_routes import macros
 from backend.logs.log_routes import logs
 from backend.leftovers.leftover_routes import leftovers
+from backend.shopping_lists.shopping_list_routes import shopping_lists
+from backend.recipes.recipe_routes import recipes
+from backend.batch.batch_routes import batch
+from backend.metrics.metrics_routes import metrics
+from backend.metrics import request_metrics
+from backend.jobs.job_routes import jobs
+from backend.events.event_routes import events
+from backend.jobs import scheduler
+from backend.outbox import relay
 import os
 from dotenv import load_dotenv
 
-def create_app():
+def create_app(background=True):
+    """
+    Build the API app. background=False leaves out the job scheduler and outbox
+    relay threads, e.g. in a process that won't serve requests.
+    """
     app = Flask(__name__)
 
     # Load environment variables
@@ -35,10 +48,31 @@ def create_app():
     app.config['MYSQL_DATABASE_PORT'] = int(os.getenv('DB_PORT').strip())
     app.config['MYSQL_DATABASE_DB'] = os.getenv('DB_NAME').strip()  # Change this to your DB name.
 
+    # Query profiling (see backend/db_connection/profiler.py). DB_PROFILE logs every
+    # request's statements, query shapes repeated DB_REPEAT_THRESHOLD or more times
+    # and slow queries with their EXPLAIN plan; DB_PROFILE_STRICT turns query budget
+    # overruns into errors.
+    app.config['DB_PROFILE'] = os.getenv('DB_PROFILE', 'false').strip().lower() == 'true'
+    app.config['DB_PROFILE_STRICT'] = os.getenv('DB_PROFILE_STRICT', 'false').strip().lower() == 'true'
+    app.config['DB_SLOW_QUERY_MS'] = float(os.getenv('DB_SLOW_QUERY_MS', '100').strip())
+    app.config['DB_REPEAT_THRESHOLD'] = int(os.getenv('DB_REPEAT_THRESHOLD', '3').strip())
+
+    # Run the scheduled jobs (see backend/jobs/scheduler.py) in this process.
+    # Safe with several replicas: each due run is claimed by exactly one of them.
+    app.config['JOB_SCHEDULER'] = os.getenv('JOB_SCHEDULER', 'true').strip().lower() == 'true'
+
+    # Dispatch the write events routes record in the outbox to this process's
+    # subscribers (see backend/outbox/relay.py)
+    app.config['OUTBOX_RELAY'] = os.getenv('OUTBOX_RELAY', 'true').strip().lower() == 'true'
+
     # Initialize the database object with the settings above. 
     app.logger.info('current_app(): starting the database connection')
     db.init_app(app)
 
+    # Time every request and count the SQL work done for it (see /metrics)
+    request_metrics.init_app(app, db)
+    profiler.init_app(app, db)
+
 
     # Register the routes from each Blueprint with the app object
     # and give a url prefix to each
@@ -50,6 +84,19 @@ def create_app():
     app.register_blueprint(macros, url_prefix='/macronutrients')
     app.register_blueprint(logs, url_prefix='/logs')
     app.register_blueprint(leftovers, url_prefix='/leftovers')
+    app.register_blueprint(shopping_lists, url_prefix='/shopping-lists')
+    app.register_blueprint(recipes, url_prefix='/recipes')
+    app.register_blueprint(batch, url_prefix='/batch')
+    app.register_blueprint(metrics, url_prefix='/metrics')
+    app.register_blueprint(jobs, url_prefix='/jobs')
+    app.register_blueprint(events, url_prefix='/events')
+
+    if background:
+        # Start running the scheduled jobs in the background
+        scheduler.init_app(app)
+
+        # Start relaying outbox events to their subscribers
+        relay.init_app(app)
     
     # Don't forget to return the app object
     return app
@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify, make_response, current_app
+from backend.db_connection import db
+from backend.outbox import outbox
+from backend.queries import shopping_list_queries
+
+shopping_lists = Blueprint('shopping_lists', __name__)
+
+@shopping_lists.route('/', methods=['GET'])
+def get_shopping_list():
+    """Get the items on a client's shopping list"""
+    client_id = request.args.get('client_id')
+
+    if not client_id:
+        response = make_response(jsonify({"error": "Client ID is required"}))
+        response.status_code = 400
+        return response
+
+    cursor = db.get_db().cursor()
+    cursor.execute(shopping_list_queries.ITEMS_FOR_CLIENT, (client_id,))
+    items = cursor.fetchall()
+
+    response = make_response(jsonify(items))
+    response.status_code = 200
+    return response
+
+@shopping_lists.route('/generate', methods=['POST'])
+def generate_shopping_lists():
+    """Fill shopping lists with what the client's meal plans need minus what is already in their fridge"""
+    client_id = request.args.get('client_id')
+
+    # Without a client_id every client's list is regenerated in the same statements
+    if client_id:
+        prune, generate = shopping_list_queries.PRUNE_FOR_CLIENT, shopping_list_queries.GENERATE_FOR_CLIENT
+        prune_params, params = (client_id, client_id), (client_id,)
+    else:
+        prune, generate = shopping_list_queries.PRUNE_ALL, shopping_list_queries.GENERATE_ALL
+        prune_params, params = (), ()
+
+    cursor = db.get_db().cursor()
+
+    try:
+        # Drop what is no longer short, then upsert the current shortfall, in one transaction
+        cursor.execute(prune, prune_params)
+        rows_removed = cursor.rowcount
+        cursor.execute(generate, params)
+        rows_affected = cursor.rowcount
+        if rows_removed or rows_affected:
+            outbox.record(db.get_db(), 'shopping_list.generated', client_id=client_id,
+                          rows=rows_affected, rows_removed=rows_removed)
+        db.get_db().commit()
+
+        response = make_response(jsonify({
+            "message": "Shopping lists generated successfully",
+            "rows_affected": rows_affected,
+            "rows_removed": rows_removed
+        }))
+        response.status_code = 200
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error generating shopping lists: {str(e)}")
+        response = make_response(jsonify({"error": "Could not generate shopping lists"}))
+        response.status_code = 500
+        return response
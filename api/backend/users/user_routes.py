@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify, make_response, current_app
 from backend.db_connection import db
+from backend.db_connection.profiler import query_budget
+from backend.outbox import outbox
+from backend.queries import CONFLICT, NOT_FOUND, run_partial_update, user_queries
 
 users = Blueprint('users', __name__)
 
@@ -7,7 +10,7 @@ users = Blueprint('users', __name__)
 def get_all_users():
     """Get list of all users"""
     cursor = db.get_db().cursor()
-    cursor.execute('SELECT user_id, f_name, l_name, username, email FROM User')
+    cursor.execute(user_queries.ALL_USERS)
     users_data = cursor.fetchall()
     
     response = make_response(jsonify(users_data))
@@ -19,7 +22,7 @@ def get_all_users():
 def get_user(user_id):
     """Get user profile details"""
     cursor = db.get_db().cursor()
-    cursor.execute('SELECT user_id, f_name, l_name, username, email FROM User WHERE user_id = %s', (user_id,))
+    cursor.execute(user_queries.USER_BY_ID, (user_id,))
     user_data = cursor.fetchone()
     
     if not user_data:
@@ -50,9 +53,10 @@ def create_user():
     cursor = db.get_db().cursor()
     try:
         cursor.execute(
-            'INSERT INTO User (f_name, l_name, username, password, email) VALUES (%s, %s, %s, %s, %s)',
+            user_queries.INSERT_USER,
             (f_name, l_name, username, password, email)
         )
+        outbox.record(db.get_db(), 'user.created', user_id=cursor.lastrowid)
         db.get_db().commit()
         
         response = make_response(jsonify({"message": "User created successfully", "user_id": cursor.lastrowid}))
@@ -65,52 +69,42 @@ def create_user():
         return response
     
 @users.route('/<int:user_id>', methods=['PUT'])
+@query_budget(2)
 def update_user(user_id):
     """Update user profile or mark user as inactive"""
     user_data = request.json
+
+    # Only the provided fields are changed, through one fixed UPDATE statement
+    updates = {field: user_data[field] for field in user_queries.UPDATE_USER.columns if field in user_data}
     
-    cursor = db.get_db().cursor()
-    
-    # Check if user exists
-    cursor.execute('SELECT * FROM User WHERE user_id = %s', (user_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "User not found"}))
-        response.status_code = 404
+    if not updates:
+        response = make_response(jsonify({"error": "No fields to update"}))
+        response.status_code = 400
         return response
-        
-    # Build update query dynamically based on provided fields
-    update_fields = []
-    params = []
     
-    if 'f_name' in user_data:
-        update_fields.append('f_name = %s')
-        params.append(user_data['f_name'])
-        
-    if 'l_name' in user_data:
-        update_fields.append('l_name = %s')
-        params.append(user_data['l_name'])
-        
-    if 'email' in user_data:
-        update_fields.append('email = %s')
-        params.append(user_data['email'])
-        
-    if 'username' in user_data:
-        update_fields.append('username = %s')
-        params.append(user_data['username'])
-    
-    if not update_fields:
-        response = make_response(jsonify({"error": "No fields to update"}))
+    # Optional: the version the client last read, so concurrent edits aren't overwritten
+    version = user_data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
         response.status_code = 400
         return response
-        
-    query = f"UPDATE User SET {', '.join(update_fields)} WHERE user_id = %s"
-    params.append(user_id)
+    
+    cursor = db.get_db().cursor()
     
     try:
-        cursor.execute(query, params)
+        outcome, version = run_partial_update(cursor, user_queries.UPDATE_USER, updates, user_id, version)
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "User not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "User was changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+        outbox.record(db.get_db(), 'user.updated', user_id=user_id, fields=sorted(updates), version=version)
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "User updated successfully"}))
+        response = make_response(jsonify({"message": "User updated successfully", "version": version}))
         response.status_code = 200
         return response
     except Exception as e:
@@ -120,51 +114,40 @@ def update_user(user_id):
         return response
     
 @users.route('/constraints/<int:pc_id>', methods=['PUT'])
+@query_budget(2)
 def update_constraints(pc_id):
     """Update user dietary constraints"""
     data = request.json
+
+    updates = {field: data[field] for field in user_queries.UPDATE_CONSTRAINTS.columns if field in data}
     
-    cursor = db.get_db().cursor()
-    
-    # Check if personal constraints exist
-    cursor.execute('SELECT * FROM Personal_Constraints WHERE pc_id = %s', (pc_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "Personal constraints not found"}))
-        response.status_code = 404
+    if not updates:
+        response = make_response(jsonify({"error": "No fields to update"}))
+        response.status_code = 400
         return response
     
-    update_fields = []
-    params = []
-    
-    if 'budget' in data:
-        update_fields.append('budget = %s')
-        params.append(data['budget'])
-    
-    if 'dietary_restrictions' in data:
-        update_fields.append('dietary_restrictions = %s')
-        params.append(data['dietary_restrictions'])
-    
-    if 'personal_diet' in data:
-        update_fields.append('personal_diet = %s')
-        params.append(data['personal_diet'])
-    
-    if 'age_group' in data:
-        update_fields.append('age_group = %s')
-        params.append(data['age_group'])
-    
-    if not update_fields:
-        response = make_response(jsonify({"error": "No fields to update"}))
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
         response.status_code = 400
         return response
     
-    query = f"UPDATE Personal_Constraints SET {', '.join(update_fields)} WHERE pc_id = %s"
-    params.append(pc_id)
+    cursor = db.get_db().cursor()
     
     try:
-        cursor.execute(query, params)
+        outcome, version = run_partial_update(cursor, user_queries.UPDATE_CONSTRAINTS, updates, pc_id, version)
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "Personal constraints not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "Personal constraints were changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+        outbox.record(db.get_db(), 'constraints.updated', pc_id=pc_id, fields=sorted(updates), version=version)
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "Personal constraints updated successfully"}))
+        response = make_response(jsonify({"message": "Personal constraints updated successfully", "version": version}))
         response.status_code = 200
         return response
     except Exception as e:
@@ -187,23 +170,18 @@ def create_constraints():
     
     try:
         cursor.execute(
-            '''INSERT INTO Personal_Constraints 
-               (budget, dietary_restrictions, personal_diet, age_group) 
-               VALUES (%s, %s, %s, %s)''',
+            user_queries.INSERT_CONSTRAINTS,
             (budget, dietary_restrictions, personal_diet, age_group)
         )
-        db.get_db().commit()
-        
         pc_id = cursor.lastrowid
         
         # If client_id is provided, link these constraints to the client
         client_id = data.get('client_id')
         if client_id:
-            cursor.execute(
-                'UPDATE Client SET pc_id = %s WHERE client_id = %s',
-                (pc_id, client_id)
-            )
-            db.get_db().commit()
+            cursor.execute(user_queries.SET_CLIENT_CONSTRAINTS, (pc_id, client_id))
+
+        outbox.record(db.get_db(), 'constraints.created', pc_id=pc_id, client_id=client_id)
+        db.get_db().commit()
         
         response = make_response(jsonify({
             "message": "Personal constraints created successfully",
@@ -225,17 +203,7 @@ def get_student_auth(student_id):
     cursor = db.get_db().cursor()
 
     # Join User table with Client table to get student information
-    query = '''
-    SELECT u.user_id, u.f_name as firstName, u.l_name as lastName, 
-            c.client_id, pc.personal_diet as dietaryPreferences,
-            pc.dietary_restrictions as allergies
-    FROM User u
-    JOIN Client c ON u.user_id = c.user_id
-    LEFT JOIN Personal_Constraints pc ON c.pc_id = pc.pc_id
-    WHERE u.user_id = %s
-    '''
-    
-    cursor.execute(query, (student_id,))
+    cursor.execute(user_queries.STUDENT_AUTH, (student_id,))
     result = cursor.fetchall()
     
     response = make_response(jsonify({"data": result}))
@@ -249,14 +217,7 @@ def get_admin_auth(admin_id):
     cursor = db.get_db().cursor()
     
     # Join User table with Admin table
-    query = '''
-    SELECT u.user_id, u.f_name as firstName, u.l_name as lastName, a.admin_id
-    FROM User u
-    JOIN Admin a ON u.user_id = a.user_id
-    WHERE a.admin_id = %s
-    '''
-    
-    cursor.execute(query, (admin_id,))
+    cursor.execute(user_queries.ADMIN_AUTH, (admin_id,))
     result = cursor.fetchall()
     
     response = make_response(jsonify({"data": result}))
@@ -269,14 +230,7 @@ def get_health_auth(health_id):
     cursor = db.get_db().cursor()
     
     # Join User table with Health_Advisor table
-    query = '''
-    SELECT u.user_id, u.f_name as firstName, u.l_name as lastName, ha.advisor_id
-    FROM User u
-    JOIN Health_Advisor ha ON u.user_id = ha.user_id
-    WHERE ha.advisor_id = %s
-    '''
-    
-    cursor.execute(query, (health_id,))
+    cursor.execute(user_queries.HEALTH_AUTH, (health_id,))
     result = cursor.fetchall()
     
     response = make_response(jsonify({"data": result}))
@@ -290,13 +244,7 @@ def get_user_fridge(user_id):
     """Get a user's fridge ID"""
     cursor = db.get_db().cursor()
     
-    query = '''
-    SELECT c.fridge_id
-    FROM Client c
-    WHERE c.user_id = %s
-    '''
-    
-    cursor.execute(query, (user_id,))
+    cursor.execute(user_queries.FRIDGE_FOR_USER, (user_id,))
     result = cursor.fetchone()
     
     if not result:
@@ -315,18 +263,7 @@ def get_nutritionist_clients(advisor_id):
     cursor = db.get_db().cursor()
     
     try:
-        query = '''
-        SELECT c.client_id, u.f_name, u.l_name, pc.age_group, 
-               pc.dietary_restrictions, pc.personal_diet, pc.budget
-        FROM Client_Health_Advisor cha
-        JOIN Client c ON cha.client_id = c.client_id
-        JOIN User u ON c.user_id = u.user_id
-        LEFT JOIN Personal_Constraints pc ON c.pc_id = pc.pc_id
-        WHERE cha.advisor_id = %s
-        ORDER BY u.l_name, u.f_name
-        '''
-        
-        cursor.execute(query, (advisor_id,))
+        cursor.execute(user_queries.NUTRITIONIST_CLIENTS, (advisor_id,))
         clients = cursor.fetchall()
         
         response = make_response(jsonify(clients))
@@ -345,36 +282,7 @@ def get_dietary_alerts(advisor_id):
     
     try:
         # This query identifies clients with nutrition tracking issues
-        query = '''
-        SELECT c.client_id, u.f_name, u.l_name, 
-               CASE 
-                   WHEN nt.sodium > 2300 THEN 'High sodium intake detected'
-                   WHEN nt.protein < 50 THEN 'Low protein intake detected'
-                   WHEN nt.calories < 1500 THEN 'Low calorie intake detected'
-                   ELSE 'Unknown alert'
-               END as alert_message,
-               CASE 
-                   WHEN nt.sodium > 2300 THEN 'Medium'
-                   WHEN nt.protein < 50 THEN 'High'
-                   WHEN nt.calories < 1500 THEN 'Medium'
-                   ELSE 'Low'
-               END as priority
-        FROM Client_Health_Advisor cha
-        JOIN Client c ON cha.client_id = c.client_id
-        JOIN User u ON c.user_id = u.user_id
-        JOIN Nutrition_Tracking nt ON c.client_id = nt.client_id
-        WHERE cha.advisor_id = %s
-        AND (nt.sodium > 2300 OR nt.protein < 50 OR nt.calories < 1500)
-        ORDER BY 
-            CASE priority
-                WHEN 'High' THEN 1
-                WHEN 'Medium' THEN 2
-                WHEN 'Low' THEN 3
-                ELSE 4
-            END
-        '''
-        
-        cursor.execute(query, (advisor_id,))
+        cursor.execute(user_queries.DIETARY_ALERTS, (advisor_id,))
         alerts = cursor.fetchall()
         
         response = make_response(jsonify(alerts))
@@ -392,21 +300,7 @@ def get_nutrition_summary(advisor_id):
     cursor = db.get_db().cursor()
     
     try:
-        query = '''
-        SELECT 
-            pc.personal_diet as diet_type,
-            AVG(nt.protein) as avg_protein,
-            AVG(nt.carbs) as avg_carbs,
-            AVG(nt.fat) as avg_fat
-        FROM Client_Health_Advisor cha
-        JOIN Client c ON cha.client_id = c.client_id
-        JOIN Personal_Constraints pc ON c.pc_id = pc.pc_id
-        JOIN Nutrition_Tracking nt ON c.client_id = nt.client_id
-        WHERE cha.advisor_id = %s
-        GROUP BY pc.personal_diet
-        '''
-        
-        cursor.execute(query, (advisor_id,))
+        cursor.execute(user_queries.NUTRITION_SUMMARY, (advisor_id,))
         nutrition_summary = cursor.fetchall()
         
         response = make_response(jsonify(nutrition_summary))
@@ -427,15 +321,7 @@ def get_client_workouts(client_id):
     cursor = db.get_db().cursor()
     
     try:
-        query = '''
-        SELECT w.workout_id, w.name, w.quantity, w.weight, w.calories_burnt
-        FROM Client_Workout cw
-        JOIN Workout w ON cw.workout_id = w.workout_id
-        WHERE cw.client_id = %s
-        ORDER BY w.workout_id
-        '''
-        
-        cursor.execute(query, (client_id,))
+        cursor.execute(user_queries.CLIENT_WORKOUTS, (client_id,))
         workouts = cursor.fetchall()
         
         response = make_response(jsonify(workouts))
@@ -470,7 +356,7 @@ def create_workout():
     try:
         # Insert workout
         cursor.execute(
-            'INSERT INTO Workout (name, quantity, weight, calories_burnt) VALUES (%s, %s, %s, %s)',
+            user_queries.INSERT_WORKOUT,
             (name, quantity, weight, calories_burnt)
         )
         workout_id = cursor.lastrowid
@@ -478,11 +364,9 @@ def create_workout():
         # Associate with client if client_id is provided
         client_id = data.get('client_id')
         if client_id:
-            cursor.execute(
-                'INSERT INTO Client_Workout (client_id, workout_id) VALUES (%s, %s)',
-                (client_id, workout_id)
-            )
+            cursor.execute(user_queries.INSERT_CLIENT_WORKOUT, (client_id, workout_id))
             
+        outbox.record(db.get_db(), 'workout.created', workout_id=workout_id, client_id=client_id)
         db.get_db().commit()
         
         response = make_response(jsonify({
@@ -498,51 +382,40 @@ def create_workout():
         return response
 
 @users.route('/workouts/<int:workout_id>', methods=['PUT'])
+@query_budget(2)
 def update_workout(workout_id):
     """Update a workout"""
     data = request.json
+
+    updates = {field: data[field] for field in user_queries.UPDATE_WORKOUT.columns if field in data}
     
-    cursor = db.get_db().cursor()
-    
-    # Check if workout exists
-    cursor.execute('SELECT * FROM Workout WHERE workout_id = %s', (workout_id,))
-    if not cursor.fetchone():
-        response = make_response(jsonify({"error": "Workout not found"}))
-        response.status_code = 404
+    if not updates:
+        response = make_response(jsonify({"error": "No fields to update"}))
+        response.status_code = 400
         return response
     
-    # Build update query dynamically
-    update_fields = []
-    params = []
-    
-    if 'name' in data:
-        update_fields.append('name = %s')
-        params.append(data['name'])
-    
-    if 'quantity' in data:
-        update_fields.append('quantity = %s')
-        params.append(data['quantity'])
-    
-    if 'weight' in data:
-        update_fields.append('weight = %s')
-        params.append(data['weight'])
-    
-    if 'calories_burnt' in data:
-        update_fields.append('calories_burnt = %s')
-        params.append(data['calories_burnt'])
-    
-    if not update_fields:
-        response = make_response(jsonify({"error": "No fields to update"}))
+    version = data.get('version')
+    if version is not None and not isinstance(version, int):
+        response = make_response(jsonify({"error": "version must be an integer"}))
         response.status_code = 400
         return response
     
+    cursor = db.get_db().cursor()
+    
     try:
-        query = f"UPDATE Workout SET {', '.join(update_fields)} WHERE workout_id = %s"
-        params.append(workout_id)
-        cursor.execute(query, params)
+        outcome, version = run_partial_update(cursor, user_queries.UPDATE_WORKOUT, updates, workout_id, version)
+        if outcome == NOT_FOUND:
+            response = make_response(jsonify({"error": "Workout not found"}))
+            response.status_code = 404
+            return response
+        if outcome == CONFLICT:
+            response = make_response(jsonify({"error": "Workout was changed by someone else", "version": version}))
+            response.status_code = 409
+            return response
+        outbox.record(db.get_db(), 'workout.updated', workout_id=workout_id, fields=sorted(updates), version=version)
         db.get_db().commit()
         
-        response = make_response(jsonify({"message": "Workout updated successfully"}))
+        response = make_response(jsonify({"message": "Workout updated successfully", "version": version}))
         response.status_code = 200
         return response
     except Exception as e:
@@ -558,10 +431,12 @@ def delete_workout(workout_id):
     
     try:
         # First delete from Client_Workout (foreign key constraint)
-        cursor.execute('DELETE FROM Client_Workout WHERE workout_id = %s', (workout_id,))
+        cursor.execute(user_queries.DELETE_WORKOUT_CLIENTS, (workout_id,))
         
         # Then delete the workout
-        cursor.execute('DELETE FROM Workout WHERE workout_id = %s', (workout_id,))
+        cursor.execute(user_queries.DELETE_WORKOUT, (workout_id,))
+        if cursor.rowcount:
+            outbox.record(db.get_db(), 'workout.deleted', workout_id=workout_id)
         db.get_db().commit()
         
         if cursor.rowcount == 0:
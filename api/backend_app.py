@@ -2,12 +2,20 @@
 # Main application interface to create app
 ###
 
+import os
+
 # import the create app function 
 # that lives in src/__init__.py
 from backend.rest_entry import create_app
 
+# In debug mode Werkzeug's reloader runs this file twice: in a process that
+# only watches for code changes, and in the child it restarts on every change
+# that serves the requests (with WERKZEUG_RUN_MAIN=true). Only the child
+# starts the scheduler and outbox relay threads.
+reloader_watcher = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
 # create the app object
-app = create_app()
+app = create_app(background=not reloader_watcher)
 
 if __name__ == '__main__':
     # we want to run in debug mode (for hot reloading) 
@@ -0,0 +1,153 @@
+#------------------------------------------------------------
+# Throughput benchmark for POST /recipes/<id>/cook
+#
+# Creates scratch fridges stocked with plenty of every ingredient
+# the chosen recipes need, then has client threads cook random
+# recipes into random fridges for a fixed time and reports cook
+# events per second and p50/p95/p99 latency. Fewer fridges than
+# threads means more requests competing for the same rows.
+#
+# By default the app is booted in-process against the database in
+# api/.env (fill it with benchmarks.generate_data first); use --url
+# to target a running API. The scratch fridges and the leftovers
+# the cooks created are deleted at the end.
+#
+# Run from the api folder:
+#   python -m benchmarks.bench_cook --duration 20 --concurrency 8 --fridges 4
+#------------------------------------------------------------
+import argparse
+import datetime
+import random
+import sys
+import threading
+import time
+
+from backend.db_connection import connect
+from benchmarks.load_test import call, percentile, start_local_server
+
+# Stock per ingredient, far more than a run can use up
+STOCK = 1000000
+
+
+def setup(conn, recipe_count, fridge_count):
+    """Recipes to cook, and scratch fridges stocked with all their ingredients"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT recipe_id FROM Recipe_Ingredient ORDER BY recipe_id LIMIT %s
+    ''', (recipe_count,))
+    recipe_ids = [row['recipe_id'] for row in cursor.fetchall()]
+    if not recipe_ids:
+        return [], []
+
+    cursor.execute('''
+        SELECT DISTINCT ingredient_id FROM Recipe_Ingredient WHERE recipe_id IN %s
+    ''', (recipe_ids,))
+    ingredient_ids = [row['ingredient_id'] for row in cursor.fetchall()]
+
+    fridge_ids = []
+    for _ in range(fridge_count):
+        cursor.execute('INSERT INTO Fridge_Inventory () VALUES ()')
+        fridge_ids.append(cursor.lastrowid)
+    expires_on = datetime.date.today() + datetime.timedelta(days=365)
+    cursor.executemany(
+        'INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, expires_on, quantity) VALUES (%s, %s, %s, %s)',
+        [(fridge_id, ingredient_id, expires_on, STOCK) for fridge_id in fridge_ids for ingredient_id in ingredient_ids]
+    )
+    return recipe_ids, fridge_ids
+
+
+def last_leftover_id(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(MAX(leftover_id), 0) AS last FROM Leftover')
+    return cursor.fetchone()['last']
+
+
+def cleanup(conn, fridge_ids, first_leftover_id):
+    """Remove the scratch fridges and the leftovers cooked since first_leftover_id"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM Leftover WHERE leftover_id > %s', (first_leftover_id,))
+    if fridge_ids:
+        cursor.execute('DELETE FROM Fridge_Ingredient WHERE fridge_id IN %s', (fridge_ids,))
+        cursor.execute('DELETE FROM Fridge_Inventory WHERE fridge_id IN %s', (fridge_ids,))
+
+
+def worker(base_url, recipe_ids, fridge_ids, seed, deadline, warmup_until, timeout, results, lock):
+    rng = random.Random(seed)
+    latencies, statuses = [], {}
+
+    while time.perf_counter() < deadline:
+        path = (f"/recipes/{rng.choice(recipe_ids)}/cook"
+                f"?fridge_id={rng.choice(fridge_ids)}&servings={rng.randint(1, 4)}")
+        status, latency = call(base_url, 'POST', path, None, timeout)
+
+        if time.perf_counter() < warmup_until:
+            continue
+        latencies.append(latency)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    with lock:
+        results["latencies"].extend(latencies)
+        for status, count in statuses.items():
+            results["statuses"][status] = results["statuses"].get(status, 0) + count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cook events per second")
+    parser.add_argument('--url', help="base URL of a running API; boots create_app() locally if omitted")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds to run, after warmup")
+    parser.add_argument('--warmup', type=float, default=2.0, help="seconds of requests left out of the results")
+    parser.add_argument('--concurrency', type=int, default=8, help="number of client threads")
+    parser.add_argument('--recipes', type=int, default=50, help="number of recipes to cook from")
+    parser.add_argument('--fridges', type=int, default=4, help="number of scratch fridges to cook into")
+    parser.add_argument('--timeout', type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    conn = connect(autocommit=True)
+    first_leftover_id = last_leftover_id(conn)
+    recipe_ids, fridge_ids = setup(conn, args.recipes, args.fridges)
+    if not recipe_ids:
+        print("no recipes with ingredients found; seed the database with benchmarks.generate_data")
+        sys.exit(1)
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        server, base_url = start_local_server()
+
+    print(f"cooking {len(recipe_ids)} recipes into {len(fridge_ids)} fridges with {args.concurrency} threads "
+          f"for {args.duration:.0f} s (+{args.warmup:.0f} s warmup)")
+
+    results = {"latencies": [], "statuses": {}}
+    lock = threading.Lock()
+    warmup_until = time.perf_counter() + args.warmup
+    deadline = warmup_until + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, recipe_ids, fridge_ids, args.seed + i, deadline,
+                                              warmup_until, args.timeout, results, lock))
+        for i in range(args.concurrency)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if server is not None:
+            server.shutdown()
+        cleanup(conn, fridge_ids, first_leftover_id)
+        conn.close()
+
+    latencies = sorted(results["latencies"])
+    cooked = results["statuses"].get(201, 0)
+    print(f"cooks:      {cooked} ({cooked / args.duration:.1f}/s)")
+    print("statuses:   " + ", ".join(f"{status}: {count}" for status, count in sorted(results["statuses"].items())))
+    print(f"latency:    p50 {percentile(latencies, 0.50) * 1000:.2f} ms, p95 {percentile(latencies, 0.95) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+    if cooked < len(latencies):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
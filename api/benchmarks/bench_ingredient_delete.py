@@ -0,0 +1,193 @@
+#------------------------------------------------------------
+# Benchmark for deleting ingredients
+#
+# Compares three ways of deleting ingredients that are used all
+# over the schema (fridge lots, recipe and shopping list rows,
+# macros, scans with error logs):
+#   legacy  what DELETE /ingredients/<id> used to do: a DELETE per
+#           ingredient for each referring table
+#   single  what it does now: one DELETE that the ON DELETE CASCADE
+#           rules spread to the referring rows
+#   bulk    what DELETE /ingredients?ids= does: one DELETE per chunk
+#           of ids, each chunk in its own transaction
+# Each is timed on its own freshly created batch of scratch
+# ingredients, running the same statements the routes run (plus
+# the Recipe_Macros refresh) straight against the database, and
+# is checked to leave no referring rows behind.
+#
+# Needs the cascading foreign keys (a fresh database, or
+# database-files/migrations/007_ingredient_delete_cascades.sql).
+#
+# Run from the api folder:
+#   python -m benchmarks.bench_ingredient_delete --ingredients 500 --scans 5
+#------------------------------------------------------------
+import argparse
+import datetime
+import json
+import sys
+import time
+
+from backend.db_connection import connect
+from backend.ingredients.ingredient_routes import BULK_DELETE_CHUNK_SIZE
+from backend.meal_plans.recipe_macros import recipes_using_ingredient, recipes_using_ingredients, refresh_recipes
+from backend.queries import ingredient_queries
+
+# The statements the route ran before the schema cascaded deletes
+LEGACY_STATEMENTS = [
+    '''DELETE el FROM Error_Log el
+       JOIN Food_Scan_Log fsl ON el.log_id = fsl.log_id
+       WHERE fsl.ingredient_id = %s''',
+    'DELETE FROM Food_Scan_Log WHERE ingredient_id = %s',
+    'DELETE FROM Fridge_Ingredient WHERE ingredient_id = %s',
+    'DELETE FROM Recipe_Ingredient WHERE ingredient_id = %s',
+    'DELETE FROM Macronutrients WHERE ingredient_id = %s',
+    'DELETE FROM ShoppingList_Ingredient WHERE ingredient_id = %s',
+    'DELETE FROM Ingredient WHERE ingredient_id = %s',
+]
+
+# Tables that refer to an ingredient by ingredient_id, checked for rows left behind
+REFERRING_TABLES = ('Food_Scan_Log', 'Fridge_Ingredient', 'Recipe_Ingredient', 'Macronutrients',
+                    'ShoppingList_Ingredient')
+
+
+def create_scratch(conn):
+    """A fridge, shopping list and recipe for the scratch ingredients to be used in"""
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO Fridge_Inventory () VALUES ()')
+    fridge_id = cursor.lastrowid
+    cursor.execute('INSERT INTO Shopping_List () VALUES ()')
+    list_id = cursor.lastrowid
+    cursor.execute("INSERT INTO Recipe (name, instructions, servings) VALUES ('bench_ingredient_delete', '', 1)")
+    recipe_id = cursor.lastrowid
+    conn.commit()
+    return {"fridge_id": fridge_id, "list_id": list_id, "recipe_id": recipe_id}
+
+
+def create_batch(conn, scratch, label, count, scans):
+    """Scratch ingredients with rows in every table that refers to an ingredient"""
+    cursor = conn.cursor()
+    prefix = f"bench_delete_{label}_"
+    cursor.executemany('INSERT INTO Ingredient (name, expiration_date) VALUES (%s, %s)',
+                       [(f"{prefix}{i}", datetime.date.today()) for i in range(count)])
+    cursor.execute('SELECT ingredient_id FROM Ingredient WHERE name LIKE %s ORDER BY ingredient_id', (prefix + '%',))
+    ids = [row['ingredient_id'] for row in cursor.fetchall()]
+
+    cursor.executemany(
+        'INSERT INTO Macronutrients (ingredient_id, protein, fat, fiber, vitamin, sodium, calories, carbs) '
+        'VALUES (%s, 1, 1, 1, 1, 1, 1, 1)', [(i,) for i in ids])
+    expires_on = datetime.date.today() + datetime.timedelta(days=30)
+    cursor.executemany('INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, expires_on, quantity) '
+                       'VALUES (%s, %s, %s, 1)', [(scratch["fridge_id"], i, expires_on) for i in ids])
+    cursor.executemany('INSERT INTO ShoppingList_Ingredient (list_id, ingredient_id, quantity) VALUES (%s, %s, 1)',
+                       [(scratch["list_id"], i) for i in ids])
+    cursor.executemany('INSERT INTO Recipe_Ingredient (recipe_id, ingredient_id, quantity) VALUES (%s, %s, 1)',
+                       [(scratch["recipe_id"], i) for i in ids])
+    cursor.executemany("INSERT INTO Food_Scan_Log (ingredient_id, status) VALUES (%s, 'SUCCESS')",
+                       [(i,) for i in ids for _ in range(scans)])
+    cursor.execute('''
+        INSERT INTO Error_Log (log_id, message)
+        SELECT log_id, 'bench_ingredient_delete' FROM Food_Scan_Log
+        WHERE ingredient_id IN (SELECT ingredient_id FROM Ingredient WHERE name LIKE %s)
+    ''', (prefix + '%',))
+    conn.commit()
+    return ids
+
+
+def delete_legacy(conn, ids):
+    cursor = conn.cursor()
+    statements = 0
+    for ingredient_id in ids:
+        affected_recipes = recipes_using_ingredient(cursor, ingredient_id)
+        for statement in LEGACY_STATEMENTS:
+            cursor.execute(statement, (ingredient_id,))
+        refresh_recipes(cursor, affected_recipes)
+        conn.commit()
+        statements += len(LEGACY_STATEMENTS) + 2
+    return statements
+
+
+def delete_single(conn, ids):
+    cursor = conn.cursor()
+    statements = 0
+    for ingredient_id in ids:
+        affected_recipes = recipes_using_ingredient(cursor, ingredient_id)
+        cursor.execute(ingredient_queries.DELETE_INGREDIENT, (ingredient_id,))
+        refresh_recipes(cursor, affected_recipes)
+        conn.commit()
+        statements += 3
+    return statements
+
+
+def delete_bulk(conn, ids):
+    cursor = conn.cursor()
+    statements = 0
+    for start in range(0, len(ids), BULK_DELETE_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_DELETE_CHUNK_SIZE]
+        affected_recipes = recipes_using_ingredients(cursor, chunk)
+        cursor.execute(ingredient_queries.DELETE_INGREDIENTS, (json.dumps(chunk),))
+        refresh_recipes(cursor, affected_recipes)
+        conn.commit()
+        statements += 3
+    return statements
+
+
+def leftover_rows(conn, ids):
+    """Rows that still refer to the deleted ingredients, per table"""
+    cursor = conn.cursor()
+    leftovers = {}
+    for table in REFERRING_TABLES + ('Ingredient',):
+        cursor.execute(f'SELECT COUNT(*) AS n FROM {table} WHERE ingredient_id IN %s', (ids,))
+        leftovers[table] = cursor.fetchone()['n']
+    cursor.execute("SELECT COUNT(*) AS n FROM Error_Log WHERE message = 'bench_ingredient_delete'")
+    leftovers['Error_Log'] = cursor.fetchone()['n']
+    return {table: n for table, n in leftovers.items() if n}
+
+
+def cleanup(conn, scratch):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Error_Log WHERE message = 'bench_ingredient_delete'")
+    cursor.execute('DELETE FROM Ingredient WHERE name LIKE %s', ('bench_delete_%',))
+    cursor.execute('DELETE FROM Recipe_Macros WHERE recipe_id = %s', (scratch["recipe_id"],))
+    cursor.execute('DELETE FROM Recipe WHERE recipe_id = %s', (scratch["recipe_id"],))
+    cursor.execute('DELETE FROM Shopping_List WHERE list_id = %s', (scratch["list_id"],))
+    cursor.execute('DELETE FROM Fridge_Inventory WHERE fridge_id = %s', (scratch["fridge_id"],))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy, cascading and bulk ingredient deletes")
+    parser.add_argument('--ingredients', type=int, default=500, help="ingredients deleted by each path")
+    parser.add_argument('--scans', type=int, default=5, help="scans (each with an error log) per ingredient")
+    args = parser.parse_args()
+
+    conn = connect(autocommit=False)
+    scratch = create_scratch(conn)
+    paths = (('legacy', delete_legacy), ('single', delete_single), ('bulk', delete_bulk))
+    results, failed = {}, False
+    try:
+        for label, delete in paths:
+            ids = create_batch(conn, scratch, label, args.ingredients, args.scans)
+            started = time.perf_counter()
+            statements = delete(conn, ids)
+            results[label] = (time.perf_counter() - started, statements)
+
+            leftovers = leftover_rows(conn, ids)
+            if leftovers:
+                print(f"{label}: rows left behind: {leftovers}")
+                failed = True
+    finally:
+        cleanup(conn, scratch)
+        conn.close()
+
+    print(f"deleting {args.ingredients} ingredients with {args.scans} scans each")
+    legacy_seconds = results['legacy'][0]
+    for label, (seconds, statements) in results.items():
+        print(f"{label:<7} {seconds:8.3f} s  {seconds / args.ingredients * 1000:7.3f} ms/ingredient  "
+              f"{statements:>7} statements  {legacy_seconds / seconds:5.1f}x legacy")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#------------------------------------------------------------
+# Benchmark for the meal plan optimizer
+#
+# Builds a synthetic recipe x macro catalog (50k recipes by default)
+# and times greedy_plan against it, reporting p50/p95/max latency
+# and whether they fit inside the latency budget. It also checks
+# that a plan the budget doesn't limit gets every macro within
+# --tolerance of its target, for plans of any length.
+#
+# Run from the api folder:
+#   python -m benchmarks.bench_optimizer --recipes 50000 --runs 50
+#   python -m benchmarks.bench_optimizer --days 14 --budget 5000
+#------------------------------------------------------------
+import argparse
+import time
+
+import numpy as np
+
+from backend.meal_plans.optimizer import MACRO_FIELDS, greedy_plan, targets_for_diet
+
+
+def make_catalog(n_recipes, seed):
+    """Random per-serving macros and costs shaped like the seed data"""
+    rng = np.random.default_rng(seed)
+    # protein, fat, fiber, vitamin, sodium, calories, carbs
+    low = np.array([2, 1, 0, 0, 10, 100, 5], dtype=np.float32)
+    high = np.array([60, 45, 15, 90, 900, 1100, 120], dtype=np.float32)
+    macros = rng.uniform(low, high, size=(n_recipes, len(MACRO_FIELDS))).astype(np.float32)
+    costs = rng.uniform(1.5, 18.0, size=n_recipes).astype(np.float32)
+    return macros, costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the meal plan optimizer")
+    parser.add_argument('--recipes', type=int, default=50000, help="catalog size")
+    parser.add_argument('--runs', type=int, default=50, help="number of timed plans")
+    parser.add_argument('--diet', default='balanced', help="diet used for the macro targets")
+    parser.add_argument('--days', type=int, default=1, help="plan length in days")
+    parser.add_argument('--budget', type=float, default=60.0, help="plan budget")
+    parser.add_argument('--budget-ms', type=float, default=250.0, help="latency budget per plan")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="largest relative shortfall of a macro allowed when the budget isn't spent")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    macros, costs = make_catalog(args.recipes, args.seed)
+    targets = targets_for_diet(args.diet, args.days)
+    target_vector = np.array([targets.get(field, 0) for field in MACRO_FIELDS], dtype=np.float32)
+
+    # Warm up once so the first timing doesn't include allocator/import costs
+    greedy_plan(macros, costs, target_vector, budget=args.budget, days=args.days)
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        servings, totals, cost, truncated = greedy_plan(
+            macros, costs, target_vector,
+            budget=args.budget,
+            days=args.days,
+            time_budget=args.budget_ms / 1000
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    p50, p95 = np.percentile(timings, [50, 95])
+
+    print(f"catalog: {args.recipes} recipes x {len(MACRO_FIELDS)} macros, diet={args.diet}, days={args.days}")
+    print(f"plan: {int(servings.sum())} servings across {int(np.count_nonzero(servings))} recipes, "
+          f"cost {cost:.2f} of {args.budget:.2f}, truncated={truncated}")
+    print("totals vs targets: " + ", ".join(
+        f"{field} {totals[i]:.0f}/{target_vector[i]:.0f}"
+        for i, field in enumerate(MACRO_FIELDS) if target_vector[i] > 0
+    ))
+    print(f"latency ms: p50={p50:.2f} p95={p95:.2f} max={timings.max():.2f} (budget {args.budget_ms:.0f})")
+
+    # A plan may stop short of its targets only when the next serving wouldn't fit the budget
+    tracked = target_vector > 0
+    short = totals[tracked] < target_vector[tracked] * (1 - args.tolerance)
+    budget_spent = args.budget - cost < costs.min()
+
+    if p95 > args.budget_ms:
+        print("FAIL: p95 over latency budget")
+    elif short.any() and not budget_spent and not truncated:
+        print("FAIL: plan stopped short of its targets")
+    else:
+        print("PASS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+#------------------------------------------------------------
+# Synthetic data generator for scale testing
+#
+# Fills every table of the fridgefriend schema with referentially
+# consistent rows at a configurable scale. Primary keys are written
+# explicitly, so the target tables are emptied first; point it at a
+# scratch database, not one with data you want to keep.
+#
+# Every table draws from its own random stream seeded with
+# (--seed, table name), so the same seed and counts always produce
+# the same rows and changing one table's count doesn't reshuffle
+# the others.
+#
+# Rows are loaded with multi-row INSERTs (executemany), or with
+# LOAD DATA LOCAL INFILE when --infile is given (the server needs
+# local_infile=ON).
+#
+# Run from the api folder:
+#   python -m benchmarks.generate_data --scale 10
+#   python -m benchmarks.generate_data --set clients=100000 --set scans=1000000 --infile
+#------------------------------------------------------------
+import argparse
+import csv
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from backend.db_connection import connect
+
+# Row counts at --scale 1; every count is multiplied by the scale factor
+BASE_COUNTS = {
+    'clients': 1000,
+    'admins': 10,
+    'advisors': 50,
+    'workouts': 100,
+    'ingredients': 2000,
+    'recipes': 500,
+    'brands': 100,
+    'scans': 10000,
+    'leftovers': 500,
+}
+
+# Children per parent row, as (min, max) ranges; these don't scale
+FAN_OUT = {
+    'recipe_ingredients': (3, 8),
+    'recipe_brands': (1, 3),
+    'fridge_ingredients': (5, 25),
+    'fridge_lots': (1, 3),
+    'shopping_list_ingredients': (2, 12),
+    'client_advisors': (1, 2),
+    'client_workouts': (0, 4),
+    'meal_plans': (1, 5),
+    'nutrition_logs': (5, 15),
+}
+
+# Fraction of scans that fail; each failed scan gets an Error_Log row
+SCAN_FAILURE_RATE = 0.1
+
+FIRST_NAMES = ['Ava', 'Ben', 'Carla', 'Dev', 'Elena', 'Felix', 'Grace', 'Hugo', 'Iris', 'Jonah',
+               'Kira', 'Liam', 'Maya', 'Noah', 'Olivia', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Theo']
+LAST_NAMES = ['Adams', 'Brown', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hall', 'Ito', 'Jones',
+              'Khan', 'Lopez', 'Miller', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Smith', 'Tanaka', 'Walsh']
+FOODS = ['Chicken Breast', 'Ground Beef', 'Quinoa', 'Brown Rice', 'Lentils', 'Broccoli', 'Spinach',
+         'Salmon', 'Tofu', 'Eggs', 'Greek Yogurt', 'Almonds', 'Oats', 'Sweet Potato', 'Avocado',
+         'Black Beans', 'Cheddar', 'Milk', 'Bread', 'Pasta', 'Tomato', 'Carrot', 'Apple', 'Banana']
+DISHES = ['Bowl', 'Stew', 'Wrap', 'Salad', 'Curry', 'Stir Fry', 'Soup', 'Bake', 'Skillet', 'Tacos']
+WORKOUTS = ['Running', 'Cycling', 'Swimming', 'Hiking', 'Pilates', 'Yoga', 'Jump Rope', 'Rowing',
+            'Weight Lifting', 'HIIT']
+UNITS = ['cup', 'pound', 'piece', 'gram', 'ounce', 'tbsp']
+DIETARY_RESTRICTIONS = ['none', 'gluten', 'peanuts', 'tree nuts', 'soy', 'fish', 'shellfish', 'egg',
+                        'sesame', 'dairy']
+DIETS = ['balanced', 'vegetarian', 'vegan', 'keto', 'high-protein', 'low-carb']
+AGE_GROUPS = ['child', 'teen', 'adult', 'senior']
+ERROR_MESSAGES = ['Ingredient scan failed', 'Barcode checksum mismatch', 'Scan returned empty result',
+                  'Timeout during scan', 'User input error']
+
+
+class Generator(object):
+    """Yields the rows of each table for the given counts, seed and base date"""
+
+    def __init__(self, counts, seed, today):
+        self.counts = counts
+        self.seed = seed
+        self.today = today
+
+    def rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def users(self):
+        rng = self.rng('User')
+        total = self.counts['clients'] + self.counts['admins'] + self.counts['advisors']
+        for user_id in range(1, total + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield (user_id, first, last, f"{first.lower()}{user_id}",
+                   f"pw{rng.getrandbits(40):x}", f"{first.lower()}.{last.lower()}{user_id}@example.com")
+
+    def admins(self):
+        first_user = self.counts['clients'] + 1
+        for admin_id in range(1, self.counts['admins'] + 1):
+            yield (admin_id, first_user + admin_id - 1)
+
+    def personal_constraints(self):
+        rng = self.rng('Personal_Constraints')
+        for pc_id in range(1, self.counts['clients'] + 1):
+            restrictions = ','.join(sorted(set(rng.choices(DIETARY_RESTRICTIONS, k=rng.randint(1, 3)))))
+            yield (pc_id, round(rng.uniform(40, 250), 2), restrictions, rng.choice(DIETS), rng.choice(AGE_GROUPS))
+
+    def workouts(self):
+        rng = self.rng('Workout')
+        for workout_id in range(1, self.counts['workouts'] + 1):
+            weight = round(rng.uniform(5, 100), 2) if rng.random() < 0.3 else None
+            yield (workout_id, rng.choice(WORKOUTS), rng.randint(10, 90), weight, rng.randint(100, 900))
+
+    def ingredients(self):
+        rng = self.rng('Ingredient')
+        for ingredient_id in range(1, self.counts['ingredients'] + 1):
+            expires = self.today + datetime.timedelta(days=rng.randint(-30, 180))
+            yield (ingredient_id, expires, f"{rng.choice(FOODS)} #{ingredient_id}")
+
+    def recipes(self):
+        rng = self.rng('Recipe')
+        for recipe_id in range(1, self.counts['recipes'] + 1):
+            name = f"{rng.choice(FOODS)} {rng.choice(DISHES)} #{recipe_id}"
+            yield (recipe_id, name, f"Cook the {name.lower()} and serve.", rng.randint(1, 6))
+
+    def fridges(self):
+        for fridge_id in range(1, self.counts['clients'] + 1):
+            yield (fridge_id,)
+
+    def shopping_lists(self):
+        for list_id in range(1, self.counts['clients'] + 1):
+            yield (list_id,)
+
+    def scans(self):
+        rng = self.rng('Food_Scan_Log')
+        for log_id in range(1, self.counts['scans'] + 1):
+            scanned = datetime.datetime.combine(self.today, datetime.time()) - datetime.timedelta(
+                seconds=rng.randint(0, 90 * 86400))
+            status = 'FAILED' if rng.random() < SCAN_FAILURE_RATE else 'SUCCESS'
+            yield (log_id, rng.randint(1, self.counts['ingredients']), scanned, status)
+
+    def brands(self):
+        rng = self.rng('Brand')
+        for brand_id in range(1, self.counts['brands'] + 1):
+            yield (brand_id, f"{rng.choice(LAST_NAMES)} Foods #{brand_id}", rng.random() < 0.8)
+
+    def macronutrients(self):
+        rng = self.rng('Macronutrients')
+        # One row per ingredient, so macro_id = ingredient_id
+        for ingredient_id in range(1, self.counts['ingredients'] + 1):
+            yield (ingredient_id, ingredient_id,
+                   round(rng.uniform(0, 30), 2), round(rng.uniform(0, 25), 2), round(rng.uniform(0, 10), 2),
+                   round(rng.uniform(0, 50), 2), round(rng.uniform(0, 600), 2), rng.randint(10, 400),
+                   round(rng.uniform(0, 60), 2))
+
+    def clients(self):
+        rng = self.rng('Client')
+        for client_id in range(1, self.counts['clients'] + 1):
+            log_id = rng.randint(1, self.counts['scans']) if self.counts['scans'] else None
+            # Client n owns personal constraints, fridge and shopping list n
+            yield (client_id, client_id, client_id, client_id, client_id, log_id, int(rng.random() < 0.05))
+
+    def health_advisors(self):
+        rng = self.rng('Health_Advisor')
+        first_user = self.counts['clients'] + self.counts['admins'] + 1
+        for advisor_id in range(1, self.counts['advisors'] + 1):
+            yield (advisor_id, rng.randint(1, 30), first_user + advisor_id - 1)
+
+    def recipe_ingredients(self):
+        rng = self.rng('Recipe_Ingredient')
+        for recipe_id in range(1, self.counts['recipes'] + 1):
+            for ingredient_id in self.sample(rng, 'recipe_ingredients', self.counts['ingredients']):
+                yield (recipe_id, ingredient_id, round(rng.uniform(0.25, 4), 2), rng.choice(UNITS))
+
+    def recipe_brands(self):
+        rng = self.rng('Recipe_Brand')
+        for recipe_id in range(1, self.counts['recipes'] + 1):
+            for brand_id in self.sample(rng, 'recipe_brands', self.counts['brands']):
+                yield (recipe_id, brand_id)
+
+    def fridge_ingredients(self):
+        rng = self.rng('Fridge_Ingredient')
+        for fridge_id in range(1, self.counts['clients'] + 1):
+            for ingredient_id in self.sample(rng, 'fridge_ingredients', self.counts['ingredients']):
+                unit = rng.choice(UNITS)
+                # Lots of the same ingredient bought at different times
+                days = rng.sample(range(-14, 60), rng.randint(*FAN_OUT['fridge_lots']))
+                for expires in sorted(self.today + datetime.timedelta(days=day) for day in days):
+                    yield (fridge_id, ingredient_id, expires, round(rng.uniform(0.5, 10), 2), unit,
+                           expires < self.today)
+
+    def shopping_list_ingredients(self):
+        rng = self.rng('ShoppingList_Ingredient')
+        for list_id in range(1, self.counts['clients'] + 1):
+            for ingredient_id in self.sample(rng, 'shopping_list_ingredients', self.counts['ingredients']):
+                quantity = round(rng.uniform(0.5, 5), 2)
+                yield (list_id, ingredient_id, quantity, rng.choice(UNITS),
+                       round(quantity * rng.uniform(0.5, 6), 2))
+
+    def client_advisors(self):
+        rng = self.rng('Client_Health_Advisor')
+        for client_id in range(1, self.counts['clients'] + 1):
+            for advisor_id in self.sample(rng, 'client_advisors', self.counts['advisors']):
+                yield (client_id, advisor_id)
+
+    def client_workouts(self):
+        rng = self.rng('Client_Workout')
+        for client_id in range(1, self.counts['clients'] + 1):
+            for workout_id in self.sample(rng, 'client_workouts', self.counts['workouts']):
+                yield (client_id, workout_id)
+
+    def meal_plans(self):
+        rng = self.rng('Meal_Plan')
+        meal_id = 0
+        for pc_id in range(1, self.counts['clients'] + 1):
+            for recipe_id in self.sample(rng, 'meal_plans', self.counts['recipes']):
+                meal_id += 1
+                yield (meal_id, pc_id, recipe_id, rng.randint(1, 3))
+
+    def leftovers(self):
+        rng = self.rng('Leftover')
+        for leftover_id in range(1, self.counts['leftovers'] + 1):
+            created = datetime.datetime.combine(self.today, datetime.time()) - datetime.timedelta(
+                minutes=rng.randint(0, 8 * 24 * 60))
+            expires = created.date() + datetime.timedelta(days=5)
+            yield (leftover_id, rng.randint(1, self.counts['recipes']), rng.randint(1, 4), expires < self.today,
+                   created, expires)
+
+    def nutrition_logs(self):
+        rng = self.rng('Nutrition_Tracking')
+        tracking_id = 0
+        for client_id in range(1, self.counts['clients'] + 1):
+            for _ in range(rng.randint(*FAN_OUT['nutrition_logs'])):
+                tracking_id += 1
+                yield (tracking_id, client_id,
+                       round(rng.uniform(20, 200), 2), round(rng.uniform(20, 120), 2), round(rng.uniform(5, 50), 2),
+                       round(rng.uniform(500, 4000), 2), round(rng.uniform(10, 100), 2), rng.randint(1200, 3500),
+                       round(rng.uniform(50, 400), 2))
+
+    def error_logs(self):
+        rng = self.rng('Error_Log')
+        error_id = 0
+        # Replays the scan stream so every failed scan gets exactly one error
+        for log_id, _, scanned, status in self.scans():
+            if status != 'FAILED':
+                continue
+            error_id += 1
+            yield (error_id, rng.randint(1, self.counts['clients']), log_id, rng.choice(ERROR_MESSAGES), scanned)
+
+    def sample(self, rng, fan_out, population):
+        """Distinct ids in 1..population, as many as the fan-out range allows"""
+        low, high = FAN_OUT[fan_out]
+        k = min(rng.randint(low, high), population)
+        return rng.sample(range(1, population + 1), k)
+
+
+def tables(generator):
+    """(table, columns, rows) in foreign key order"""
+    return [
+        ('User', 'user_id, f_name, l_name, username, password, email', generator.users),
+        ('Admin', 'admin_id, user_id', generator.admins),
+        ('Personal_Constraints', 'pc_id, budget, dietary_restrictions, personal_diet, age_group',
+         generator.personal_constraints),
+        ('Workout', 'workout_id, name, quantity, weight, calories_burnt', generator.workouts),
+        ('Ingredient', 'ingredient_id, expiration_date, name', generator.ingredients),
+        ('Recipe', 'recipe_id, name, instructions, servings', generator.recipes),
+        ('Fridge_Inventory', 'fridge_id', generator.fridges),
+        ('Shopping_List', 'list_id', generator.shopping_lists),
+        ('Food_Scan_Log', 'log_id, ingredient_id, timestamp, status', generator.scans),
+        ('Brand', 'brand_id, name, is_trusted', generator.brands),
+        ('Macronutrients', 'macro_id, ingredient_id, protein, fat, fiber, vitamin, sodium, calories, carbs',
+         generator.macronutrients),
+        ('Client', 'client_id, user_id, pc_id, fridge_id, list_id, log_id, flag', generator.clients),
+        ('Health_Advisor', 'advisor_id, experience_years, user_id', generator.health_advisors),
+        ('Recipe_Ingredient', 'recipe_id, ingredient_id, quantity, unit', generator.recipe_ingredients),
+        ('Recipe_Brand', 'recipe_id, brand_id', generator.recipe_brands),
+        ('Fridge_Ingredient', 'fridge_id, ingredient_id, expires_on, quantity, unit, is_expired',
+         generator.fridge_ingredients),
+        ('ShoppingList_Ingredient', 'list_id, ingredient_id, quantity, unit, cost',
+         generator.shopping_list_ingredients),
+        ('Client_Health_Advisor', 'client_id, advisor_id', generator.client_advisors),
+        ('Client_Workout', 'client_id, workout_id', generator.client_workouts),
+        ('Meal_Plan', 'meal_id, pc_id, recipe_id, quantity', generator.meal_plans),
+        ('Leftover', 'leftover_id, recipe_id, quantity, is_expired, created_at, expires_on', generator.leftovers),
+        ('Nutrition_Tracking', 'tracking_id, client_id, protein, fat, fiber, sodium, vitamins, calories, carbs',
+         generator.nutrition_logs),
+        ('Error_Log', 'error_id, client_id, log_id, message, timestamp', generator.error_logs),
+    ]
+
+
+# Same statement the seed script ends with
+RECIPE_MACROS_QUERY = '''
+    INSERT INTO Recipe_Macros (recipe_id, protein, fat, fiber, vitamin, sodium, calories, carbs)
+    SELECT r.recipe_id,
+           COALESCE(SUM(ri.quantity * m.protein), 0),
+           COALESCE(SUM(ri.quantity * m.fat), 0),
+           COALESCE(SUM(ri.quantity * m.fiber), 0),
+           COALESCE(SUM(ri.quantity * m.vitamin), 0),
+           COALESCE(SUM(ri.quantity * m.sodium), 0),
+           COALESCE(SUM(ri.quantity * m.calories), 0),
+           COALESCE(SUM(ri.quantity * m.carbs), 0)
+    FROM Recipe r
+    LEFT JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+    LEFT JOIN Macronutrients m ON m.ingredient_id = ri.ingredient_id
+    GROUP BY r.recipe_id
+'''
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_with_inserts(cursor, table, columns, rows, batch_size):
+    """executemany rewrites the INSERT into multi-row VALUES statements"""
+    placeholders = ', '.join(['%s'] * len(columns.split(',')))
+    query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+    total = 0
+    for chunk in chunks(rows, batch_size):
+        cursor.executemany(query, chunk)
+        total += len(chunk)
+    return total
+
+
+def load_with_infile(cursor, table, columns, rows):
+    """Write the rows to a temporary CSV and bulk load it"""
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    total = 0
+    try:
+        with os.fdopen(handle, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            for row in rows:
+                writer.writerow([csv_value(value) for value in row])
+                total += 1
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' ({columns})",
+            (path,)
+        )
+    finally:
+        os.remove(path)
+    return total
+
+
+def csv_value(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with synthetic data for scale testing")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier applied to every base row count")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=COUNT',
+                        help=f"override one count ({', '.join(BASE_COUNTS)}), e.g. --set scans=1000000")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--today', type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="date expirations and scan times are relative to (YYYY-MM-DD)")
+    parser.add_argument('--infile', action='store_true', help="load with LOAD DATA LOCAL INFILE")
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows per multi-row INSERT")
+    parser.add_argument('--dry-run', action='store_true', help="print the row counts without loading")
+    args = parser.parse_args()
+
+    counts = {name: max(1, int(count * args.scale)) for name, count in BASE_COUNTS.items()}
+    for override in args.set:
+        name, _, value = override.partition('=')
+        if name not in counts:
+            parser.error(f"unknown count '{name}', expected one of: {', '.join(counts)}")
+        counts[name] = int(value)
+
+    generator = Generator(counts, args.seed, args.today)
+    print("counts: " + ", ".join(f"{name}={count}" for name, count in counts.items()))
+
+    if args.dry_run:
+        for table, _, rows in tables(generator):
+            print(f"{table:<26} {sum(1 for _ in rows()):>10} rows")
+        return
+
+    conn = connect(local_infile=args.infile, autocommit=False)
+    cursor = conn.cursor()
+    started = time.perf_counter()
+
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0, UNIQUE_CHECKS = 0")
+        for table, _, _ in reversed(tables(generator)):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("TRUNCATE TABLE Recipe_Macros")
+        cursor.execute("TRUNCATE TABLE Expiry_Digest")
+
+        for table, columns, rows in tables(generator):
+            table_start = time.perf_counter()
+            if args.infile:
+                total = load_with_infile(cursor, table, columns, rows())
+            else:
+                total = load_with_inserts(cursor, table, columns, rows(), args.batch_size)
+            conn.commit()
+            elapsed = time.perf_counter() - table_start
+            print(f"{table:<26} {total:>10} rows  {elapsed:7.2f} s  {total / max(elapsed, 1e-9):>10.0f} rows/s")
+
+        cursor.execute(RECIPE_MACROS_QUERY)
+        conn.commit()
+        print(f"{'Recipe_Macros':<26} {cursor.rowcount:>10} rows")
+
+        # The change log triggers logged every row loaded; start the log over,
+        # as the seed script does
+        cursor.execute("TRUNCATE TABLE Change_Log")
+    finally:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1, UNIQUE_CHECKS = 1")
+        conn.close()
+
+    print(f"done in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
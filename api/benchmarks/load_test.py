@@ -0,0 +1,274 @@
+#------------------------------------------------------------
+# HTTP load test for the API blueprints
+#
+# Replays a weighted mix of the calls the Streamlit pages make
+# (fridge, meal plans, logs, nutritionist dashboards...) from a
+# pool of client threads and reports throughput and p50/p95/p99
+# latency per route.
+#
+# By default the app is booted in-process with create_app() on a
+# local port, against the database in api/.env; fill that database
+# first with benchmarks.generate_data. Use --url to load an API
+# that is already running (e.g. the docker compose web-api).
+#
+# Results can be saved as a named baseline in benchmarks/baselines/
+# and later runs compared against it; the comparison exits non-zero
+# when a route's p95 or throughput regressed past --tolerance.
+#
+# Run from the api folder:
+#   python -m benchmarks.load_test --duration 30 --concurrency 8 --save sf10
+#   python -m benchmarks.load_test --duration 30 --concurrency 8 --compare sf10
+#------------------------------------------------------------
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+# (weight, method, path, body) as the Streamlit pages call them, including the
+# trailing-slash redirects some of those paths take. Paths and bodies are
+# formatted with ids picked from the loaded dataset.
+ROUTE_MIX = [
+    (12, 'GET', '/fridge?client_id={client_id}', None),
+    (6, 'GET', '/fridge/digest?client_id={client_id}', None),
+    (3, 'GET', '/fridge/expiring?client_id={client_id}&days=3&limit=10', None),
+    (6, 'GET', '/users/fridge/{user_id}', None),
+    (10, 'GET', '/meal-plans?client_id={client_id}', None),
+    (4, 'GET', '/meal-plans/recipes?include=macros', None),
+    (4, 'GET', '/leftovers', None),
+    (8, 'GET', '/logs/nutrition/{client_id}', None),
+    (3, 'GET', '/logs/scans?client_id={client_id}', None),
+    (1, 'GET', '/logs/scans', None),
+    (2, 'GET', '/logs/errors', None),
+    (3, 'GET', '/ingredients', None),
+    (3, 'GET', '/macronutrients', None),
+    (6, 'GET', '/users/nutritionist/{advisor_id}/clients', None),
+    (4, 'GET', '/users/nutritionist/{advisor_id}/dietary-alerts', None),
+    (4, 'GET', '/users/nutritionist/{advisor_id}/nutrition-summary', None),
+    (4, 'GET', '/users/client/{client_id}/workouts', None),
+    (3, 'GET', '/users/auth/student/{client_id}', None),
+    (3, 'GET', '/shopping-lists?client_id={client_id}', None),
+    (2, 'POST', '/logs/nutrition', {
+        "client_id": '{client_id}', "protein": 80, "fat": 60, "fiber": 25, "sodium": 2000,
+        "vitamins": 50, "calories": 2100, "carbs": 250
+    }),
+    (1, 'POST', '/logs/scans', {"ingredient_id": '{ingredient_id}', "status": 'SUCCESS'}),
+]
+
+
+def dataset_ranges():
+    """Largest ids of the entities the route mix picks from"""
+    from backend.db_connection import connect
+
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT (SELECT MAX(client_id) FROM Client) AS client_id,
+                   (SELECT MAX(user_id) FROM Client) AS user_id,
+                   (SELECT MAX(advisor_id) FROM Health_Advisor) AS advisor_id,
+                   (SELECT MAX(ingredient_id) FROM Ingredient) AS ingredient_id
+        ''')
+        return {name: value or 1 for name, value in cursor.fetchone().items()}
+    finally:
+        conn.close()
+
+
+def start_local_server():
+    """Boot create_app() on a free local port in a background thread"""
+    from werkzeug.serving import make_server
+    from backend.rest_entry import create_app
+
+    # Per-request access logs would drown out the report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # Keep scheduled jobs and the outbox relay's polling from competing with the
+    # measured requests for the database
+    os.environ.setdefault('JOB_SCHEDULER', 'false')
+    os.environ.setdefault('OUTBOX_RELAY', 'false')
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def render(value, ids):
+    if isinstance(value, str):
+        formatted = value.format(**ids)
+        # Bodies hold ids as '{name}' placeholders; send them back as numbers
+        return int(formatted) if value.startswith('{') and formatted.isdigit() else formatted
+    if isinstance(value, dict):
+        return {key: render(item, ids) for key, item in value.items()}
+    return value
+
+
+def call(base_url, method, path, body, timeout):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def worker(base_url, ranges, seed, deadline, warmup_until, timeout, results, lock):
+    rng = random.Random(seed)
+    weights = [weight for weight, _, _, _ in ROUTE_MIX]
+    local = {}
+
+    while time.perf_counter() < deadline:
+        _, method, path, body = rng.choices(ROUTE_MIX, weights)[0]
+        ids = {name: rng.randint(1, high) for name, high in ranges.items()}
+        status, latency = call(base_url, method, render(path, ids), render(body, ids), timeout)
+
+        if time.perf_counter() < warmup_until:
+            continue
+        timings = local.setdefault(f"{method} {path}", {"latencies": [], "errors": 0})
+        timings["latencies"].append(latency)
+        if status == 0 or status >= 500:
+            timings["errors"] += 1
+
+    with lock:
+        for route, timings in local.items():
+            merged = results.setdefault(route, {"latencies": [], "errors": 0})
+            merged["latencies"].extend(timings["latencies"])
+            merged["errors"] += timings["errors"]
+
+
+def percentile(sorted_values, quantile):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(quantile * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results, duration):
+    routes = {}
+    for route, timings in sorted(results.items()):
+        latencies = sorted(timings["latencies"])
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": timings["errors"],
+            "rps": round(len(latencies) / duration, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+    everything = sorted(latency for timings in results.values() for latency in timings["latencies"])
+    routes["ALL"] = {
+        "requests": len(everything),
+        "errors": sum(timings["errors"] for timings in results.values()),
+        "rps": round(len(everything) / duration, 2),
+        "p50_ms": round(percentile(everything, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(everything, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(everything, 0.99) * 1000, 2),
+    }
+    return routes
+
+
+def print_report(routes):
+    print(f"{'route':<56} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, stats in routes.items():
+        print(f"{route:<56} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+
+def compare(routes, baseline, tolerance):
+    """Routes whose p95 rose or throughput fell by more than the tolerance"""
+    regressions = []
+    for route, stats in routes.items():
+        before = baseline.get(route)
+        if not before or not stats['requests']:
+            continue
+        if stats['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {before['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms")
+        if route == 'ALL' and stats['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {before['rps']:.1f} -> {stats['rps']:.1f} req/s")
+        if stats['errors'] > before['errors']:
+            regressions.append(f"{route}: errors {before['errors']} -> {stats['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with the Streamlit pages' route mix")
+    parser.add_argument('--url', help="base URL of a running API; boots create_app() locally if omitted")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds to run, after warmup")
+    parser.add_argument('--warmup', type=float, default=3.0, help="seconds of requests left out of the results")
+    parser.add_argument('--concurrency', type=int, default=8, help="number of client threads")
+    parser.add_argument('--timeout', type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', metavar='NAME', help="save the results as baselines/NAME.json")
+    parser.add_argument('--compare', metavar='NAME', help="compare the results against baselines/NAME.json")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    ranges = dataset_ranges()
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        server, base_url = start_local_server()
+
+    print(f"loading {base_url} with {args.concurrency} threads for {args.duration:.0f} s "
+          f"(+{args.warmup:.0f} s warmup), ids: " + ", ".join(f"{k}<={v}" for k, v in ranges.items()))
+
+    results = {}
+    lock = threading.Lock()
+    warmup_until = time.perf_counter() + args.warmup
+    deadline = warmup_until + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, ranges, args.seed + i, deadline, warmup_until,
+                                              args.timeout, results, lock))
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if server is not None:
+        server.shutdown()
+
+    routes = summarize(results, args.duration)
+    print_report(routes)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, 'w') as f:
+            json.dump({
+                "duration": args.duration,
+                "concurrency": args.concurrency,
+                "ranges": ranges,
+                "routes": routes,
+            }, f, indent=2, sort_keys=True)
+        print(f"saved baseline {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        regressions = compare(routes, baseline["routes"], args.tolerance)
+        if regressions:
+            print(f"FAIL: {len(regressions)} regression(s) against baseline '{args.compare}'")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"PASS: no regressions against baseline '{args.compare}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+#------------------------------------------------------------
+# Query performance regression suite
+#
+# Runs the SQL statements the blueprints execute, looked up by name
+# in the backend.queries registry, against a fixed dataset and
+# records, per statement, the median execution time, the rows MySQL
+# examined (from performance_schema) and the EXPLAIN plan. Results are compared to a baseline stored in
+# benchmarks/baselines/, and the run fails when a statement starts
+# doing a full table scan it isn't allowed, or its median time
+# regresses past the tolerance.
+#
+# Writes (UPDATE/DELETE/INSERT) run inside a transaction that is
+# rolled back, so the dataset stays the same between runs.
+#
+# The baselines assume the dataset made by:
+#   python -m benchmarks.generate_data --scale 10 --seed 42 --today 2026-01-01
+#
+# Timings depend on the machine, so the baseline isn't shipped: take
+# one with --save on that dataset before a change (it is written to
+# benchmarks/baselines/queries.json), then run without --save after
+# it. Without a baseline only the full scan checks run.
+#
+# Run from the api folder:
+#   python -m benchmarks.query_regression --save
+#   python -m benchmarks.query_regression
+#------------------------------------------------------------
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from backend import queries
+from backend.db_connection import connect
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+# Tables whose row counts identify the dataset a baseline was taken on
+DATASET_TABLES = ('Client', 'Ingredient', 'Recipe', 'Recipe_Ingredient', 'Fridge_Ingredient',
+                  'Food_Scan_Log', 'Nutrition_Tracking', 'Meal_Plan')
+
+# Registered statements (see backend/queries) to check, with the parameters to
+# run them with. full_scans names the EXPLAIN tables (aliases, as EXPLAIN reports
+# them) that may legitimately be read in full, like the catalog listings that
+# return every row.
+CASES = [
+    {"query": 'fridge.inventory_for_client', "params": (42,), "full_scans": ()},
+    {"query": 'fridge.expiring_for_client', "params": (42, 7, 10), "full_scans": ()},
+    {"query": 'digest.for_client', "params": (42,), "full_scans": ()},
+    # Reads the last week of run history, which is small and all of it is needed
+    {"query": 'jobs.scheduled_stats', "params": (), "full_scans": ('jr',)},
+    {"query": 'jobs.recent_runs_for_job', "params": ('fridge.mark_expired', 50), "full_scans": ()},
+    {"query": 'job_queue.claim_next', "params": (), "full_scans": ()},
+    {"query": 'job_queue.by_id', "params": (1,), "full_scans": ()},
+    {"query": 'digest.build_range', "params": ('2026-01-01', 1, 5000, '2026-01-01', '2026-01-01', 3),
+     "full_scans": ()},
+    {"query": 'fridge.ingredient_in_fridge', "params": (42, 7), "full_scans": ()},
+    {"query": 'fridge.mark_expired', "params": (), "full_scans": ()},
+    {"query": 'fridge.delete_expired', "params": (), "full_scans": ()},
+    {"query": 'fridge.delete_expired_after_grace', "params": (), "full_scans": ()},
+    # The lots' running totals are materialized and read in full (one fridge's lots)
+    {"query": 'fridge.consume_stock', "params": (42, 7, 1.5, 1.5), "full_scans": ('<derived2>',)},
+    {"query": 'users.fridge_for_user', "params": (42,), "full_scans": ()},
+    {"query": 'users.student_auth', "params": (42,), "full_scans": ()},
+    {"query": 'users.nutritionist_clients', "params": (7,), "full_scans": ()},
+    {"query": 'users.nutritionist_dietary_alerts', "params": (7,), "full_scans": ()},
+    {"query": 'users.nutritionist_nutrition_summary', "params": (7,), "full_scans": ()},
+    {"query": 'users.client_workouts', "params": (42,), "full_scans": ()},
+    {"query": 'users.update', "params": (False, None, None, None, False, None, None, None,
+                                       True, None, None, 'new@example.com', False, None, None, None, None, None, 42),
+     "full_scans": ()},
+    {"query": 'meal_plans.for_client', "params": (42,), "full_scans": ()},
+    {"query": 'meal_plans.recipes_with_macros', "params": (), "full_scans": ('r',)},
+    {"query": 'meal_plans.optimizer_candidates', "params": ('peanuts|egg',),
+     "full_scans": ('r', 'ShoppingList_Ingredient', '<derived2>', '<derived3>')},
+    {"query": 'meal_plans.refresh_recipe_macros', "params": ('[1, 2, 3]',), "full_scans": ('ids',)},
+    {"query": 'meal_plans.refresh_macros_for_macro', "params": (7,), "full_scans": ()},
+    {"query": 'recipes.cook_shortages', "params": (2, 42, 7), "full_scans": ()},
+    {"query": 'recipes.consume_for_recipe', "params": (2, 42, 7), "full_scans": ('<derived2>',)},
+    {"query": 'leftovers.all', "params": (), "full_scans": ('l',)},
+    {"query": 'leftovers.eat_soon', "params": (), "full_scans": ()},
+    {"query": 'leftovers.expiring_within', "params": (3,), "full_scans": ()},
+    {"query": 'leftovers.mark_expired', "params": (), "full_scans": ()},
+    {"query": 'leftovers.expired', "params": (), "full_scans": ()},
+    {"query": 'leftovers.good', "params": (), "full_scans": ()},
+    {"query": 'leftovers.delete_expired', "params": (), "full_scans": ()},
+    {"query": 'leftovers.delete_marked_expired', "params": (), "full_scans": ()},
+    {"query": 'leftovers.delete_expired_after_grace', "params": (), "full_scans": ()},
+    {"query": 'logs.scans_for_client', "params": (42,), "full_scans": ()},
+    {"query": 'logs.all_errors', "params": (), "full_scans": ('el',)},
+    {"query": 'logs.nutrition_for_client', "params": (42,), "full_scans": ()},
+    {"query": 'ingredients.macros_for_ingredient', "params": (7,), "full_scans": ()},
+    {"query": 'macros.macros_for_ingredient', "params": (7,), "full_scans": ()},
+    {"query": 'ingredients.delete', "params": (7,), "full_scans": ()},
+    {"query": 'ingredients.delete_many', "params": ('[7, 8, 9]',), "full_scans": ('ids',)},
+    {"query": 'meal_plans.recipes_using_ingredients', "params": ('[7, 8, 9]',), "full_scans": ('ids',)},
+    {"query": 'macros.update', "params": (True, 3, 3, 12.5) + (False, 3, 3, None) * 6 + (3, 3, 7),
+     "full_scans": ()},
+    {"query": 'macros.lock_many', "params": ('[7, 8, 9]',), "full_scans": ('ids',)},
+    {"query": 'macros.update_many', "params": ('[{"macro_id": 7, "protein": 12.5}, {"macro_id": 8, "fat": 3}]',),
+     "full_scans": ('items',)},
+    {"query": 'meal_plans.refresh_macros_for_macros', "params": ('[7, 8, 9]',), "full_scans": ('ids',)},
+    {"query": 'fridge.known_ingredients_bulk', "params": ('[{"ingredient_id": 7}, {"ingredient_id": 8}]',),
+     "full_scans": ('items',)},
+    {"query": 'changes.bounds', "params": (), "full_scans": ()},
+    {"query": 'fridge.changes_for_client', "params": (42, 1000, 2000), "full_scans": ('<derived2>',)},
+    {"query": 'ingredients.changes', "params": (1000, 2000), "full_scans": ('<derived2>',)},
+    {"query": 'macros.changes', "params": (1000, 2000), "full_scans": ('<derived2>',)},
+    {"query": 'recipes.changes', "params": (1000, 2000), "full_scans": ('<derived2>',)},
+    {"query": 'leftovers.changes', "params": (1000, 2000), "full_scans": ('<derived2>',)},
+    {"query": 'outbox.latest', "params": (), "full_scans": ()},
+    {"query": 'outbox.after', "params": (1000, 500), "full_scans": ()},
+    {"query": 'outbox.by_ids', "params": ('[1001, 1002, 1003]',), "full_scans": ('ids',)},
+    {"query": 'events.client_scope', "params": (42,), "full_scans": ()},
+    {"query": 'events.advisor_clients', "params": (7,), "full_scans": ()},
+    {"query": 'shopping_lists.items_for_client', "params": (42,), "full_scans": ()},
+    # The derived tables are materialized per call and are always read in full
+    {"query": 'shopping_lists.generate_for_client', "params": (42,),
+     "full_scans": ('<derived2>', '<derived3>')},
+    {"query": 'shopping_lists.prune_for_client', "params": (42, 42),
+     "full_scans": ('<derived2>', '<derived3>')},
+]
+
+# Prefixes of statements that change data and must be rolled back
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def explain(cursor, sql, params):
+    cursor.execute('EXPLAIN ' + sql, params)
+    return [
+        {"table": row.get('table'), "type": row.get('type'), "key": row.get('key'), "rows": row.get('rows')}
+        for row in cursor.fetchall()
+    ]
+
+
+def rows_examined(cursor):
+    """Rows examined by this session's previous statement, or None without performance_schema access"""
+    try:
+        cursor.execute('''
+            SELECT ROWS_EXAMINED
+            FROM performance_schema.events_statements_history
+            WHERE THREAD_ID = PS_CURRENT_THREAD_ID()
+            ORDER BY EVENT_ID DESC
+            LIMIT 1
+        ''')
+        row = cursor.fetchone()
+        return row['ROWS_EXAMINED'] if row else None
+    except Exception:
+        return None
+
+
+def run_case(conn, case, runs):
+    cursor = conn.cursor()
+    sql = queries.get(case["query"])
+    is_write = sql.lstrip().upper().startswith(WRITE_STATEMENTS)
+    timings = []
+    examined = None
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        cursor.execute(sql, case["params"])
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+        examined = rows_examined(cursor)
+        if is_write:
+            conn.rollback()
+
+    plan = explain(cursor, sql, case["params"])
+    conn.rollback()
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "rows_examined": examined,
+        "plan": plan,
+    }
+
+
+def dataset_counts(conn):
+    cursor = conn.cursor()
+    counts = {}
+    for table in DATASET_TABLES:
+        cursor.execute(f'SELECT COUNT(*) AS n FROM {table}')
+        counts[table] = cursor.fetchone()['n']
+    return counts
+
+
+def check(case, result, baseline, tolerance, min_delta_ms):
+    """Failures and warnings for one case against its baseline (which may be None)"""
+    failures, warnings = [], []
+
+    allowed = set(case["full_scans"])
+    for step in result["plan"]:
+        if step["type"] == 'ALL' and step["table"] not in allowed:
+            failures.append(f"full table scan of {step['table']} (~{step['rows']} rows)")
+
+    if baseline is None:
+        return failures, warnings
+
+    before = baseline["median_ms"]
+    if result["median_ms"] > before * (1 + tolerance) and result["median_ms"] - before > min_delta_ms:
+        failures.append(f"median {before:.2f} -> {result['median_ms']:.2f} ms")
+
+    old_plan = {step["table"]: step for step in baseline["plan"]}
+    for step in result["plan"]:
+        old = old_plan.get(step["table"])
+        if old and (old["type"], old["key"]) != (step["type"], step["key"]):
+            warnings.append(f"plan for {step['table']} changed: {old['type']}/{old['key']} -> "
+                            f"{step['type']}/{step['key']}")
+
+    if baseline.get("rows_examined") and result["rows_examined"] is not None:
+        if result["rows_examined"] > baseline["rows_examined"] * (1 + tolerance):
+            warnings.append(f"rows examined {baseline['rows_examined']} -> {result['rows_examined']}")
+
+    return failures, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the blueprints' SQL for plan and latency regressions")
+    parser.add_argument('--baseline', default='queries', help="baseline name in benchmarks/baselines/")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--runs', type=int, default=5, help="executions per statement (median is kept)")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed relative slowdown (0.5 = 50%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="ignore slowdowns smaller than this")
+    parser.add_argument('--only', help="run only the cases whose name starts with this prefix")
+    args = parser.parse_args()
+
+    path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    baseline = {}
+    if os.path.exists(path) and not args.save:
+        with open(path) as f:
+            baseline = json.load(f)
+    elif not args.save:
+        print(f"No baseline at {path}: checking plans only. Take one with --save on the reference dataset.")
+
+    conn = connect(autocommit=False)
+    try:
+        counts = dataset_counts(conn)
+        if baseline and baseline.get("dataset") != counts:
+            print(f"WARNING: dataset differs from the baseline's ({baseline.get('dataset')} vs {counts}); "
+                  f"timings are not comparable")
+
+        results = {}
+        failed = 0
+        for case in CASES:
+            if args.only and not case["query"].startswith(args.only):
+                continue
+            try:
+                result = run_case(conn, case, args.runs)
+            except Exception as e:
+                conn.rollback()
+                print(f"ERROR {case['query']}: {str(e)}")
+                failed += 1
+                continue
+            results[case["query"]] = result
+
+            failures, warnings = check(case, result, baseline.get("cases", {}).get(case["query"]),
+                                       args.tolerance, args.min_delta_ms)
+            status = 'FAIL' if failures else 'ok'
+            print(f"{status:<4} {case['query']:<40} {result['median_ms']:>9.2f} ms  "
+                  f"examined={result['rows_examined']}")
+            for message in failures:
+                print(f"       fail: {message}")
+            for message in warnings:
+                print(f"       warn: {message}")
+            failed += bool(failures)
+    finally:
+        conn.close()
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({"dataset": counts, "cases": results}, f, indent=2, sort_keys=True)
+        print(f"saved baseline {path}")
+
+    if failed:
+        print(f"FAIL: {failed} statement(s) regressed")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#------------------------------------------------------------
+# Concurrency stress test for the fridge add/consume endpoints
+#
+# Many client threads hammer the same fridge rows with
+# POST /fridge/<id>, /fridge/<id>/consume, /fridge/bulk and
+# /fridge/bulk/consume at once, then the final quantities are
+# checked against the sum of what every thread added and took out
+# (summed over each ingredient's lots).
+# A lost update (two requests reading the same quantity and each
+# writing back its own result) shows up as a mismatch.
+#
+# The rows start with as much stock as the threads will consume in
+# total, so no consume is ever clamped at zero and the expected
+# quantity is exact whatever order the requests run in.
+#
+# By default the app is booted in-process against the database in
+# api/.env; use --url to target a running API. The tested rows are
+# deleted again at the end.
+#
+# Run from the api folder:
+#   python -m benchmarks.stress_fridge --threads 16 --requests 200
+#------------------------------------------------------------
+import argparse
+import datetime
+import random
+import sys
+import threading
+from decimal import Decimal
+
+from backend.db_connection import connect
+from benchmarks.load_test import call, start_local_server
+
+
+def pick_rows(conn, fridge_id, count):
+    """Ingredient ids to test with, none of which is already in the fridge"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT i.ingredient_id
+        FROM Ingredient i
+        WHERE NOT EXISTS (
+            SELECT 1 FROM Fridge_Ingredient fi
+            WHERE fi.fridge_id = %s AND fi.ingredient_id = i.ingredient_id
+        )
+        ORDER BY i.ingredient_id
+        LIMIT %s
+    ''', (fridge_id, count))
+    return [row['ingredient_id'] for row in cursor.fetchall()]
+
+
+def plan_requests(rng, fridge_id, ingredient_ids, count):
+    """
+    A thread's requests and the net change each ingredient should see.
+    Quantities are whole quarters so the DECIMAL(10,2) totals are exact.
+    """
+    requests, added, consumed = [], {}, {}
+    for _ in range(count):
+        kind = rng.choice(('add', 'consume', 'bulk_add', 'bulk_consume'))
+        picked = rng.sample(ingredient_ids, rng.randint(1, len(ingredient_ids))) \
+            if kind.startswith('bulk') else [rng.choice(ingredient_ids)]
+        amounts = {ingredient_id: rng.randint(1, 20) / 4 for ingredient_id in picked}
+
+        totals = consumed if kind.endswith('consume') else added
+        for ingredient_id, amount in amounts.items():
+            totals[ingredient_id] = totals.get(ingredient_id, 0) + Decimal(str(amount))
+
+        if kind == 'add':
+            (ingredient_id, amount), = amounts.items()
+            requests.append(('POST', f'/fridge/{ingredient_id}', {"fridge_id": fridge_id, "quantity": amount}))
+        elif kind == 'consume':
+            (ingredient_id, amount), = amounts.items()
+            requests.append(('POST', f'/fridge/{ingredient_id}/consume',
+                             {"fridge_id": fridge_id, "quantity": amount}))
+        else:
+            path = '/fridge/bulk' if kind == 'bulk_add' else '/fridge/bulk/consume'
+            items = [{"ingredient_id": ingredient_id, "quantity": amount} for ingredient_id, amount in amounts.items()]
+            requests.append(('POST', path, {"fridge_id": fridge_id, "items": items}))
+    return requests, added, consumed
+
+
+def run_thread(base_url, requests, timeout, failures, lock):
+    for method, path, body in requests:
+        status, _ = call(base_url, method, path, body, timeout)
+        if status not in (200, 201):
+            with lock:
+                failures.append(f"{method} {path} -> {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the fridge endpoints for lost updates under concurrency")
+    parser.add_argument('--url', help="base URL of a running API; boots create_app() locally if omitted")
+    parser.add_argument('--fridge-id', type=int, default=1)
+    parser.add_argument('--ingredients', type=int, default=5, help="fridge rows all threads compete for")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="requests per thread")
+    parser.add_argument('--timeout', type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    conn = connect(autocommit=True)
+    ingredient_ids = pick_rows(conn, args.fridge_id, args.ingredients)
+    if len(ingredient_ids) < args.ingredients:
+        print(f"only {len(ingredient_ids)} ingredients are not already in fridge {args.fridge_id}")
+        sys.exit(1)
+
+    plans = [plan_requests(random.Random(args.seed + i), args.fridge_id, ingredient_ids, args.requests)
+             for i in range(args.threads)]
+    added = {ingredient_id: sum(plan[1].get(ingredient_id, 0) for plan in plans) for ingredient_id in ingredient_ids}
+    consumed = {ingredient_id: sum(plan[2].get(ingredient_id, 0) for plan in plans) for ingredient_id in ingredient_ids}
+
+    # Starting stock goes in a lot of its own; adds go to the catalog-dated lots
+    # and consumes drain whichever lot expires first, so only the totals are checked
+    initial = {ingredient_id: consumed[ingredient_id] + 1 for ingredient_id in ingredient_ids}
+    expires_on = datetime.date.today() + datetime.timedelta(days=365)
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, expires_on, quantity) VALUES (%s, %s, %s, %s)',
+        [(args.fridge_id, ingredient_id, expires_on, initial[ingredient_id]) for ingredient_id in ingredient_ids]
+    )
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if base_url is None:
+        server, base_url = start_local_server()
+
+    print(f"{args.threads} threads x {args.requests} requests on fridge {args.fridge_id}, "
+          f"ingredients {ingredient_ids}")
+    failures = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=run_thread, args=(base_url, plan[0], args.timeout, failures, lock))
+               for plan in plans]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cursor.execute('''
+            SELECT ingredient_id, SUM(quantity) AS quantity FROM Fridge_Ingredient
+            WHERE fridge_id = %s AND ingredient_id IN %s
+            GROUP BY ingredient_id
+        ''', (args.fridge_id, ingredient_ids))
+        final = {row['ingredient_id']: row['quantity'] for row in cursor.fetchall()}
+    finally:
+        if server is not None:
+            server.shutdown()
+        cursor.execute('DELETE FROM Fridge_Ingredient WHERE fridge_id = %s AND ingredient_id IN %s',
+                       (args.fridge_id, ingredient_ids))
+        conn.close()
+
+    mismatches = []
+    for ingredient_id in ingredient_ids:
+        expected = initial[ingredient_id] + added[ingredient_id] - consumed[ingredient_id]
+        actual = final.get(ingredient_id)
+        status = 'ok' if actual == expected else 'LOST'
+        print(f"{status:<4} ingredient {ingredient_id:<6} expected {expected:>10} got {actual}")
+        if actual != expected:
+            mismatches.append(ingredient_id)
+
+    for failure in failures[:10]:
+        print(f"  request failed: {failure}")
+    if mismatches or failures:
+        print(f"FAIL: {len(mismatches)} row(s) lost updates, {len(failures)} request(s) failed")
+        sys.exit(1)
+    print("PASS: no lost updates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import requests
+import streamlit as st
+
+API_BASE_URL = "http://web-api:4000"
+
+# Seconds between checks for changes
+CHECK_EVERY = 3
+
+
+def rerun_on_changes(scope, types=None, every=CHECK_EVERY):
+    """
+    Rerun the page when the API reports a change for scope ({"client_id": ...}
+    or {"advisor_id": ...}), optionally only for some types ("fridge",
+    "leftovers", "dietary_alerts"). A fragment asks GET /events/poll every
+    `every` seconds, which the API answers from memory, so the page's own
+    requests only run again when something changed. Call it before the page
+    loads its data.
+    """
+    params = dict(scope)
+    if types:
+        params['types'] = ','.join(types)
+    cursor_key = f"events:{sorted(params.items())}"
+
+    @st.fragment(run_every=every)
+    def watch():
+        cursor = st.session_state.get(cursor_key)
+        try:
+            response = requests.get(f"{API_BASE_URL}/events/poll",
+                                    params=dict(params, after=cursor) if cursor else params, timeout=5)
+            if response.status_code != 200:
+                return
+            feed = response.json()
+        except Exception:
+            # Try again on the next check
+            return
+
+        st.session_state[cursor_key] = feed['cursor']
+        if feed['events'] or feed['resync']:
+            st.rerun()
+
+    # This run loads everything again, so only changes from now on matter
+    st.session_state.pop(cursor_key, None)
+    watch()
@@ -0,0 +1,40 @@
+import requests
+import streamlit as st
+
+API_BASE_URL = "http://web-api:4000"
+
+
+def synced_rows(endpoint, keys, params=None):
+    """
+    Rows of an API change feed (e.g. "fridge/changes"), kept in the session and
+    brought up to date with only the rows that changed since the last call.
+    keys are the fields that identify a row. Returns None if the API can't be reached.
+    """
+    params = dict(params or {})
+    cache_key = f"sync:{endpoint}:{sorted(params.items())}"
+    cached = st.session_state.get(cache_key)
+    if cached:
+        params['since'] = cached['token']
+
+    try:
+        response = requests.get(f"{API_BASE_URL}/{endpoint}", params=params)
+        if response.status_code == 410:
+            # The token expired: start over with a full sync
+            st.session_state.pop(cache_key, None)
+            return synced_rows(endpoint, keys, {k: v for k, v in params.items() if k != 'since'})
+        if response.status_code != 200:
+            st.error(f"Error fetching data from {endpoint}: Status code {response.status_code}")
+            return cached['rows'] if cached else None
+        feed = response.json()
+    except Exception as e:
+        st.error(f"Error fetching data from {endpoint}: {str(e)}")
+        return cached['rows'] if cached else None
+
+    rows = {} if feed['full'] or not cached else {tuple(row[k] for k in keys): row for row in cached['rows']}
+    for row in feed['deleted']:
+        rows.pop(tuple(row[k] for k in keys), None)
+    for row in feed['upserted']:
+        rows[tuple(row[k] for k in keys)] = row
+
+    st.session_state[cache_key] = {"token": feed['token'], "rows": list(rows.values())}
+    return st.session_state[cache_key]['rows']
@@ -4,6 +4,7 @@ import requests
 import time
 from datetime import datetime
 from modules.nav import SideBarLinks
+from modules.live import rerun_on_changes
 
 
 # API base URL
@@ -35,6 +36,24 @@ def get_api_data(endpoint):
        return []
 
 
+def get_batch_data(endpoints):
+   """Fetch several GET endpoints in one round trip through the API's /batch route"""
+   try:
+       response = requests.post(
+           f"{API_BASE_URL}/batch",
+           json={"requests": [{"method": "GET", "path": f"/{endpoint}"} for endpoint in endpoints]}
+       )
+       if response.status_code != 200:
+           return [[] for _ in endpoints]
+       return [
+           result['body'] if result['status'] == 200 else []
+           for result in response.json()['responses']
+       ]
+   except Exception as e:
+       st.error(f"Error: {str(e)}")
+       return [[] for _ in endpoints]
+
+
 def api_request(method, endpoint, data=None):
    try:
        if method == "PUT":
@@ -67,6 +86,19 @@ def parse_date(date_str):
    return None
 
 
+# Reload the page when the fridge or the leftovers change
+rerun_on_changes({"client_id": 1}, types=("fridge", "leftovers"))
+
+
+# Load the data for every widget on this page in a single request
+fridge_inventory, meal_plans, leftovers_data, expiring_items = get_batch_data([
+   "fridge?client_id=1",
+   "meal-plans?client_id=1",
+   "leftovers",
+   "fridge/digest?client_id=1"
+])
+
+
 # Create columns for dashboard widgets
 col1, col2 = st.columns(2)
 
@@ -75,8 +107,6 @@ col1, col2 = st.columns(2)
 with col1:
    st.subheader("🧊 Fridge Inventory")
   
-   fridge_inventory = get_api_data("fridge?client_id=1")
-  
    if fridge_inventory:
        # Create DataFrame and calculate days until expiration
        df = pd.DataFrame(fridge_inventory)
@@ -103,21 +133,18 @@ with col1:
                use_container_width=True
            )
           
-           # Show expiring items
-           if 'days_left' in df.columns:
-               expiring_items = df[(df['days_left'] >= 0) & (df['days_left'] <= 5) & (~df['is_expired'])]
-              
-               if not expiring_items.empty:
-                   st.subheader("⚠️ Items Expiring Soon")
-                   for _, item in expiring_items.iterrows():
-                       if item['days_left'] <= 0:
-                           st.error(f"⚠️ {item['name']} - Expires today! ({item['quantity']} remaining)")
-                       elif item['days_left'] == 1:
-                           st.warning(f"⚠️ {item['name']} - Expires tomorrow ({item['quantity']} remaining)")
-                       else:
-                           st.info(f"ℹ️ {item['name']} - Expires in {int(item['days_left'])} days ({item['quantity']} remaining)")
-               else:
-                   st.success("No items expiring soon! Your fridge is in good shape.")
+           # Show expiring items from the daily expiry digest (soonest first)
+           if expiring_items:
+               st.subheader("⚠️ Items Expiring Soon")
+               for item in expiring_items:
+                   if item['days_left'] <= 0:
+                       st.error(f"⚠️ {item['name']} - Expires today! ({item['quantity']} remaining)")
+                   elif item['days_left'] == 1:
+                       st.warning(f"⚠️ {item['name']} - Expires tomorrow ({item['quantity']} remaining)")
+                   else:
+                       st.info(f"ℹ️ {item['name']} - Expires in {int(item['days_left'])} days ({item['quantity']} remaining)")
+           else:
+               st.success("No items expiring soon! Your fridge is in good shape.")
        else:
            st.dataframe(df, use_container_width=True)
    else:
@@ -128,8 +155,6 @@ with col1:
 with col2:
    st.subheader("🍲 Meal Suggestions")
   
-   meal_plans = get_api_data("meal-plans?client_id=1")
-  
    if meal_plans:
        # Display meal plans table
        meal_df = pd.DataFrame(meal_plans)
@@ -154,9 +179,6 @@ st.markdown("---")
 st.subheader("🥡 Leftovers")
 
 
-leftovers_data = get_api_data("leftovers")
-
-
 if leftovers_data:
    # Display leftovers table
    leftovers_df = pd.DataFrame(leftovers_data)
@@ -192,8 +214,3 @@ if leftovers_data:
        st.dataframe(leftovers_df, use_container_width=True)
 else:
    st.info("No leftovers available.")
-
-
-# Refresh button
-if st.button("Refresh Data", key="refresh"):
-   st.rerun()
@@ -4,6 +4,8 @@ import requests
 import time
 from datetime import datetime, timedelta
 from modules.nav import SideBarLinks
+from modules.sync import synced_rows
+from modules.live import rerun_on_changes
 
 
 # API base URL
@@ -25,6 +27,10 @@ st.title("🧊 Fridge Inventory")
 st.write("Manage your fridge ingredients and keep track of what's in stock")
 
 
+# Reload the page when the fridge changes
+rerun_on_changes({"client_id": st.session_state.get('user_id', 1)}, types=("fridge",))
+
+
 # API helper functions
 def get_user_fridge_id():
    """Get the user's fridge ID"""
@@ -57,30 +63,15 @@ def get_fridge_inventory():
    """Get the fridge inventory for the current user"""
    client_id = st.session_state.get('user_id', 1)  # Default to user 1 if not set
   
-   try:
-       response = requests.get(f"{API_BASE_URL}/fridge?client_id={client_id}")
-       if response.status_code == 200:
-           return response.json()
-       else:
-           st.error(f"Error fetching inventory: {response.status_code}")
-           return []
-   except Exception as e:
-       st.error(f"Error: {str(e)}")
-       return []
+   # Only the lots that changed since the last rerun are downloaded
+   inventory = synced_rows("fridge/changes", ('fridge_id', 'ingredient_id', 'expiration_date'),
+                           {'client_id': client_id})
+   return sorted(inventory or [], key=lambda item: item.get('name') or '')
 
 
 def get_ingredients():
    """Get all ingredients"""
-   try:
-       response = requests.get(f"{API_BASE_URL}/ingredients")
-       if response.status_code == 200:
-           return response.json()
-       else:
-           st.error(f"Error fetching ingredients: {response.status_code}")
-           return []
-   except Exception as e:
-       st.error(f"Error: {str(e)}")
-       return []
+   return synced_rows("ingredients/changes", ('ingredient_id',)) or []
 
 
 def add_ingredient_to_fridge(ingredient_id, quantity):
@@ -239,9 +230,6 @@ with tab1:
            st.metric("Expired", len(df[df['status'] == 'Expired']))
    else:
        st.info("Your fridge is empty! Add some ingredients to get started.")
-  
-   if st.button("Refresh Inventory"):
-       st.rerun()
 
 
 # Add Items Tab
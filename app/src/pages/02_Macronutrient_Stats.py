@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import requests
-from datetime import datetime
 from modules.nav import SideBarLinks
 
 
@@ -36,6 +35,19 @@ def get_fridge_inventory(client_id=1):
        return []
 
 
+# Function to get the soonest expiring fridge items
+def get_expiring_items(client_id=1, days=3):
+   try:
+       response = requests.get(f"{API_BASE_URL}/fridge/expiring?client_id={client_id}&days={days}")
+       if response.status_code == 200:
+           return response.json()
+       else:
+           return []
+   except Exception as e:
+       st.error(f"Error: {str(e)}")
+       return []
+
+
 # Function to get meal plans
 def get_meal_plans(client_id=1):
    try:
@@ -150,31 +162,15 @@ with tab4:
    st.markdown("### ⚠️ Items Expiring Soon")
    st.markdown("---")
   
-   if inventory and any('expiration_date' in item for item in inventory):
-       today = datetime.now().date()
-       expiring_soon = []
+   expiring_soon = get_expiring_items(days=3)
+   if expiring_soon:
+       expiring_df = pd.DataFrame(expiring_soon)
       
-       for item in inventory:
-           if item.get("expiration_date"):
-               try:
-                   exp_date = datetime.strptime(item["expiration_date"], '%Y-%m-%d').date()
-                   days_left = (exp_date - today).days
-                  
-                   if 0 <= days_left <= 3 and not item.get("is_expired", False):
-                       item['days_left'] = days_left
-                       expiring_soon.append(item)
-               except:
-                   pass
+       # Rename columns for better display
+       renamed_df = expiring_df[['name', 'expiration_date', 'days_left']].copy()
+       renamed_df.columns = ['Ingredient', 'Expiration Date', 'Days Left']
       
-       if expiring_soon:
-           expiring_df = pd.DataFrame(expiring_soon)
-          
-           # Rename columns for better display
-           renamed_df = expiring_df[['name', 'expiration_date', 'days_left']].copy()
-           renamed_df.columns = ['Ingredient', 'Expiration Date', 'Days Left']
-          
-           st.table(renamed_df)
-       else:
-           st.success("No items expiring soon!")
+       st.table(renamed_df)
    else:
-       st.info("No expiration data available.")
+       st.success("No items expiring soon!")
+
@@ -2,8 +2,8 @@
 import streamlit as st
 import pandas as pd
 import requests
-from datetime import datetime, timedelta
 from modules.nav import SideBarLinks
+from modules.live import rerun_on_changes
 
 
 # Add sidebar navigation
@@ -21,6 +21,10 @@ st.title("Leftovers Tracker")
 st.write("Track and manage your leftover meals to reduce food waste")
 
 
+# Reload the page when the leftovers change (Ben is client 1, as on the dashboard)
+rerun_on_changes({"client_id": 1}, types=("leftovers",))
+
+
 # Create tabs
 tab1, tab2 = st.tabs(["Current Leftovers", "Add New Leftover"])
 
@@ -39,23 +43,13 @@ with tab1:
            if data:
                leftovers = []
                for item in data:
-                   # Calculate days left (assuming leftovers last 5 days)
-                   created_date = datetime.now().date() - timedelta(days=1)  # Mock date
-                   expire_date = created_date + timedelta(days=5)
-                   days_left = (expire_date - datetime.now().date()).days
-                  
-                   status = "Good"
-                   if days_left <= 0 or item.get('is_expired', False):
-                       status = "Expired"
-                   elif days_left <= 1:
-                       status = "Eat Soon"
-                  
+                   # The API works out days left and status from the stored expiry date
                    leftovers.append({
                        "ID": item.get('leftover_id'),
                        "Meal": item.get('recipe_name', 'Unknown'),
                        "Servings": item.get('quantity', 1),
-                       "Days Left": days_left,
-                       "Status": status
+                       "Days Left": item.get('days_left'),
+                       "Status": item.get('status', 'Good')
                    })
               
                # Group leftovers by status
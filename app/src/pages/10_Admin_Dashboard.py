@@ -148,6 +148,21 @@ if leftovers_data:
 else:
     st.info("No leftovers found or unable to fetch data.")
 
+# Scheduled Jobs (the API runs these on a timer; durations and rows over the last week)
+st.subheader("⏱️ Scheduled Jobs")
+scheduled_jobs = get_api_data("jobs/scheduled")
+
+if scheduled_jobs:
+    jobs_df = pd.DataFrame(scheduled_jobs)
+    display_cols = ['job_name', 'schedule', 'last_scheduled_for', 'last_status', 'last_duration_ms',
+                    'last_row_count', 'runs', 'failures', 'avg_duration_ms', 'max_duration_ms']
+    st.dataframe(
+        jobs_df[[col for col in display_cols if col in jobs_df.columns]],
+        use_container_width=True
+    )
+else:
+    st.info("No scheduled jobs found or unable to fetch job data.")
+
 # Refresh Button
 if st.button("Refresh Dashboard Data"):
     st.rerun()
\ No newline at end of file
@@ -218,6 +218,37 @@ with tab3:
                             st.error(f"Error updating macronutrients: {response.status_code}")
                     except Exception as e:
                         st.error(f"Error: {str(e)}")
+
+        # Bulk update: a CSV with a macro_id column plus any of the macronutrient columns
+        st.subheader("Bulk Update from a Supplier Feed")
+        feed = st.file_uploader("Upload a CSV (macro_id, protein, fat, fiber, vitamin, sodium, calories, carbs):", type="csv")
+
+        if feed is not None:
+            feed_df = pd.read_csv(feed)
+            st.dataframe(feed_df.head(20), use_container_width=True)
+
+            if 'macro_id' not in feed_df.columns:
+                st.error("The CSV needs a macro_id column")
+            elif st.button(f"Update {len(feed_df)} Rows"):
+                # Empty cells become None, which leaves that value unchanged
+                feed_df = feed_df.astype(object).where(feed_df.notna(), None)
+                items = feed_df.to_dict(orient='records')
+
+                try:
+                    response = requests.patch(f"{API_BASE_URL}/macronutrients/bulk", json={'items': items})
+                    if response.status_code == 200:
+                        result = response.json()
+                        counts = result.get('counts', {})
+                        st.success(f"Updated {counts.get('updated', 0)} of {len(items)} rows")
+
+                        problems = [item for item in result.get('results', []) if item.get('status') != 'updated']
+                        if problems:
+                            st.warning(f"{len(problems)} rows were not updated")
+                            st.dataframe(pd.DataFrame(problems), use_container_width=True)
+                    else:
+                        st.error(f"Error updating macronutrients: {response.status_code}")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
     else:
         st.info("No macronutrient data found or unable to fetch data.")
 
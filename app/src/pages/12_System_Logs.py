@@ -33,7 +33,7 @@ def get_api_data(endpoint):
         return []
 
 # Create tabs for different log types
-tab1, tab2 = st.tabs(["Error Logs", "Food Scan Logs"])
+tab1, tab2, tab3 = st.tabs(["Error Logs", "Food Scan Logs", "API Performance"])
 
 # Tab 1: Error Logs
 with tab1:
@@ -152,6 +152,55 @@ with tab2:
     if st.button("Refresh Scan Logs"):
         st.rerun()
 
+# Tab 3: API Performance
+with tab3:
+    st.subheader("API Performance")
+    st.write("Latency and database work per API route since the API server started")
+    
+    # Get per-route metrics summary from API
+    route_metrics = get_api_data("metrics/summary")
+    
+    if route_metrics:
+        metrics_df = pd.DataFrame(route_metrics)
+        
+        # Overall numbers across all routes
+        total_requests = int(metrics_df['requests'].sum())
+        total_errors = int(metrics_df['errors'].sum())
+        slowest = metrics_df.sort_values('avg_ms', ascending=False).iloc[0]
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Requests", total_requests)
+        with col2:
+            st.metric("Server Errors", total_errors)
+        with col3:
+            st.metric("Slowest Route (avg)", f"{slowest['avg_ms']} ms", help=f"{slowest['method']} {slowest['route']}")
+        
+        display_names = {
+            'route': 'Route', 'method': 'Method', 'requests': 'Requests', 'errors': 'Errors',
+            'avg_ms': 'Avg ms', 'p95_ms': 'p95 ms (≤)', 'max_ms': 'Max ms',
+            'avg_sql_statements': 'SQL Statements', 'avg_sql_ms': 'SQL ms',
+            'avg_sql_rows': 'SQL Rows', 'avg_response_bytes': 'Response Bytes'
+        }
+        st.dataframe(
+            metrics_df[list(display_names.keys())].rename(columns=display_names),
+            use_container_width=True
+        )
+        
+        # Where time goes: SQL vs everything else, for the ten slowest routes
+        slowest_routes = metrics_df.sort_values('avg_ms', ascending=False).head(10).copy()
+        slowest_routes['label'] = slowest_routes['method'] + ' ' + slowest_routes['route']
+        slowest_routes['Other ms'] = (slowest_routes['avg_ms'] - slowest_routes['avg_sql_ms']).clip(lower=0)
+        st.bar_chart(
+            slowest_routes.set_index('label')[['avg_sql_ms', 'Other ms']].rename(columns={'avg_sql_ms': 'SQL ms'})
+        )
+    else:
+        st.info("No API metrics collected yet.")
+    
+    # Refresh button
+    if st.button("Refresh Performance Data"):
+        st.rerun()
+
 # Refresh All Data button at the bottom
 if st.button("Refresh All Data"):
     st.rerun()
\ No newline at end of file
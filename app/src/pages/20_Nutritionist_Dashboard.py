@@ -4,6 +4,7 @@ import requests
 import logging
 from datetime import datetime
 from modules.nav import SideBarLinks
+from modules.live import rerun_on_changes
 
 # Set up logging
 logging.basicConfig(format='%(filename)s:%(lineno)s:%(levelname)s -- %(message)s', level=logging.INFO)
@@ -69,6 +70,9 @@ def get_nutrition_summary(advisor_id):
         logger.error(f"Exception fetching nutrition summary: {str(e)}")
         return []
 
+# Reload the page when a client's dietary alerts may have changed
+rerun_on_changes({"advisor_id": advisor_id})
+
 # Get data
 clients = get_clients(advisor_id)
 dietary_alerts = get_dietary_alerts(advisor_id)
@@ -78,6 +78,18 @@ def delete_meal_plan(meal_id):
         st.error(f"Error deleting meal plan: {str(e)}")
         return False
 
+# Function to ask the API for an optimized meal plan
+def optimize_meal_plan(data):
+    try:
+        response = requests.post(f"{API_BASE_URL}/meal-plans/optimize", json=data)
+        if response.status_code in [200, 201]:
+            return response.json()
+        st.error(f"Error optimizing meal plan: {response.status_code}")
+        return None
+    except Exception as e:
+        st.error(f"Error optimizing meal plan: {str(e)}")
+        return None
+
 # Get data
 clients = get_clients()
 recipes = get_recipes()
@@ -200,4 +212,50 @@ if meal_plans:
                 st.success("Meal plan deleted successfully!")
                 st.rerun()
 else:
-    st.info("No meal plans available to update or delete.")
\ No newline at end of file
+    st.info("No meal plans available to update or delete.")
+
+# Section 4: Suggest a Meal Plan
+st.markdown("---")
+st.subheader("Suggest a Meal Plan")
+st.write("Let FridgeFriend pick recipes that fit a client's macro targets, diet and budget.")
+
+with st.form("optimize_meal_plan"):
+    client_pc_ids = {
+        f"{client['f_name']} {client['l_name']}": client['pc_id']
+        for client in clients if client.get('pc_id')
+    }
+    
+    if client_pc_ids:
+        selected_client = st.selectbox("Select Client:", list(client_pc_ids.keys()))
+        optimize_pc_id = client_pc_ids[selected_client]
+    else:
+        optimize_pc_id = st.number_input("Personal Constraints ID:", min_value=1, value=1)
+    
+    days = st.number_input("Days to Plan:", min_value=1, max_value=14, value=1)
+    save_plan = st.checkbox("Save suggested plan as meal plans")
+    optimize_submitted = st.form_submit_button("Suggest Plan")
+    
+    if optimize_submitted:
+        result = optimize_meal_plan({
+            "pc_id": int(optimize_pc_id),
+            "days": int(days),
+            "save": save_plan
+        })
+        
+        if result:
+            if result['plan']:
+                plan_df = pd.DataFrame(result['plan'])[['recipe_name', 'servings', 'cost']]
+                plan_df.rename(columns={'recipe_name': 'Recipe', 'servings': 'Servings', 'cost': 'Cost'}, inplace=True)
+                st.table(plan_df)
+                
+                totals_df = pd.DataFrame([
+                    {"Macro": field.title(), "Planned": result['totals'][field], "Target": target}
+                    for field, target in result['targets'].items()
+                ])
+                st.table(totals_df)
+                st.write(f"Estimated cost: ${result['cost']:.2f}")
+                
+                if result.get('saved'):
+                    st.success("Suggested plan saved!")
+            else:
+                st.info("No recipes fit this client's constraints.")
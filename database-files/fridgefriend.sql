@@ -6,13 +6,18 @@ USE fridgefriend;
 
 
 -- First, create all tables
+
+-- The tables the API edits field by field (PUT) carry a version that every
+-- such update bumps, so a client can send the version it read and have the
+-- update refused (409) if someone changed the row in between.
 CREATE TABLE User (
   user_id INT AUTO_INCREMENT PRIMARY KEY,
   f_name VARCHAR(50) NOT NULL,
   l_name VARCHAR(50) NOT NULL,
   username VARCHAR(50) UNIQUE NOT NULL,
   password VARCHAR(255) NOT NULL,
-  email VARCHAR(100) UNIQUE NOT NULL
+  email VARCHAR(100) UNIQUE NOT NULL,
+  version INT NOT NULL DEFAULT 1
 );
 
 
@@ -28,7 +33,8 @@ CREATE TABLE Personal_Constraints (
   budget DECIMAL(10,2),
   dietary_restrictions VARCHAR(50),
   personal_diet VARCHAR(50),
-  age_group VARCHAR(20)
+  age_group VARCHAR(20),
+  version INT NOT NULL DEFAULT 1
 );
 
 
@@ -37,21 +43,27 @@ CREATE TABLE Workout (
   name VARCHAR(100) NOT NULL,
   quantity INT,
   weight DECIMAL(5,2),
-  calories_burnt INT
+  calories_burnt INT,
+  version INT NOT NULL DEFAULT 1
 );
 
 
+-- Deleting an ingredient cascades to every row that refers to it: fridge lots,
+-- recipe and shopping list rows, its macronutrients, its scans and their errors.
+-- Clients whose log_id pointed at a deleted scan keep their row (log_id NULL).
 CREATE TABLE Ingredient (
   ingredient_id INT AUTO_INCREMENT PRIMARY KEY,
   expiration_date DATE,
-  name VARCHAR(100)
+  name VARCHAR(100),
+  version INT NOT NULL DEFAULT 1
 );
 
 
 CREATE TABLE Recipe (
   recipe_id INT AUTO_INCREMENT PRIMARY KEY,
   name VARCHAR(100) NOT NULL,
-  instructions TEXT
+  instructions TEXT,
+  servings INT NOT NULL DEFAULT 1
 );
 
 
@@ -70,7 +82,7 @@ CREATE TABLE Food_Scan_Log (
   ingredient_id INT,
   timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
   status VARCHAR(50),
-  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id)
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE
 );
 
 
@@ -81,9 +93,11 @@ CREATE TABLE Brand (
 );
 
 
+-- One row per ingredient: the unique key makes looking up an ingredient's
+-- macronutrients a single probe.
 CREATE TABLE Macronutrients (
   macro_id INT AUTO_INCREMENT PRIMARY KEY,
-  ingredient_id INT,
+  ingredient_id INT NOT NULL,
   protein DECIMAL(8,2),
   fat DECIMAL(8,2),
   fiber DECIMAL(8,2),
@@ -91,7 +105,9 @@ CREATE TABLE Macronutrients (
   sodium DECIMAL(8,2),
   calories INT,
   carbs DECIMAL(8,2),
-  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id)
+  version INT NOT NULL DEFAULT 1,
+  UNIQUE KEY uq_macronutrients_ingredient (ingredient_id),
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE
 );
 
 
@@ -107,7 +123,7 @@ CREATE TABLE Client (
   FOREIGN KEY (pc_id) REFERENCES Personal_Constraints(pc_id),
   FOREIGN KEY (fridge_id) REFERENCES Fridge_Inventory(fridge_id),
   FOREIGN KEY (list_id) REFERENCES Shopping_List(list_id),
-  FOREIGN KEY (log_id) REFERENCES Food_Scan_Log(log_id)
+  FOREIGN KEY (log_id) REFERENCES Food_Scan_Log(log_id) ON DELETE SET NULL
 );
 
 
@@ -126,16 +142,23 @@ CREATE TABLE Recipe_Ingredient (
   unit VARCHAR(20),
   PRIMARY KEY (recipe_id, ingredient_id),
   FOREIGN KEY (recipe_id) REFERENCES Recipe(recipe_id),
-  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id)
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE
 );
 
 
-CREATE TABLE Ingredient_Macronutrient (
-  ingredient_id INT,
-  macro_id INT,
-  PRIMARY KEY (ingredient_id, macro_id),
-  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id),
-  FOREIGN KEY (macro_id) REFERENCES Macronutrients(macro_id)
+-- Materialized macro totals for each recipe (sum of Recipe_Ingredient quantity
+-- times the ingredient's Macronutrients row). Kept current by the API whenever
+-- macronutrients or recipe ingredients change.
+CREATE TABLE Recipe_Macros (
+  recipe_id INT PRIMARY KEY,
+  protein DECIMAL(12,2) NOT NULL DEFAULT 0,
+  fat DECIMAL(12,2) NOT NULL DEFAULT 0,
+  fiber DECIMAL(12,2) NOT NULL DEFAULT 0,
+  vitamin DECIMAL(12,2) NOT NULL DEFAULT 0,
+  sodium DECIMAL(12,2) NOT NULL DEFAULT 0,
+  calories DECIMAL(12,2) NOT NULL DEFAULT 0,
+  carbs DECIMAL(12,2) NOT NULL DEFAULT 0,
+  FOREIGN KEY (recipe_id) REFERENCES Recipe(recipe_id)
 );
 
 
@@ -148,27 +171,38 @@ CREATE TABLE Recipe_Brand (
 );
 
 
+-- One row per lot: the stock of an ingredient in a fridge that expires on the
+-- same day. Adding stock with a date the fridge already holds tops up that lot;
+-- consuming takes from the earliest lots first. The expiry indexes let the
+-- per-fridge "expiring soon" lookups and the expiry sweep read a range of
+-- expires_on without joining Ingredient.
 CREATE TABLE Fridge_Ingredient (
   fridge_id INT,
   ingredient_id INT,
+  expires_on DATE NOT NULL,
   quantity DECIMAL(10,2) NOT NULL,
   unit VARCHAR(20),
   is_expired BOOLEAN DEFAULT FALSE,
-  PRIMARY KEY (fridge_id, ingredient_id),
+  PRIMARY KEY (fridge_id, ingredient_id, expires_on),
+  INDEX idx_fridge_ingredient_fridge_expiry (fridge_id, expires_on),
+  INDEX idx_fridge_ingredient_expiry (expires_on),
   FOREIGN KEY (fridge_id) REFERENCES Fridge_Inventory(fridge_id),
-  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id)
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE
 );
 
 
+-- generated is set on the rows POST /shopping-lists/generate added; only those
+-- (without a cost) are removed again when they stop being short
 CREATE TABLE ShoppingList_Ingredient (
   list_id INT,
   ingredient_id INT,
   quantity DECIMAL(10,2) NOT NULL,
   unit VARCHAR(20),
   cost DECIMAL(10,2),
+  generated BOOLEAN NOT NULL DEFAULT FALSE,
   PRIMARY KEY (list_id, ingredient_id),
   FOREIGN KEY (list_id) REFERENCES Shopping_List(list_id),
-  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id)
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE
 );
 
 
@@ -177,16 +211,24 @@ CREATE TABLE Meal_Plan (
   pc_id INT,
   recipe_id INT,
   quantity INT,
+  version INT NOT NULL DEFAULT 1,
   FOREIGN KEY (pc_id) REFERENCES Personal_Constraints(pc_id),
   FOREIGN KEY (recipe_id) REFERENCES Recipe(recipe_id)
 );
 
 
+-- Leftovers keep for 5 days after they're stored unless the API says otherwise.
+-- Status (Good / Eat Soon / Expired) is evaluated from expires_on.
 CREATE TABLE Leftover (
   leftover_id INT AUTO_INCREMENT PRIMARY KEY,
   recipe_id INT,
   quantity INT,
   is_expired BOOLEAN DEFAULT FALSE,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  expires_on DATE NOT NULL DEFAULT (CURRENT_DATE + INTERVAL 5 DAY),
+  version INT NOT NULL DEFAULT 1,
+  INDEX idx_leftover_expiry (expires_on),
+  INDEX idx_leftover_expired (is_expired, expires_on),
   FOREIGN KEY (recipe_id) REFERENCES Recipe(recipe_id)
 );
 
@@ -230,7 +272,98 @@ CREATE TABLE Error_Log (
   message TEXT,
   timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (client_id) REFERENCES Client(client_id),
-  FOREIGN KEY (log_id) REFERENCES Food_Scan_Log(log_id)
+  FOREIGN KEY (log_id) REFERENCES Food_Scan_Log(log_id) ON DELETE CASCADE
+);
+
+
+-- Rebuilt by the expiry digest job (api/backend/jobs/expiry_digest.py): one row
+-- per fridge lot that expires within the job's window, for every client.
+-- digest_date is the day the job ran. Keyed so a client's digest is read in
+-- expiry order.
+CREATE TABLE Expiry_Digest (
+  client_id INT,
+  expires_on DATE NOT NULL,
+  ingredient_id INT,
+  name VARCHAR(100),
+  quantity DECIMAL(10,2) NOT NULL,
+  unit VARCHAR(20),
+  digest_date DATE NOT NULL,
+  PRIMARY KEY (client_id, expires_on, ingredient_id),
+  FOREIGN KEY (client_id) REFERENCES Client(client_id),
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE
+);
+
+
+-- One row per run of a scheduled job (api/backend/jobs/scheduler.py). The
+-- unique key is what makes a slot run once: every API replica tries to insert
+-- the row for a due (job, time) and only the one whose insert succeeds runs it.
+CREATE TABLE Job_Run (
+  run_id INT AUTO_INCREMENT PRIMARY KEY,
+  job_name VARCHAR(100) NOT NULL,
+  scheduled_for DATETIME NOT NULL,
+  host VARCHAR(255),
+  status VARCHAR(20) NOT NULL DEFAULT 'running',
+  started_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  finished_at DATETIME(3),
+  duration_ms INT,
+  row_count INT,
+  error TEXT,
+  UNIQUE KEY uq_job_run_slot (job_name, scheduled_for),
+  INDEX idx_job_run_scheduled (scheduled_for)
+);
+
+
+-- Queue of long-running operations (imports, purges, rebuilds) that workers
+-- (api/backend/jobs/worker.py) run off the request path. Workers claim the
+-- oldest queued job with SELECT ... FOR UPDATE SKIP LOCKED on idx_job_queue
+-- and report progress and a heartbeat while it runs; a running job whose
+-- heartbeat stops is queued again, up to a few attempts.
+CREATE TABLE Job_Queue (
+  job_id INT AUTO_INCREMENT PRIMARY KEY,
+  job_type VARCHAR(100) NOT NULL,
+  params JSON,
+  status VARCHAR(20) NOT NULL DEFAULT 'queued',
+  attempts INT NOT NULL DEFAULT 0,
+  worker VARCHAR(255),
+  progress_done INT NOT NULL DEFAULT 0,
+  progress_total INT,
+  result JSON,
+  error TEXT,
+  created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  started_at DATETIME(3),
+  heartbeat_at DATETIME(3),
+  finished_at DATETIME(3),
+  INDEX idx_job_queue (status, job_id)
+);
+
+
+-- One row per change to the tables served as change feeds (GET .../changes),
+-- written by the triggers at the end of this file. scope_id is the fridge of a
+-- Fridge_Ingredient row and NULL for the catalog tables; row_id (with row_date,
+-- a lot's expiry) is the key of the changed row.
+CREATE TABLE Change_Log (
+  change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  table_name VARCHAR(32) NOT NULL,
+  scope_id INT,
+  row_id INT NOT NULL,
+  row_date DATE,
+  op VARCHAR(6) NOT NULL,
+  changed_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  INDEX idx_change_log_scope (table_name, scope_id, change_id),
+  INDEX idx_change_log_time (changed_at)
+);
+
+
+-- Events recorded by the API's mutating routes in the same transaction as the
+-- rows they changed (api/backend/outbox). The relay in each API process reads
+-- the events after the last event_id it dispatched; rows older than a day are
+-- pruned.
+CREATE TABLE Outbox (
+  event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  topic VARCHAR(64) NOT NULL,
+  payload JSON NOT NULL,
+  created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  INDEX idx_outbox_created (created_at)
 );
 
 
@@ -972,44 +1105,6 @@ INSERT INTO Recipe_Ingredient (recipe_id, ingredient_id, quantity, unit) VALUES
 (11, 12, 2.0, 'tbsp');  -- Almonds
 
 
--- 15. Insert Ingredient_Macronutrient data (125+ rows - bridge table)
--- Add in smaller batches with separate INSERT statements to avoid constraint errors
-INSERT INTO Ingredient_Macronutrient (ingredient_id, macro_id) VALUES
-(1, 1), (2, 2), (3, 3), (4, 4), (5, 5),
-(6, 6), (7, 7), (8, 8), (9, 9), (10, 10),
-(11, 11), (12, 12), (13, 13), (14, 14), (15, 15),
-(16, 16), (17, 17), (18, 18), (19, 19), (20, 20),
-(21, 21), (22, 22), (23, 23), (24, 24), (25, 25),
-(26, 26), (27, 27), (28, 28), (29, 29), (30, 30),
-(31, 31), (32, 32), (33, 33), (34, 34), (35, 35),
-(36, 36), (37, 37), (38, 38), (39, 39), (40, 40);
-
-
--- Add 40 more rows (total now 80)
-INSERT INTO Ingredient_Macronutrient (ingredient_id, macro_id) VALUES
-(1, 2), (1, 3), (2, 3), (2, 4), (3, 4),
-(3, 5), (4, 5), (4, 6), (5, 6), (5, 7),
-(6, 7), (6, 8), (7, 8), (7, 9), (8, 9),
-(8, 10), (9, 10), (9, 11), (10, 11), (10, 12),
-(11, 12), (11, 13), (12, 13), (12, 14), (13, 14),
-(13, 15), (14, 15), (14, 16), (15, 16), (15, 17),
-(16, 17), (16, 18), (17, 18), (17, 19), (18, 19),
-(18, 20), (19, 20), (19, 21), (20, 21), (20, 22);
-
-
--- Add 45 more rows (total now 125+)
-INSERT INTO Ingredient_Macronutrient (ingredient_id, macro_id) VALUES
-(21, 22), (21, 23), (22, 23), (22, 24), (23, 24),
-(23, 25), (24, 25), (24, 26), (25, 26), (25, 27),
-(26, 27), (26, 28), (27, 28), (27, 29), (28, 29),
-(28, 30), (29, 30), (29, 31), (30, 31), (30, 32),
-(31, 32), (31, 33), (32, 33), (32, 34), (33, 34),
-(33, 35), (34, 35), (34, 36), (35, 36), (35, 37),
-(36, 37), (36, 38), (37, 38), (37, 39), (38, 39),
-(38, 40), (39, 40), (39, 1), (40, 1), (40, 2),
-(1, 10), (2, 11), (3, 12), (4, 13), (5, 14);
-
-
 -- 16. Insert Recipe_Brand data (125+ rows - bridge table)
 -- First batch of 75 rows
 INSERT INTO Recipe_Brand (recipe_id, brand_id) VALUES
@@ -1045,109 +1140,110 @@ INSERT INTO Recipe_Brand (recipe_id, brand_id) VALUES
 
 
 -- 17. Insert Fridge_Ingredient data (65 rows - weak entity)
-INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, quantity, unit, is_expired) VALUES
+-- Each lot starts out with its ingredient's catalog expiration date
+INSERT INTO Fridge_Ingredient (fridge_id, ingredient_id, expires_on, quantity, unit, is_expired) VALUES
 -- Fridge 1
-(1, 1, 2.5, 'pound', FALSE),
-(1, 2, 1.0, 'pound', FALSE),
-(1, 3, 1.5, 'cup', FALSE),
-(1, 6, 2.0, 'piece', FALSE),
-(1, 8, 12.0, 'whole', FALSE),
+(1, 1, '2025-12-13', 2.5, 'pound', FALSE),
+(1, 2, '2025-12-23', 1.0, 'pound', FALSE),
+(1, 3, '2026-02-06', 1.5, 'cup', FALSE),
+(1, 6, '2025-06-01', 2.0, 'piece', FALSE),
+(1, 8, '2025-05-08', 12.0, 'whole', FALSE),
 
 
 -- Fridge 2
-(2, 3, 3.0, 'cup', FALSE),
-(2, 7, 2.0, 'piece', FALSE),
-(2, 11, 32.0, 'oz', FALSE),
-(2, 15, 16.0, 'oz', FALSE),
-(2, 19, 3.0, 'whole', FALSE),
+(2, 3, '2026-02-06', 3.0, 'cup', FALSE),
+(2, 7, '2026-01-09', 2.0, 'piece', FALSE),
+(2, 11, '2025-12-23', 32.0, 'oz', FALSE),
+(2, 15, '2025-12-29', 16.0, 'oz', FALSE),
+(2, 19, '2025-06-15', 3.0, 'whole', FALSE),
 
 
 -- Fridge 3
-(3, 4, 2.0, 'cup', FALSE),
-(3, 8, 6.0, 'whole', FALSE),
-(3, 12, 8.0, 'oz', FALSE),
-(3, 16, 1.0, 'whole', FALSE),
-(3, 20, 10.0, 'oz', FALSE),
+(3, 4, '2025-05-18', 2.0, 'cup', FALSE),
+(3, 8, '2025-05-08', 6.0, 'whole', FALSE),
+(3, 12, '2025-11-01', 8.0, 'oz', FALSE),
+(3, 16, '2026-01-04', 1.0, 'whole', FALSE),
+(3, 20, '2025-05-25', 10.0, 'oz', FALSE),
 
 
 -- Fridge 4
-(4, 5, 1.5, 'cup', TRUE),
-(4, 9, 0.5, 'gallon', FALSE),
-(4, 13, 6.0, 'oz', FALSE),
-(4, 17, 3.0, 'whole', TRUE),
-(4, 21, 16.0, 'oz', FALSE),
+(4, 5, '2025-10-30', 1.5, 'cup', TRUE),
+(4, 9, '2025-12-27', 0.5, 'gallon', FALSE),
+(4, 13, '2025-05-19', 6.0, 'oz', FALSE),
+(4, 17, '2025-06-27', 3.0, 'whole', TRUE),
+(4, 21, '2025-07-14', 16.0, 'oz', FALSE),
 
 
 -- Fridge 5
-(5, 6, 2.0, 'piece', FALSE),
-(5, 10, 8.0, 'oz', FALSE),
-(5, 14, 4.0, 'whole', FALSE),
-(5, 18, 1.0, 'pound', TRUE),
-(5, 22, 2.0, 'cup', FALSE),
+(5, 6, '2025-06-01', 2.0, 'piece', FALSE),
+(5, 10, '2025-10-14', 8.0, 'oz', FALSE),
+(5, 14, '2025-08-20', 4.0, 'whole', FALSE),
+(5, 18, '2025-05-10', 1.0, 'pound', TRUE),
+(5, 22, '2026-01-30', 2.0, 'cup', FALSE),
 
 
 -- Fridge 6
-(6, 7, 3.0, 'piece', FALSE),
-(6, 11, 16.0, 'oz', TRUE),
-(6, 15, 12.0, 'oz', FALSE),
-(6, 19, 2.0, 'whole', FALSE),
-(6, 23, 1.5, 'cup', FALSE),
+(6, 7, '2026-01-09', 3.0, 'piece', FALSE),
+(6, 11, '2025-12-23', 16.0, 'oz', TRUE),
+(6, 15, '2025-12-29', 12.0, 'oz', FALSE),
+(6, 19, '2025-06-15', 2.0, 'whole', FALSE),
+(6, 23, '2026-03-15', 1.5, 'cup', FALSE),
 
 
 -- Fridge 7
-(7, 8, 12.0, 'whole', FALSE),
-(7, 12, 12.0, 'oz', FALSE),
-(7, 16, 2.0, 'whole', TRUE),
-(7, 20, 6.0, 'oz', FALSE),
-(7, 24, 1.0, 'pint', FALSE),
+(7, 8, '2025-05-08', 12.0, 'whole', FALSE),
+(7, 12, '2025-11-01', 12.0, 'oz', FALSE),
+(7, 16, '2026-01-04', 2.0, 'whole', TRUE),
+(7, 20, '2025-05-25', 6.0, 'oz', FALSE),
+(7, 24, '2025-06-10', 1.0, 'pint', FALSE),
 
 
 -- Fridge 8
-(8, 9, 1.0, 'gallon', FALSE),
-(8, 13, 8.0, 'oz', FALSE),
-(8, 17, 2.0, 'whole', FALSE),
-(8, 21, 14.0, 'oz', TRUE),
-(8, 25, 3.0, 'whole', FALSE),
+(8, 9, '2025-12-27', 1.0, 'gallon', FALSE),
+(8, 13, '2025-05-19', 8.0, 'oz', FALSE),
+(8, 17, '2025-06-27', 2.0, 'whole', FALSE),
+(8, 21, '2025-07-14', 14.0, 'oz', TRUE),
+(8, 25, '2025-05-12', 3.0, 'whole', FALSE),
 
 
 -- Fridge 9
-(9, 10, 8.0, 'oz', FALSE),
-(9, 14, 5.0, 'whole', FALSE),
-(9, 18, 1.5, 'pound', FALSE),
-(9, 22, 3.0, 'cup', TRUE),
-(9, 26, 16.0, 'oz', FALSE),
+(9, 10, '2025-10-14', 8.0, 'oz', FALSE),
+(9, 14, '2025-08-20', 5.0, 'whole', FALSE),
+(9, 18, '2025-05-10', 1.5, 'pound', FALSE),
+(9, 22, '2026-01-30', 3.0, 'cup', TRUE),
+(9, 26, '2026-04-22', 16.0, 'oz', FALSE),
 
 
 -- Fridge 10
-(10, 1, 1.0, 'pound', TRUE),
-(10, 5, 2.0, 'cup', FALSE),
-(10, 10, 16.0, 'oz', FALSE),
-(10, 15, 8.0, 'oz', FALSE),
-(10, 20, 8.0, 'oz', TRUE),
+(10, 1, '2025-12-13', 1.0, 'pound', TRUE),
+(10, 5, '2025-10-30', 2.0, 'cup', FALSE),
+(10, 10, '2025-10-14', 16.0, 'oz', FALSE),
+(10, 15, '2025-12-29', 8.0, 'oz', FALSE),
+(10, 20, '2025-05-25', 8.0, 'oz', TRUE),
 
 
 -- Additional fridges
-(11, 2, 1.5, 'pound', FALSE),
-(11, 7, 4.0, 'piece', FALSE),
-(11, 12, 10.0, 'oz', TRUE),
+(11, 2, '2025-12-23', 1.5, 'pound', FALSE),
+(11, 7, '2026-01-09', 4.0, 'piece', FALSE),
+(11, 12, '2025-11-01', 10.0, 'oz', TRUE),
 
 
-(12, 3, 2.0, 'cup', FALSE),
-(12, 8, 18.0, 'whole', FALSE),
-(12, 13, 6.0, 'oz', FALSE),
+(12, 3, '2026-02-06', 2.0, 'cup', FALSE),
+(12, 8, '2025-05-08', 18.0, 'whole', FALSE),
+(12, 13, '2025-05-19', 6.0, 'oz', FALSE),
 
 
-(13, 4, 3.0, 'cup', TRUE),
-(13, 9, 0.75, 'gallon', FALSE),
-(13, 14, 6.0, 'whole', FALSE),
+(13, 4, '2025-05-18', 3.0, 'cup', TRUE),
+(13, 9, '2025-12-27', 0.75, 'gallon', FALSE),
+(13, 14, '2025-08-20', 6.0, 'whole', FALSE),
 
 
-(14, 5, 1.0, 'cup', FALSE),
-(14, 10, 12.0, 'oz', TRUE),
+(14, 5, '2025-10-30', 1.0, 'cup', FALSE),
+(14, 10, '2025-10-14', 12.0, 'oz', TRUE),
 
 
-(15, 11, 2.0, 'cup', FALSE),
-(15, 16, 3.0, 'whole', FALSE);
+(15, 11, '2025-12-23', 2.0, 'cup', FALSE),
+(15, 16, '2026-01-04', 3.0, 'whole', FALSE);
 
 
 -- 18. Insert ShoppingList_Ingredient data (65 rows - weak entity)
@@ -1449,6 +1545,12 @@ INSERT INTO Leftover (recipe_id, quantity, is_expired) VALUES
 (29, 2, FALSE),
 (30, 1, TRUE);
 
+-- Leftovers seeded as expired were stored a week ago; the rest take the defaults
+UPDATE Leftover
+SET created_at = NOW() - INTERVAL 7 DAY,
+    expires_on = CURRENT_DATE - INTERVAL 2 DAY
+WHERE is_expired = TRUE;
+
 
 -- 23. Insert Nutrition_Tracking data (30 rows - for all clients)
 INSERT INTO Nutrition_Tracking (client_id, protein, fat, fiber, sodium, vitamins, calories, carbs) VALUES
@@ -1566,3 +1668,94 @@ INSERT INTO Error_Log (client_id, log_id, message) VALUES
 (20, 21, 'Scan returned empty result'),
 (20, 22, 'Timeout during scan');
 
+
+-- 25. Materialize Recipe_Macros from the seeded recipes and macronutrients
+INSERT INTO Recipe_Macros (recipe_id, protein, fat, fiber, vitamin, sodium, calories, carbs)
+SELECT r.recipe_id,
+       COALESCE(SUM(ri.quantity * m.protein), 0),
+       COALESCE(SUM(ri.quantity * m.fat), 0),
+       COALESCE(SUM(ri.quantity * m.fiber), 0),
+       COALESCE(SUM(ri.quantity * m.vitamin), 0),
+       COALESCE(SUM(ri.quantity * m.sodium), 0),
+       COALESCE(SUM(ri.quantity * m.calories), 0),
+       COALESCE(SUM(ri.quantity * m.carbs), 0)
+FROM Recipe r
+LEFT JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+LEFT JOIN Macronutrients m ON m.ingredient_id = ri.ingredient_id
+GROUP BY r.recipe_id;
+
+
+-- 26. Log changes to the tables served as change feeds into Change_Log (created
+-- after the seed data, so the log starts empty)
+CREATE TRIGGER trg_fridge_ingredient_insert AFTER INSERT ON Fridge_Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Fridge_Ingredient', NEW.fridge_id, NEW.ingredient_id, NEW.expires_on, 'insert');
+
+-- A lot whose key changed is logged under its old key as well
+CREATE TRIGGER trg_fridge_ingredient_update AFTER UPDATE ON Fridge_Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  SELECT 'Fridge_Ingredient', NEW.fridge_id, NEW.ingredient_id, NEW.expires_on, 'update'
+  UNION ALL
+  SELECT 'Fridge_Ingredient', OLD.fridge_id, OLD.ingredient_id, OLD.expires_on, 'delete'
+  FROM DUAL
+  WHERE (OLD.fridge_id, OLD.ingredient_id, OLD.expires_on) <> (NEW.fridge_id, NEW.ingredient_id, NEW.expires_on);
+
+CREATE TRIGGER trg_fridge_ingredient_delete AFTER DELETE ON Fridge_Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Fridge_Ingredient', OLD.fridge_id, OLD.ingredient_id, OLD.expires_on, 'delete');
+
+CREATE TRIGGER trg_ingredient_insert AFTER INSERT ON Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Ingredient', NULL, NEW.ingredient_id, NULL, 'insert');
+
+CREATE TRIGGER trg_ingredient_update AFTER UPDATE ON Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Ingredient', NULL, NEW.ingredient_id, NULL, 'update');
+
+-- Rows removed by ON DELETE CASCADE don't fire their own triggers, so deleting
+-- an ingredient logs its fridge lots and macronutrients too
+CREATE TRIGGER trg_ingredient_delete BEFORE DELETE ON Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  SELECT 'Ingredient', NULL, OLD.ingredient_id, NULL, 'delete'
+  UNION ALL
+  SELECT 'Macronutrients', NULL, m.macro_id, NULL, 'delete'
+  FROM Macronutrients m WHERE m.ingredient_id = OLD.ingredient_id
+  UNION ALL
+  SELECT 'Fridge_Ingredient', fi.fridge_id, fi.ingredient_id, fi.expires_on, 'delete'
+  FROM Fridge_Ingredient fi WHERE fi.ingredient_id = OLD.ingredient_id;
+
+CREATE TRIGGER trg_macronutrients_insert AFTER INSERT ON Macronutrients FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Macronutrients', NULL, NEW.macro_id, NULL, 'insert');
+
+CREATE TRIGGER trg_macronutrients_update AFTER UPDATE ON Macronutrients FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Macronutrients', NULL, NEW.macro_id, NULL, 'update');
+
+CREATE TRIGGER trg_macronutrients_delete AFTER DELETE ON Macronutrients FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Macronutrients', NULL, OLD.macro_id, NULL, 'delete');
+
+CREATE TRIGGER trg_recipe_insert AFTER INSERT ON Recipe FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Recipe', NULL, NEW.recipe_id, NULL, 'insert');
+
+CREATE TRIGGER trg_recipe_update AFTER UPDATE ON Recipe FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Recipe', NULL, NEW.recipe_id, NULL, 'update');
+
+CREATE TRIGGER trg_recipe_delete AFTER DELETE ON Recipe FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Recipe', NULL, OLD.recipe_id, NULL, 'delete');
+
+CREATE TRIGGER trg_leftover_insert AFTER INSERT ON Leftover FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Leftover', NULL, NEW.leftover_id, NULL, 'insert');
+
+CREATE TRIGGER trg_leftover_update AFTER UPDATE ON Leftover FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Leftover', NULL, NEW.leftover_id, NULL, 'update');
+
+CREATE TRIGGER trg_leftover_delete AFTER DELETE ON Leftover FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Leftover', NULL, OLD.leftover_id, NULL, 'delete');
@@ -0,0 +1,40 @@
+-- Adds Recipe.servings and the Recipe_Macros table of fridgefriend.sql to a
+-- database created before them, and fills Recipe_Macros from the recipes and
+-- macronutrients already there. The API keeps it current from then on. Fresh
+-- databases already have both.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/001_recipe_macros.sql
+
+USE fridgefriend;
+
+ALTER TABLE Recipe ADD COLUMN servings INT NOT NULL DEFAULT 1;
+
+-- Materialized macro totals for each recipe (sum of Recipe_Ingredient quantity
+-- times the ingredient's Macronutrients row). Kept current by the API whenever
+-- macronutrients or recipe ingredients change.
+CREATE TABLE Recipe_Macros (
+  recipe_id INT PRIMARY KEY,
+  protein DECIMAL(12,2) NOT NULL DEFAULT 0,
+  fat DECIMAL(12,2) NOT NULL DEFAULT 0,
+  fiber DECIMAL(12,2) NOT NULL DEFAULT 0,
+  vitamin DECIMAL(12,2) NOT NULL DEFAULT 0,
+  sodium DECIMAL(12,2) NOT NULL DEFAULT 0,
+  calories DECIMAL(12,2) NOT NULL DEFAULT 0,
+  carbs DECIMAL(12,2) NOT NULL DEFAULT 0,
+  FOREIGN KEY (recipe_id) REFERENCES Recipe(recipe_id)
+);
+
+INSERT INTO Recipe_Macros (recipe_id, protein, fat, fiber, vitamin, sodium, calories, carbs)
+SELECT r.recipe_id,
+       COALESCE(SUM(ri.quantity * m.protein), 0),
+       COALESCE(SUM(ri.quantity * m.fat), 0),
+       COALESCE(SUM(ri.quantity * m.fiber), 0),
+       COALESCE(SUM(ri.quantity * m.vitamin), 0),
+       COALESCE(SUM(ri.quantity * m.sodium), 0),
+       COALESCE(SUM(ri.quantity * m.calories), 0),
+       COALESCE(SUM(ri.quantity * m.carbs), 0)
+FROM Recipe r
+LEFT JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+LEFT JOIN Macronutrients m ON m.ingredient_id = ri.ingredient_id
+GROUP BY r.recipe_id;
@@ -0,0 +1,23 @@
+-- Makes Fridge_Ingredient one row per lot, as in fridgefriend.sql, in a
+-- database created before lots: adds expires_on, makes it part of the primary
+-- key and adds the expiry indexes. Each existing row becomes one lot that
+-- expires on its ingredient's catalog date (or in 7 days if it has none, as
+-- when the API adds stock). Fresh databases already have lots.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/002_fridge_lots.sql
+
+USE fridgefriend;
+
+ALTER TABLE Fridge_Ingredient ADD COLUMN expires_on DATE AFTER ingredient_id;
+
+UPDATE Fridge_Ingredient fi
+JOIN Ingredient i ON i.ingredient_id = fi.ingredient_id
+SET fi.expires_on = COALESCE(i.expiration_date, CURDATE() + INTERVAL 7 DAY);
+
+ALTER TABLE Fridge_Ingredient
+  MODIFY expires_on DATE NOT NULL,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (fridge_id, ingredient_id, expires_on),
+  ADD INDEX idx_fridge_ingredient_fridge_expiry (fridge_id, expires_on),
+  ADD INDEX idx_fridge_ingredient_expiry (expires_on);
@@ -0,0 +1,19 @@
+-- Adds the created_at and expires_on columns of fridgefriend.sql to Leftover in
+-- a database created before them. Existing leftovers count as stored now and
+-- keep for the default 5 days, except the ones already marked expired, which
+-- get dates in the past as in the seed data. Fresh databases already have them.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/003_leftover_expiry.sql
+
+USE fridgefriend;
+
+ALTER TABLE Leftover
+  ADD COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  ADD COLUMN expires_on DATE NOT NULL DEFAULT (CURRENT_DATE + INTERVAL 5 DAY),
+  ADD INDEX idx_leftover_expiry (expires_on);
+
+UPDATE Leftover
+SET created_at = NOW() - INTERVAL 7 DAY,
+    expires_on = CURRENT_DATE - INTERVAL 2 DAY
+WHERE is_expired = TRUE;
@@ -0,0 +1,25 @@
+-- Adds the Expiry_Digest table of fridgefriend.sql to a database created
+-- before it. The expiry digest job fills it on its next run. Fresh databases
+-- already have it.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/004_expiry_digest.sql
+
+USE fridgefriend;
+
+-- Rebuilt by the expiry digest job (api/backend/jobs/expiry_digest.py): one row
+-- per fridge lot that expires within the job's window, for every client.
+-- digest_date is the day the job ran. Keyed so a client's digest is read in
+-- expiry order.
+CREATE TABLE Expiry_Digest (
+  client_id INT,
+  expires_on DATE NOT NULL,
+  ingredient_id INT,
+  name VARCHAR(100),
+  quantity DECIMAL(10,2) NOT NULL,
+  unit VARCHAR(20),
+  digest_date DATE NOT NULL,
+  PRIMARY KEY (client_id, expires_on, ingredient_id),
+  FOREIGN KEY (client_id) REFERENCES Client(client_id),
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id)
+);
@@ -0,0 +1,26 @@
+-- Adds the Job_Run table of fridgefriend.sql to a database created before it.
+-- The API's job scheduler claims every run in it, so run this before deploying
+-- an API with JOB_SCHEDULER on. Fresh databases already have it.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/005_job_run.sql
+
+USE fridgefriend;
+
+-- One row per run of a scheduled job (api/backend/jobs/scheduler.py). The
+-- unique key is what makes a slot run once: every API replica tries to insert
+-- the row for a due (job, time) and only the one whose insert succeeds runs it.
+CREATE TABLE Job_Run (
+  run_id INT AUTO_INCREMENT PRIMARY KEY,
+  job_name VARCHAR(100) NOT NULL,
+  scheduled_for DATETIME NOT NULL,
+  host VARCHAR(255),
+  status VARCHAR(20) NOT NULL DEFAULT 'running',
+  started_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  finished_at DATETIME(3),
+  duration_ms INT,
+  row_count INT,
+  error TEXT,
+  UNIQUE KEY uq_job_run_slot (job_name, scheduled_for),
+  INDEX idx_job_run_scheduled (scheduled_for)
+);
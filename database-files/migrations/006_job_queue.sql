@@ -0,0 +1,31 @@
+-- Adds the Job_Queue table of fridgefriend.sql to a database created before
+-- it. POST /jobs and the worker processes use it. Fresh databases already
+-- have it.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/006_job_queue.sql
+
+USE fridgefriend;
+
+-- Queue of long-running operations (imports, purges, rebuilds) that workers
+-- (api/backend/jobs/worker.py) run off the request path. Workers claim the
+-- oldest queued job with SELECT ... FOR UPDATE SKIP LOCKED on idx_job_queue
+-- and report progress and a heartbeat while it runs; a running job whose
+-- heartbeat stops is queued again, up to a few attempts.
+CREATE TABLE Job_Queue (
+  job_id INT AUTO_INCREMENT PRIMARY KEY,
+  job_type VARCHAR(100) NOT NULL,
+  params JSON,
+  status VARCHAR(20) NOT NULL DEFAULT 'queued',
+  attempts INT NOT NULL DEFAULT 0,
+  worker VARCHAR(255),
+  progress_done INT NOT NULL DEFAULT 0,
+  progress_total INT,
+  result JSON,
+  error TEXT,
+  created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  started_at DATETIME(3),
+  heartbeat_at DATETIME(3),
+  finished_at DATETIME(3),
+  INDEX idx_job_queue (status, job_id)
+);
@@ -0,0 +1,50 @@
+-- Adds the ON DELETE rules of fridgefriend.sql to a database created before
+-- them, so DELETE FROM Ingredient removes the rows that refer to an ingredient
+-- (see DELETE /ingredients/<id>). Fresh databases already have them.
+--
+-- MySQL can't change a foreign key in place, so each one is dropped and added
+-- back under the name MySQL generated for it in fridgefriend.sql.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/007_ingredient_delete_cascades.sql
+
+USE fridgefriend;
+
+ALTER TABLE Food_Scan_Log DROP FOREIGN KEY Food_Scan_Log_ibfk_1;
+ALTER TABLE Food_Scan_Log ADD CONSTRAINT Food_Scan_Log_ibfk_1
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
+
+ALTER TABLE Macronutrients DROP FOREIGN KEY Macronutrients_ibfk_1;
+ALTER TABLE Macronutrients ADD CONSTRAINT Macronutrients_ibfk_1
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
+
+ALTER TABLE Client DROP FOREIGN KEY Client_ibfk_5;
+ALTER TABLE Client ADD CONSTRAINT Client_ibfk_5
+  FOREIGN KEY (log_id) REFERENCES Food_Scan_Log(log_id) ON DELETE SET NULL;
+
+ALTER TABLE Recipe_Ingredient DROP FOREIGN KEY Recipe_Ingredient_ibfk_2;
+ALTER TABLE Recipe_Ingredient ADD CONSTRAINT Recipe_Ingredient_ibfk_2
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
+
+ALTER TABLE Ingredient_Macronutrient DROP FOREIGN KEY Ingredient_Macronutrient_ibfk_1;
+ALTER TABLE Ingredient_Macronutrient DROP FOREIGN KEY Ingredient_Macronutrient_ibfk_2;
+ALTER TABLE Ingredient_Macronutrient ADD CONSTRAINT Ingredient_Macronutrient_ibfk_1
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
+ALTER TABLE Ingredient_Macronutrient ADD CONSTRAINT Ingredient_Macronutrient_ibfk_2
+  FOREIGN KEY (macro_id) REFERENCES Macronutrients(macro_id) ON DELETE CASCADE;
+
+ALTER TABLE Fridge_Ingredient DROP FOREIGN KEY Fridge_Ingredient_ibfk_2;
+ALTER TABLE Fridge_Ingredient ADD CONSTRAINT Fridge_Ingredient_ibfk_2
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
+
+ALTER TABLE ShoppingList_Ingredient DROP FOREIGN KEY ShoppingList_Ingredient_ibfk_2;
+ALTER TABLE ShoppingList_Ingredient ADD CONSTRAINT ShoppingList_Ingredient_ibfk_2
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
+
+ALTER TABLE Error_Log DROP FOREIGN KEY Error_Log_ibfk_2;
+ALTER TABLE Error_Log ADD CONSTRAINT Error_Log_ibfk_2
+  FOREIGN KEY (log_id) REFERENCES Food_Scan_Log(log_id) ON DELETE CASCADE;
+
+ALTER TABLE Expiry_Digest DROP FOREIGN KEY Expiry_Digest_ibfk_2;
+ALTER TABLE Expiry_Digest ADD CONSTRAINT Expiry_Digest_ibfk_2
+  FOREIGN KEY (ingredient_id) REFERENCES Ingredient(ingredient_id) ON DELETE CASCADE;
@@ -0,0 +1,16 @@
+-- Adds the version column of fridgefriend.sql to a database created before it.
+-- The API's partial updates (PUT /users/<id>, /ingredients/<id>, ...) bump it
+-- and check it, so they fail until this has run. Fresh databases already have it.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/008_row_versions.sql
+
+USE fridgefriend;
+
+ALTER TABLE User ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Personal_Constraints ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Workout ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Ingredient ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Macronutrients ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Meal_Plan ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Leftover ADD COLUMN version INT NOT NULL DEFAULT 1;
@@ -0,0 +1,40 @@
+-- Makes Macronutrients one row per ingredient, as in fridgefriend.sql, on a
+-- database created before that: drops the Ingredient_Macronutrient bridge
+-- table (nothing reads it; Macronutrients.ingredient_id is the link) and adds
+-- a unique key on Macronutrients.ingredient_id. Fresh databases already have it.
+--
+-- An ingredient with several Macronutrients rows keeps the one with the lowest
+-- macro_id, the one GET /macronutrients?ingredient_id= used to return. Recipe
+-- macros summed over the extra rows are recomputed at the end.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/009_one_macros_row_per_ingredient.sql
+
+USE fridgefriend;
+
+DROP TABLE Ingredient_Macronutrient;
+
+DELETE m FROM Macronutrients m
+JOIN Macronutrients kept ON kept.ingredient_id = m.ingredient_id AND kept.macro_id < m.macro_id;
+
+DELETE FROM Macronutrients WHERE ingredient_id IS NULL;
+
+-- The foreign key's own index on ingredient_id is dropped by MySQL once the
+-- unique key can serve it
+ALTER TABLE Macronutrients
+  MODIFY ingredient_id INT NOT NULL,
+  ADD UNIQUE KEY uq_macronutrients_ingredient (ingredient_id);
+
+REPLACE INTO Recipe_Macros (recipe_id, protein, fat, fiber, vitamin, sodium, calories, carbs)
+SELECT r.recipe_id,
+       COALESCE(SUM(ri.quantity * m.protein), 0),
+       COALESCE(SUM(ri.quantity * m.fat), 0),
+       COALESCE(SUM(ri.quantity * m.fiber), 0),
+       COALESCE(SUM(ri.quantity * m.vitamin), 0),
+       COALESCE(SUM(ri.quantity * m.sodium), 0),
+       COALESCE(SUM(ri.quantity * m.calories), 0),
+       COALESCE(SUM(ri.quantity * m.carbs), 0)
+FROM Recipe r
+LEFT JOIN Recipe_Ingredient ri ON ri.recipe_id = r.recipe_id
+LEFT JOIN Macronutrients m ON m.ingredient_id = ri.ingredient_id
+GROUP BY r.recipe_id;
@@ -0,0 +1,98 @@
+-- Adds the Change_Log table of fridgefriend.sql and the triggers that fill it
+-- to a database created before them. GET /fridge/changes, /ingredients/changes,
+-- /macronutrients/changes, /recipes/changes and /leftovers/changes read it.
+-- Changes made before this runs aren't logged; clients start with a full sync.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/010_change_log.sql
+
+USE fridgefriend;
+
+-- One row per change to the tables served as change feeds (GET .../changes),
+-- written by the triggers at the end of this file. scope_id is the fridge of a
+-- Fridge_Ingredient row and NULL for the catalog tables; row_id (with row_date,
+-- a lot's expiry) is the key of the changed row.
+CREATE TABLE Change_Log (
+  change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  table_name VARCHAR(32) NOT NULL,
+  scope_id INT,
+  row_id INT NOT NULL,
+  row_date DATE,
+  op VARCHAR(6) NOT NULL,
+  changed_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  INDEX idx_change_log_scope (table_name, scope_id, change_id),
+  INDEX idx_change_log_time (changed_at)
+);
+
+CREATE TRIGGER trg_fridge_ingredient_insert AFTER INSERT ON Fridge_Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Fridge_Ingredient', NEW.fridge_id, NEW.ingredient_id, NEW.expires_on, 'insert');
+
+-- A lot whose key changed is logged under its old key as well
+CREATE TRIGGER trg_fridge_ingredient_update AFTER UPDATE ON Fridge_Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  SELECT 'Fridge_Ingredient', NEW.fridge_id, NEW.ingredient_id, NEW.expires_on, 'update'
+  UNION ALL
+  SELECT 'Fridge_Ingredient', OLD.fridge_id, OLD.ingredient_id, OLD.expires_on, 'delete'
+  FROM DUAL
+  WHERE (OLD.fridge_id, OLD.ingredient_id, OLD.expires_on) <> (NEW.fridge_id, NEW.ingredient_id, NEW.expires_on);
+
+CREATE TRIGGER trg_fridge_ingredient_delete AFTER DELETE ON Fridge_Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Fridge_Ingredient', OLD.fridge_id, OLD.ingredient_id, OLD.expires_on, 'delete');
+
+CREATE TRIGGER trg_ingredient_insert AFTER INSERT ON Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Ingredient', NULL, NEW.ingredient_id, NULL, 'insert');
+
+CREATE TRIGGER trg_ingredient_update AFTER UPDATE ON Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Ingredient', NULL, NEW.ingredient_id, NULL, 'update');
+
+-- Rows removed by ON DELETE CASCADE don't fire their own triggers, so deleting
+-- an ingredient logs its fridge lots and macronutrients too
+CREATE TRIGGER trg_ingredient_delete BEFORE DELETE ON Ingredient FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  SELECT 'Ingredient', NULL, OLD.ingredient_id, NULL, 'delete'
+  UNION ALL
+  SELECT 'Macronutrients', NULL, m.macro_id, NULL, 'delete'
+  FROM Macronutrients m WHERE m.ingredient_id = OLD.ingredient_id
+  UNION ALL
+  SELECT 'Fridge_Ingredient', fi.fridge_id, fi.ingredient_id, fi.expires_on, 'delete'
+  FROM Fridge_Ingredient fi WHERE fi.ingredient_id = OLD.ingredient_id;
+
+CREATE TRIGGER trg_macronutrients_insert AFTER INSERT ON Macronutrients FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Macronutrients', NULL, NEW.macro_id, NULL, 'insert');
+
+CREATE TRIGGER trg_macronutrients_update AFTER UPDATE ON Macronutrients FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Macronutrients', NULL, NEW.macro_id, NULL, 'update');
+
+CREATE TRIGGER trg_macronutrients_delete AFTER DELETE ON Macronutrients FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Macronutrients', NULL, OLD.macro_id, NULL, 'delete');
+
+CREATE TRIGGER trg_recipe_insert AFTER INSERT ON Recipe FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Recipe', NULL, NEW.recipe_id, NULL, 'insert');
+
+CREATE TRIGGER trg_recipe_update AFTER UPDATE ON Recipe FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Recipe', NULL, NEW.recipe_id, NULL, 'update');
+
+CREATE TRIGGER trg_recipe_delete AFTER DELETE ON Recipe FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Recipe', NULL, OLD.recipe_id, NULL, 'delete');
+
+CREATE TRIGGER trg_leftover_insert AFTER INSERT ON Leftover FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Leftover', NULL, NEW.leftover_id, NULL, 'insert');
+
+CREATE TRIGGER trg_leftover_update AFTER UPDATE ON Leftover FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Leftover', NULL, NEW.leftover_id, NULL, 'update');
+
+CREATE TRIGGER trg_leftover_delete AFTER DELETE ON Leftover FOR EACH ROW
+  INSERT INTO Change_Log (table_name, scope_id, row_id, row_date, op)
+  VALUES ('Leftover', NULL, OLD.leftover_id, NULL, 'delete');
@@ -0,0 +1,20 @@
+-- Adds the Outbox table of fridgefriend.sql to a database created before it.
+-- The API's mutating routes write to it, so run this before deploying an API
+-- that records events.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/011_outbox.sql
+
+USE fridgefriend;
+
+-- Events recorded by the API's mutating routes in the same transaction as the
+-- rows they changed (api/backend/outbox). The relay in each API process reads
+-- the events after the last event_id it dispatched; rows older than a day are
+-- pruned.
+CREATE TABLE Outbox (
+  event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  topic VARCHAR(64) NOT NULL,
+  payload JSON NOT NULL,
+  created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  INDEX idx_outbox_created (created_at)
+);
@@ -0,0 +1,12 @@
+-- Adds the generated column of fridgefriend.sql to ShoppingList_Ingredient in a
+-- database created before it. POST /shopping-lists/generate sets it on the rows
+-- it adds and only removes those again, so rows already on the lists (added by
+-- hand or seeded with a cost) count as manual and are kept. Fresh databases
+-- already have it.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/012_generated_shopping_list_rows.sql
+
+USE fridgefriend;
+
+ALTER TABLE ShoppingList_Ingredient ADD COLUMN generated BOOLEAN NOT NULL DEFAULT FALSE;
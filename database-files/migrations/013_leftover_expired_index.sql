@@ -0,0 +1,10 @@
+-- Adds the (is_expired, expires_on) index of fridgefriend.sql to Leftover in a
+-- database created before it. GET /leftovers?status= and the expired leftover
+-- sweeps read ranges of it. Fresh databases already have it.
+--
+-- Run once against an existing database:
+--   mysql -u root -p fridgefriend < database-files/migrations/013_leftover_expired_index.sql
+
+USE fridgefriend;
+
+ALTER TABLE Leftover ADD INDEX idx_leftover_expired (is_expired, expires_on);